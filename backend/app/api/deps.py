@@ -5,7 +5,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.core.security import verify_token
 from app.core.config import settings
-from app.core.exceptions import UnauthorizedError
+from app.core.exceptions import UnauthorizedError, ForbiddenError
 
 
 security = HTTPBearer(auto_error=False)
@@ -33,6 +33,16 @@ async def get_current_user(
         raise UnauthorizedError("Invalid authentication credentials")
 
 
+async def get_admin_user(
+    current_user: Annotated[dict, Depends(get_current_user)],
+) -> dict:
+    """現在のユーザを取得（管理者以外は403）"""
+    admin_user_ids = {user_id.strip() for user_id in settings.admin_user_ids.split(",") if user_id.strip()}
+    if current_user["user_id"] not in admin_user_ids:
+        raise ForbiddenError("Administrator permission required")
+    return current_user
+
+
 def get_request_id(request: Request) -> Optional[str]:
     """リクエストIDを取得"""
     return getattr(request.state, "request_id", None)
@@ -0,0 +1,17 @@
+"""管理APIルート"""
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_admin_user
+from app.services.cache_service import get_cache_backend
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/cache/stats", response_model=dict)
+async def get_cache_stats_endpoint(
+    current_user: dict = Depends(get_admin_user),
+):
+    """キャッシュの統計情報取得（管理者のみ）"""
+    return {
+        "data": await get_cache_backend().stats()
+    }
@@ -53,14 +53,14 @@ class CardUpdateRequest(BaseModel):
 @router.get("", response_model=dict)
 async def list_cards_endpoint(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="前のページのnext_cursor"),
     dataset_id: Optional[str] = Query(None),
     q: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user),
 ):
     """Card一覧取得"""
     user_id = current_user["user_id"]
-    cards, total = await list_cards(owner_id=user_id, dataset_id=dataset_id, limit=limit, offset=offset, q=q)
+    cards, next_cursor = await list_cards(owner_id=user_id, dataset_id=dataset_id, limit=limit, cursor=cursor, q=q)
     
     return {
         "data": [
@@ -79,10 +79,9 @@ async def list_cards_endpoint(
             for c in cards
         ],
         "pagination": {
-            "total": total,
             "limit": limit,
-            "offset": offset,
-            "has_next": offset + limit < total,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
         },
     }
 
@@ -1,9 +1,11 @@
 """Dashboards APIルート"""
+import json
 from typing import Optional
-from fastapi import APIRouter, Depends, status, Query, Path, HTTPException
+from fastapi import APIRouter, Depends, status, Query, Path, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_request_id
 from app.core.exceptions import NotFoundError, ForbiddenError
 from app.services.dashboard_service import (
     create_dashboard,
@@ -13,7 +15,10 @@ from app.services.dashboard_service import (
     delete_dashboard,
     clone_dashboard,
     get_referenced_datasets,
+    get_layout_card_ids,
 )
+from app.services.card_service import render_cards
+from app.services.audit_log_service import create_audit_log
 from app.services.dashboard_share_service import check_dashboard_permission
 from app.models.dashboard import Dashboard, DashboardCreate, DashboardUpdate
 
@@ -49,16 +54,22 @@ class CloneDashboardRequest(BaseModel):
     name: Optional[str] = None
 
 
+class DashboardRenderRequest(BaseModel):
+    filters: dict = {}
+    # 指定時はlayout内のこのCardのみを描画する（表示範囲内のCardのみ描画する場合等）
+    card_ids: Optional[list[str]] = None
+
+
 @router.get("", response_model=dict)
 async def list_dashboards_endpoint(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="前のページのnext_cursor"),
     q: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user),
 ):
     """Dashboard一覧取得"""
     user_id = current_user["user_id"]
-    dashboards, total = await list_dashboards(owner_id=user_id, limit=limit, offset=offset, q=q)
+    dashboards, next_cursor = await list_dashboards(owner_id=user_id, limit=limit, cursor=cursor, q=q)
     
     return {
         "data": [
@@ -75,10 +86,9 @@ async def list_dashboards_endpoint(
             for d in dashboards
         ],
         "pagination": {
-            "total": total,
             "limit": limit,
-            "offset": offset,
-            "has_next": offset + limit < total,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
         },
     }
 
@@ -252,3 +262,51 @@ async def get_referenced_datasets_endpoint(
     return {
         "data": dataset_ids
     }
+
+
+@router.post("/{dashboard_id}/render")
+async def render_dashboard_endpoint(
+    dashboard_id: str = Path(..., description="Dashboard ID"),
+    request: DashboardRenderRequest = ...,
+    current_user: dict = Depends(get_current_user),
+    http_request: Request = ...,
+):
+    """Dashboard一括描画
+    
+    layout内のCardを現在のフィルタでまとめて実行し、完了したCardから順に
+    NDJSON（1行に {"card_id", "status", "data" または "error"}）で返す。
+    """
+    dashboard = await get_dashboard(dashboard_id)
+    if not dashboard:
+        raise NotFoundError("Dashboard", dashboard_id)
+    
+    # 権限チェック
+    user_id = current_user["user_id"]
+    permission = await check_dashboard_permission(dashboard_id, user_id)
+    if not permission:
+        raise ForbiddenError("You don't have permission to view this dashboard")
+    
+    card_ids = get_layout_card_ids(dashboard.layout)
+    if request.card_ids is not None:
+        requested = set(request.card_ids)
+        card_ids = [card_id for card_id in card_ids if card_id in requested]
+    request_id = get_request_id(http_request)
+    
+    async def stream():
+        async for result in render_cards(card_ids, request.filters):
+            if result["status"] == "error":
+                # 実行失敗ログ
+                await create_audit_log(
+                    event_type="CARD_EXECUTION_FAILED",
+                    user_id=user_id,
+                    target_type="Card",
+                    target_id=result["card_id"],
+                    details={
+                        "dashboard_id": dashboard_id,
+                        "error_message": result["error"],
+                    },
+                    request_id=request_id,
+                )
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
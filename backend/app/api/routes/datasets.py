@@ -56,18 +56,19 @@ class S3ImportRequest(BaseModel):
     encoding: str = "utf-8"
     delimiter: str = ","
     has_header: bool = True
+    partition_column: Optional[str] = None
 
 
 @router.get("", response_model=dict)
 async def list_datasets_endpoint(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="前のページのnext_cursor"),
     q: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user),
 ):
     """Dataset一覧取得"""
     user_id = current_user["user_id"]
-    datasets, total = await list_datasets(owner_id=user_id, limit=limit, offset=offset, q=q)
+    datasets, next_cursor = await list_datasets(owner_id=user_id, limit=limit, cursor=cursor, q=q)
     
     return {
         "data": [
@@ -90,10 +91,9 @@ async def list_datasets_endpoint(
             for d in datasets
         ],
         "pagination": {
-            "total": total,
             "limit": limit,
-            "offset": offset,
-            "has_next": offset + limit < total,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
         },
     }
 
@@ -105,23 +105,25 @@ async def create_dataset_endpoint(
     encoding: str = Form("utf-8"),
     delimiter: str = Form(","),
     has_header: bool = Form(True),
+    partition_column: Optional[str] = Form(None),
     current_user: dict = Depends(get_current_user),
     http_request: Request = ...,
 ):
     """Dataset作成（Local CSV取り込み）"""
     user_id = current_user["user_id"]
     
-    # ファイルを読み込む
-    csv_content = await file.read()
+    # アップロードファイルは全体を読み込まず、ストリームとして渡す
+    await file.seek(0)
     
     try:
         dataset = await create_dataset_from_local_csv(
             user_id=user_id,
             name=name,
-            csv_content=csv_content,
+            csv_file=file.file,
             encoding=encoding,
             delimiter=delimiter,
             has_header=has_header,
+            partition_column=partition_column or None,
         )
     except ValueError as e:
         raise BadRequestError(str(e))
@@ -179,6 +181,7 @@ async def s3_import_dataset_endpoint(
             encoding=request.encoding,
             delimiter=request.delimiter,
             has_header=request.has_header,
+            partition_column=request.partition_column or None,
         )
     except ValueError as e:
         raise BadRequestError(str(e))
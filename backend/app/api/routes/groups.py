@@ -42,12 +42,12 @@ class AddMemberRequest(BaseModel):
 @router.get("", response_model=dict)
 async def list_groups_endpoint(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="前のページのnext_cursor"),
     q: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user),
 ):
     """グループ一覧取得"""
-    groups, total = await list_groups(limit=limit, offset=offset, q=q)
+    groups, next_cursor = await list_groups(limit=limit, cursor=cursor, q=q)
     
     return {
         "data": [
@@ -60,10 +60,9 @@ async def list_groups_endpoint(
             for g in groups
         ],
         "pagination": {
-            "total": total,
             "limit": limit,
-            "offset": offset,
-            "has_next": offset + limit < total,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
         },
     }
 
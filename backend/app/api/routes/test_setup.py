@@ -1,4 +1,5 @@
 """テスト用セットアップAPIルート"""
+import io
 import uuid
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
@@ -53,7 +54,7 @@ B,2024-01-02,250
     dataset = await create_dataset_from_local_csv(
         user_id=user.user_id,
         name="Test Dataset",
-        csv_content=csv_content,
+        csv_file=io.BytesIO(csv_content),
         encoding="utf-8",
         delimiter=",",
         has_header=True,
@@ -63,13 +63,13 @@ class TransformExecutionResponse(BaseModel):
 @router.get("", response_model=dict)
 async def list_transforms_endpoint(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="前のページのnext_cursor"),
     q: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user),
 ):
     """Transform一覧取得"""
     user_id = current_user["user_id"]
-    transforms, total = await list_transforms(owner_id=user_id, limit=limit, offset=offset, q=q)
+    transforms, next_cursor = await list_transforms(owner_id=user_id, limit=limit, cursor=cursor, q=q)
     
     return {
         "data": [
@@ -89,10 +89,9 @@ async def list_transforms_endpoint(
             for t in transforms
         ],
         "pagination": {
-            "total": total,
             "limit": limit,
-            "offset": offset,
-            "has_next": offset + limit < total,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
         },
     }
 
@@ -267,7 +266,7 @@ async def execute_transform_endpoint(
 async def list_executions_endpoint(
     transform_id: str = Path(..., description="Transform ID"),
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="前のページのnext_cursor"),
     current_user: dict = Depends(get_current_user),
 ):
     """Transform実行履歴取得"""
@@ -275,7 +274,7 @@ async def list_executions_endpoint(
     if not transform:
         raise NotFoundError("Transform", transform_id)
     
-    executions, total = await list_transform_executions(transform_id, limit=limit, offset=offset)
+    executions, next_cursor = await list_transform_executions(transform_id, limit=limit, cursor=cursor)
     
     return {
         "data": [
@@ -291,9 +290,8 @@ async def list_executions_endpoint(
             for e in executions
         ],
         "pagination": {
-            "total": total,
             "limit": limit,
-            "offset": offset,
-            "has_next": offset + limit < total,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
         },
     }
@@ -13,20 +13,19 @@ router = APIRouter(prefix="/users", tags=["users"])
 @router.get("", response_model=dict)
 async def list_users_endpoint(
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="前のページのnext_cursor"),
     q: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user),
 ):
     """ユーザ一覧取得"""
-    users, total = await list_users(limit=limit, offset=offset, q=q)
+    users, next_cursor = await list_users(limit=limit, cursor=cursor, q=q)
     
     return {
         "data": [UserResponse(**user.model_dump()) for user in users],
         "pagination": {
-            "total": total,
             "limit": limit,
-            "offset": offset,
-            "has_next": offset + limit < total,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
         },
     }
 
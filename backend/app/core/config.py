@@ -46,6 +46,11 @@ class Settings(BaseSettings):
     s3_bucket_static: str = "bi-static"
     s3_access_key: str | None = None
     s3_secret_key: str | None = None
+    s3_multipart_part_size_mb: int = 8  # マルチパートアップロードのパートサイズ（最小5MB）
+    s3_multipart_max_concurrency: int = 4  # 同時にアップロードするパート数
+    
+    # Dataset取り込み設定
+    dataset_import_block_size_mb: int = 16  # CSVを読み込むブロックサイズ（Parquetの行グループ単位）
     
     # Vertex AI設定
     vertex_ai_project_id: str | None = None
@@ -58,6 +63,11 @@ class Settings(BaseSettings):
     executor_timeout_transform: int = 300
     executor_max_concurrent_cards: int = 10
     executor_max_concurrent_transforms: int = 5
+    executor_column_projection: bool = True  # Cardのused_columnsのみを読み込む
+    executor_http2: bool = False  # HTTP/2を使う（h2パッケージが必要。TLS接続時のみ有効）
+    executor_max_connections: int = 100  # Executorへの最大接続数
+    executor_max_keepalive_connections: int = 20  # 再利用のために保持するアイドル接続数
+    executor_keepalive_expiry: float = 30.0  # アイドル接続を保持する秒数
     
     # ログ設定
     log_level: str = "INFO"
@@ -69,6 +79,19 @@ class Settings(BaseSettings):
     # キャッシュ設定
     redis_url: str | None = None  # Redis URL（例: redis://localhost:6379/0）
     cache_ttl_seconds: int = 3600  # キャッシュTTL（デフォルト1時間）
+    cache_stale_ttl_seconds: int = 600  # TTL経過後も古いプレビューを返しつつバックグラウンドで更新する秒数（0で無効）
+    cache_memory_max_mb: int = 256  # インメモリキャッシュの上限
+    cache_sweep_interval_seconds: int = 60  # インメモリキャッシュの期限切れエントリを削除する間隔
+    cache_l1_max_mb: int = 64  # Redis使用時に各ワーカーで保持するインメモリキャッシュ（L1）の上限（0でL1なし）
+    cache_l1_ttl_seconds: int = 60  # L1に保持する最大秒数（無効化通知を取りこぼした場合の上限）
+    cache_compression: str = "zstd"  # キャッシュ値の圧縮方式（zstd / gzip / none。zstdが使えない場合はgzip）
+    cache_compression_min_bytes: int = 1024  # この大きさ以上の値を圧縮する
+    cache_compression_level: int = 3  # 圧縮レベル
+    cache_prewarm_enabled: bool = True  # Dataset再取り込み・Transform実行後に参照しているDashboardを事前生成する
+    cache_prewarm_interval_seconds: int = 0  # 全Dashboardを事前生成する間隔（0で定期実行なし）
+    
+    # 管理者設定
+    admin_user_ids: str = ""  # 管理APIを利用できるユーザーID（カンマ区切り）
     
     def model_post_init(self, __context):
         """バリデーション"""
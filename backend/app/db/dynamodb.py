@@ -1,8 +1,16 @@
 """DynamoDB接続層"""
+import asyncio
+import base64
+import binascii
+import json
+import random
+from typing import Any, Callable, Optional, Sequence
+
 import aioboto3
 from botocore.config import Config
 
 from app.core.config import settings
+from app.core.exceptions import BadRequestError, InternalError
 
 
 _dynamodb_client = None
@@ -77,3 +85,119 @@ async def close_dynamodb():
         await _dynamodb_resource_ctx.__aexit__(None, None, None)
         _dynamodb_resource_ctx = None
         _dynamodb_resource = None
+
+
+# BatchGetItemで1回に取得できるキーの数
+BATCH_GET_MAX_KEYS = 100
+
+# 処理されなかったキーを再リクエストする際の待ち時間（指数バックオフ、秒）と再試行回数の上限
+BATCH_GET_RETRY_BASE_DELAY = 0.05
+BATCH_GET_RETRY_MAX_DELAY = 2.0
+BATCH_GET_MAX_RETRIES = 8
+
+
+async def batch_get_items(client, table_name: str, key_name: str, ids: list[str]) -> dict[str, dict]:
+    """複数のアイテムをBatchGetItemでまとめて取得（ID -> アイテム、存在しないIDは含まない）"""
+    unique_ids = list(dict.fromkeys(ids))
+    items = {}
+    for start in range(0, len(unique_ids), BATCH_GET_MAX_KEYS):
+        request_items = {
+            table_name: {
+                "Keys": [{key_name: {"S": item_id}} for item_id in unique_ids[start:start + BATCH_GET_MAX_KEYS]],
+            }
+        }
+        # 処理されなかったキー（スロットリング等）は指数バックオフ（ジッター付き）で待ってから再リクエストする
+        retries = 0
+        while True:
+            response = await client.batch_get_item(RequestItems=request_items)
+            for item in response.get("Responses", {}).get(table_name, []):
+                items[item[key_name]["S"]] = item
+            request_items = response.get("UnprocessedKeys") or {}
+            if not request_items:
+                break
+            if retries >= BATCH_GET_MAX_RETRIES:
+                raise InternalError(f"BatchGetItem left unprocessed keys after {retries} retries: {table_name}")
+            delay = min(BATCH_GET_RETRY_MAX_DELAY, BATCH_GET_RETRY_BASE_DELAY * 2 ** retries)
+            await asyncio.sleep(random.uniform(0, delay))
+            retries += 1
+    return items
+
+
+def encode_cursor(key: dict) -> str:
+    """ページの再開位置（DynamoDBのキー）を不透明なカーソル文字列に変換"""
+    return base64.urlsafe_b64encode(json.dumps(key, sort_keys=True).encode()).decode()
+
+
+# DynamoDBのキー属性の型
+_KEY_ATTRIBUTE_TYPES = ("S", "N", "B")
+
+# item_filterを指定した場合に1回のQuery/Scanで読み込む件数
+FILTERED_READ_PAGE_SIZE = 100
+
+# 1回の呼び出しで読み込むアイテム数の上限（item_filterで大半が除外される場合に全件を読まないようにする）
+MAX_READ_ITEMS_PER_CALL = 1000
+
+
+def decode_cursor(cursor: str, key_names: Sequence[str]) -> dict:
+    """カーソル文字列をExclusiveStartKeyに変換（一覧のキーと一致しないカーソルは不正とする）"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise BadRequestError("Invalid cursor")
+    if not isinstance(key, dict) or set(key) != set(key_names):
+        raise BadRequestError("Invalid cursor")
+    for value in key.values():
+        if (
+            not isinstance(value, dict)
+            or len(value) != 1
+            or next(iter(value)) not in _KEY_ATTRIBUTE_TYPES
+            or not isinstance(next(iter(value.values())), str)
+        ):
+            raise BadRequestError("Invalid cursor")
+    return key
+
+
+async def query_page(
+    client,
+    operation: str,
+    params: dict[str, Any],
+    key_names: Sequence[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    item_filter: Optional[Callable[[dict], bool]] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """Query/Scanで1ページ分のアイテムを取得し、（アイテム, 次ページのカーソル）を返す
+    
+    前のページのカーソル（ExclusiveStartKey）から再開するため、読み込むのはページの深さに関わらず
+    1ページ分のみ。item_filterで除外されるアイテムがある場合は、limit件に達するまで続きを読み込む
+    （読み込みはMAX_READ_ITEMS_PER_CALL件までとし、達した場合はlimit件未満でも次ページのカーソルを返す）。
+    key_namesにはテーブルのキーと（GSIを使う場合は）インデックスのキーの属性名を渡す。
+    次のページがない場合、カーソルはNoneになる。
+    """
+    page_size = limit if item_filter is None else max(limit, FILTERED_READ_PAGE_SIZE)
+    request_params = dict(params, Limit=page_size)
+    if cursor:
+        request_params["ExclusiveStartKey"] = decode_cursor(cursor, key_names)
+    
+    items: list[dict] = []
+    read_count = 0
+    while True:
+        response = await getattr(client, operation)(**request_params)
+        page_items = response.get("Items", [])
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        read_count += len(page_items)
+        for index, item in enumerate(page_items):
+            if item_filter is not None and not item_filter(item):
+                continue
+            items.append(item)
+            if len(items) == limit:
+                if index == len(page_items) - 1 and last_evaluated_key is None:
+                    return items, None
+                # ページの途中で止まった場合は、最後に返したアイテムの次から再開する
+                return items, encode_cursor({name: item[name] for name in key_names})
+        
+        if last_evaluated_key is None:
+            return items, None
+        if read_count >= MAX_READ_ITEMS_PER_CALL:
+            return items, encode_cursor(last_evaluated_key)
+        request_params["ExclusiveStartKey"] = last_evaluated_key
@@ -0,0 +1,68 @@
+"""パーティション分割（日付別Parquetレイアウト）
+
+パーティション分割されたDatasetは以下のレイアウトでS3に保存される。
+
+    datasets/{datasetId}/partitions/{column}={YYYY-MM-DD}/part-00000.parquet
+
+DatasetのS3パスは末尾が "/" のプレフィックス（datasets/{datasetId}/partitions/）となる。
+Executor（executor/app/partitioning.py）と同じレイアウト・同じパーティションキーで読み書きする。
+"""
+from typing import List, Tuple
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# NULL値を格納するパーティション名（Hive互換）
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# 1つのDatasetに作成できるパーティション数の上限（日付パーティションで約10年分）
+MAX_PARTITIONS = 3660
+
+_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}"
+
+
+def is_partitioned_path(s3_path: str) -> bool:
+    """S3パスがパーティション分割されたDatasetを指すかどうか"""
+    return s3_path.endswith("/")
+
+
+def partition_keys(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """列の各値に対応するパーティションキー（YYYY-MM-DD）を算出
+
+    日付形式でない値が含まれる場合は、値ごとにパーティションが作られるのを防ぐためValueErrorとする。
+    """
+    if pa.types.is_temporal(column.type):
+        if pa.types.is_date(column.type):
+            column = pc.cast(column, pa.timestamp("s"))
+        keys = pc.strftime(column, format="%Y-%m-%d")
+    else:
+        keys = pc.cast(column, pa.string())
+        not_dates = pc.filter(keys, pc.invert(pc.match_substring_regex(keys, _DATE_PATTERN)))
+        if len(not_dates) > 0:
+            raise ValueError(f"Partition column must contain dates: {not_dates[0].as_py()!r}")
+        keys = pc.utf8_slice_codeunits(keys, 0, 10)
+    return pc.fill_null(keys, NULL_PARTITION)
+
+
+def check_partition_count(count: int) -> None:
+    """パーティション数が上限を超えていないか確認"""
+    if count > MAX_PARTITIONS:
+        raise ValueError(f"Too many partitions: {count} (max {MAX_PARTITIONS})")
+
+
+def split_table(table: pa.Table, partition_column: str) -> List[Tuple[str, pa.Table]]:
+    """テーブルをパーティションキーごとに分割"""
+    keys = partition_keys(table.column(partition_column))
+    unique_keys = pc.unique(keys).to_pylist()
+    check_partition_count(len(unique_keys))
+    return [
+        (key, table.filter(pc.equal(keys, key)))
+        for key in unique_keys
+    ]
+
+
+def partition_object_key(base_path: str, partition_column: str, key: str, part: int = 0) -> str:
+    """パーティションファイルのS3キーを生成"""
+    return f"{base_path}{partition_column}={quote(key, safe='')}/part-{part:05d}.parquet"
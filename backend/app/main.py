@@ -13,6 +13,9 @@ from app.core.exceptions import BIException
 from app.api.routes import auth, users, chatbot
 from app.db.dynamodb import close_dynamodb
 from app.db.s3 import close_s3
+from app.services.executor_client import close_executor_client
+from app.services.cache_service import close_cache_backend
+from app.services.prewarm_service import start_prewarm_scheduler, stop_prewarm_scheduler
 
 # ログ設定初期化
 setup_logging()
@@ -178,17 +181,30 @@ app.include_router(transforms.router, prefix="/api")
 from app.api.routes import audit_logs
 app.include_router(audit_logs.router, prefix="/api")
 
+# Admin API
+from app.api.routes import admin
+app.include_router(admin.router, prefix="/api")
+
 # Test setup API (テスト環境のみ)
 if settings.allow_test_setup:
     from app.api.routes import test_setup
     app.include_router(test_setup.router, prefix="/api")
 
 
+@app.on_event("startup")
+async def startup_event():
+    """アプリケーション起動時にキャッシュの定期的な事前生成を開始"""
+    start_prewarm_scheduler()
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """アプリケーション終了時に接続を閉じる"""
+    await stop_prewarm_scheduler()
     await close_dynamodb()
     await close_s3()
+    await close_executor_client()
+    await close_cache_backend()
 
 
 @app.get("/health")
@@ -1,64 +1,229 @@
-"""キャッシュサービス"""
+"""キャッシュサービス
+
+カードプレビューのキャッシュキーはカードごと・データセットごとのグループ（キーの集合）に登録し、
+カード更新時やデータセット再取り込み時はグループに登録されたキーのみを削除する（キー全体の走査は行わない）。
+"""
+import asyncio
+import functools
+import gzip
 import json
 import hashlib
-from typing import Optional, Any
-from datetime import datetime, timedelta
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Optional, Any, Sequence, Union
 
 from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# キャッシュに格納する値（Redisからはbytesで返る）
+CacheValue = Union[str, bytes]
+
 
 class CacheBackend:
     """キャッシュバックエンドのインターフェース"""
     
-    async def get(self, key: str) -> Optional[str]:
+    async def get(self, key: str) -> Optional[CacheValue]:
         """キャッシュから値を取得"""
         raise NotImplementedError
     
-    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
-        """キャッシュに値を設定"""
+    async def set(self, key: str, value: CacheValue, ttl_seconds: int, groups: Sequence[str] = ()) -> None:
+        """キャッシュに値を設定
+        
+        groupsを指定した場合は、キーをそのグループに登録する（delete_groupでまとめて削除できる）。
+        """
         raise NotImplementedError
     
     async def delete(self, key: str) -> None:
         """キャッシュから値を削除"""
         raise NotImplementedError
+    
+    async def delete_group(self, group: str) -> list[str]:
+        """グループに登録されたキーをすべて削除（削除したキーを返す）"""
+        raise NotImplementedError
+    
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """ロックを取得（取得できた場合は解放に使うトークンを返し、他者が保持している場合はNone）
+        
+        ロックはttl_seconds後に自動的に解放される（保持者が解放せずに終了した場合に備える）。
+        """
+        raise NotImplementedError
+    
+    async def release_lock(self, key: str, token: str) -> None:
+        """ロックを解放（期限切れ後に他者が取得したロックは解放しない）"""
+        raise NotImplementedError
+    
+    async def stats(self) -> dict[str, Any]:
+        """キャッシュの統計情報"""
+        raise NotImplementedError
+    
+    async def close(self) -> None:
+        """接続等を閉じる"""
+        pass
+
+
+class _MemoryEntry:
+    __slots__ = ("value", "expires_at", "nbytes")
+    
+    def __init__(self, key: str, value: CacheValue, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.nbytes = sys.getsizeof(key) + sys.getsizeof(value)
 
 
 class InMemoryCacheBackend(CacheBackend):
-    """インメモリキャッシュバックエンド（開発環境用）"""
+    """インメモリキャッシュバックエンド
+    
+    合計サイズ（キーと値のバイト数）で上限を設けたLRUキャッシュ。上限を超えた場合は
+    最も古く使われたエントリから削除する。sweep_interval_secondsを指定した場合は、
+    期限切れのエントリをバックグラウンドで定期的に削除する（参照されないエントリも残らない）。
+    """
     
-    def __init__(self):
-        self._cache: dict[str, tuple[str, datetime]] = {}
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, sweep_interval_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._groups: dict[str, set[str]] = {}
+        self._locks: dict[str, tuple[str, float]] = {}  # キー -> (トークン, 期限)
+        self._sweeper: Optional[asyncio.Task] = None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
     
-    async def get(self, key: str) -> Optional[str]:
+    async def get(self, key: str) -> Optional[CacheValue]:
         """キャッシュから値を取得"""
-        if key not in self._cache:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
             return None
         
-        value, expiry = self._cache[key]
-        
         # TTLチェック
-        if datetime.utcnow() > expiry:
-            del self._cache[key]
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
             return None
         
-        return value
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
     
-    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
-        """キャッシュに値を設定"""
-        expiry = datetime.utcnow() + timedelta(seconds=ttl_seconds)
-        self._cache[key] = (value, expiry)
+    async def set(self, key: str, value: CacheValue, ttl_seconds: int, groups: Sequence[str] = ()) -> None:
+        """キャッシュに値を設定（上限を超える大きさの値は格納しない）"""
+        self._start_sweeper()
+        self._remove(key)
+        entry = _MemoryEntry(key, value, time.monotonic() + ttl_seconds)
+        if entry.nbytes > self.max_bytes:
+            return
+        
+        self._entries[key] = entry
+        self.current_bytes += entry.nbytes
+        while self.current_bytes > self.max_bytes:
+            evicted_key, _ = next(iter(self._entries.items()))
+            self._remove(evicted_key)
+            self.evictions += 1
+        
+        for group in groups:
+            self._groups.setdefault(group, set()).add(key)
     
     async def delete(self, key: str) -> None:
         """キャッシュから値を削除"""
-        if key in self._cache:
-            del self._cache[key]
+        self._remove(key)
+    
+    async def delete_group(self, group: str) -> list[str]:
+        """グループに登録されたキーをすべて削除（削除したキーを返す）"""
+        keys = list(self._groups.pop(group, ()))
+        for key in keys:
+            self._remove(key)
+        return keys
+    
+    def sweep_expired(self) -> int:
+        """期限切れのエントリと、削除済みのキーのみのグループを削除（削除したエントリ数を返す）"""
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        
+        for group in list(self._groups):
+            members = {key for key in self._groups[group] if key in self._entries}
+            if members:
+                self._groups[group] = members
+            else:
+                del self._groups[group]
+        return len(expired)
+    
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """ロックを取得"""
+        now = time.monotonic()
+        lock = self._locks.get(key)
+        if lock is not None and lock[1] > now:
+            return None
+        token = uuid.uuid4().hex
+        self._locks[key] = (token, now + ttl_seconds)
+        return token
+    
+    async def release_lock(self, key: str, token: str) -> None:
+        """ロックを解放"""
+        lock = self._locks.get(key)
+        if lock is not None and lock[0] == token:
+            del self._locks[key]
+    
+    async def stats(self) -> dict[str, Any]:
+        """キャッシュの統計情報"""
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
     
     def clear(self) -> None:
-        """キャッシュをクリア（テスト用）"""
-        self._cache.clear()
+        """キャッシュをクリア"""
+        self._entries.clear()
+        self._groups.clear()
+        self._locks.clear()
+        self.current_bytes = 0
+    
+    async def close(self) -> None:
+        """バックグラウンドでの削除を停止"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+    
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.nbytes
+    
+    def _start_sweeper(self) -> None:
+        if self.sweep_interval_seconds and (self._sweeper is None or self._sweeper.done()):
+            self._sweeper = asyncio.create_task(self._sweep_periodically())
+    
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            removed = self.sweep_expired()
+            if removed:
+                logger.debug("Swept expired cache entries", removed=removed)
+
+
+# トークンが一致する場合のみロックを削除する
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
 
 
 class RedisCacheBackend(CacheBackend):
@@ -67,6 +232,9 @@ class RedisCacheBackend(CacheBackend):
     def __init__(self, redis_url: str):
         self._redis_url = redis_url
         self._redis_client: Optional[Any] = None
+        # このプロセスからの参照のヒット数・ミス数
+        self.hits = 0
+        self.misses = 0
     
     async def _get_client(self):
         """Redisクライアントを取得（遅延初期化）"""
@@ -79,21 +247,33 @@ class RedisCacheBackend(CacheBackend):
                 raise
         return self._redis_client
     
-    async def get(self, key: str) -> Optional[str]:
+    async def get(self, key: str) -> Optional[CacheValue]:
         """キャッシュから値を取得"""
         try:
             client = await self._get_client()
             value = await client.get(key)
-            return value.decode('utf-8') if value else None
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
         except Exception as e:
             logger.error(f"Redis get error: {e}", exc_info=True)
             return None
     
-    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
-        """キャッシュに値を設定"""
+    async def set(self, key: str, value: CacheValue, ttl_seconds: int, groups: Sequence[str] = ()) -> None:
+        """キャッシュに値を設定
+        
+        グループはRedisのSetとして保持し、値と同じTTLを設定する（値の設定とまとめて1往復で送る）。
+        """
         try:
             client = await self._get_client()
-            await client.setex(key, ttl_seconds, value)
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.setex(key, ttl_seconds, value)
+                for group in groups:
+                    pipe.sadd(group, key)
+                    pipe.expire(group, ttl_seconds)
+                await pipe.execute()
         except Exception as e:
             logger.error(f"Redis set error: {e}", exc_info=True)
             # エラー時は続行（キャッシュ失敗は致命的ではない）
@@ -105,6 +285,209 @@ class RedisCacheBackend(CacheBackend):
             await client.delete(key)
         except Exception as e:
             logger.error(f"Redis delete error: {e}", exc_info=True)
+    
+    async def delete_group(self, group: str) -> list[str]:
+        """グループに登録されたキーをすべて削除（KEYS/SCANは使わない。削除したキーを返す）"""
+        try:
+            client = await self._get_client()
+            # メンバーの取得とグループの削除をアトミックに行い、以降に登録されたキーは新しいグループに入れる
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.smembers(group)
+                pipe.delete(group)
+                members, _ = await pipe.execute()
+            if members:
+                await client.delete(*members)
+            return [member.decode('utf-8') if isinstance(member, bytes) else member for member in members]
+        except Exception as e:
+            logger.error(f"Redis delete group error: {e}", exc_info=True)
+            return []
+    
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """ロックを取得（SET NX PX）
+        
+        Redisに接続できない場合はロックなしで続行できるよう、取得できたものとして扱う。
+        """
+        token = uuid.uuid4().hex
+        try:
+            client = await self._get_client()
+            acquired = await client.set(key, token, nx=True, px=max(1, int(ttl_seconds * 1000)))
+            return token if acquired else None
+        except Exception as e:
+            logger.error(f"Redis acquire lock error: {e}", exc_info=True)
+            return token
+    
+    async def release_lock(self, key: str, token: str) -> None:
+        """ロックを解放（トークンの確認と削除をLuaスクリプトでアトミックに行う）"""
+        try:
+            client = await self._get_client()
+            await client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+        except Exception as e:
+            logger.error(f"Redis release lock error: {e}", exc_info=True)
+    
+    async def publish(self, channel: str, message: str) -> None:
+        """チャンネルにメッセージを送信"""
+        try:
+            client = await self._get_client()
+            await client.publish(channel, message)
+        except Exception as e:
+            logger.error(f"Redis publish error: {e}", exc_info=True)
+    
+    async def listen(self, channel: str) -> AsyncIterator[str]:
+        """チャンネルのメッセージを受信し続ける（接続エラー時は例外を送出する）"""
+        client = await self._get_client()
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                data = message["data"]
+                yield data.decode('utf-8') if isinstance(data, bytes) else data
+        finally:
+            await pubsub.aclose()
+    
+    async def stats(self) -> dict[str, Any]:
+        """キャッシュの統計情報（ヒット数・ミス数はこのプロセスの値、それ以外はRedisサーバーの値）"""
+        stats: dict[str, Any] = {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+        try:
+            client = await self._get_client()
+            memory = await client.info("memory")
+            server_stats = await client.info("stats")
+            stats.update({
+                "entries": await client.dbsize(),
+                "bytes": memory.get("used_memory"),
+                "max_bytes": memory.get("maxmemory"),
+                "evictions": server_stats.get("evicted_keys"),
+                "expirations": server_stats.get("expired_keys"),
+            })
+        except Exception as e:
+            logger.error(f"Redis stats error: {e}", exc_info=True)
+        return stats
+    
+    async def close(self) -> None:
+        """Redisとの接続を閉じる"""
+        if self._redis_client is not None:
+            await self._redis_client.aclose()
+            self._redis_client = None
+
+
+# L1の無効化を他のワーカーに通知するRedisのチャンネル
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+
+# 無効化通知の購読が切断された場合に再接続するまでの秒数
+INVALIDATION_RETRY_SECONDS = 1
+
+
+class TieredCacheBackend(CacheBackend):
+    """ワーカープロセス内のインメモリキャッシュ（L1）とRedis（L2）を組み合わせたキャッシュバックエンド
+    
+    L1にあるキーはネットワークを介さずに返し、L1にないキーはRedisから取得してL1にも格納する。
+    削除したキーはRedisのpub/subで全ワーカーに通知し、各ワーカーのL1からも削除する。
+    通知を取りこぼした場合に備え、L1の保持期間はl1_ttl_seconds以下とする。
+    また、購読が切断された場合は取りこぼした通知があり得るため、L1を破棄する。
+    """
+    
+    def __init__(self, l1: InMemoryCacheBackend, l2: RedisCacheBackend, l1_ttl_seconds: int):
+        self.l1 = l1
+        self.l2 = l2
+        self.l1_ttl_seconds = l1_ttl_seconds
+        self._listener: Optional[asyncio.Task] = None
+    
+    async def get(self, key: str) -> Optional[CacheValue]:
+        """キャッシュから値を取得（L1 → L2の順）"""
+        self._start_listener()
+        value = await self.l1.get(key)
+        if value is not None:
+            return value
+        
+        value = await self.l2.get(key)
+        if value is not None:
+            await self.l1.set(key, value, self.l1_ttl_seconds)
+        return value
+    
+    async def set(self, key: str, value: CacheValue, ttl_seconds: int, groups: Sequence[str] = ()) -> None:
+        """キャッシュに値を設定（L1とL2の両方）"""
+        self._start_listener()
+        await self.l2.set(key, value, ttl_seconds, groups)
+        await self.l1.set(key, value, min(ttl_seconds, self.l1_ttl_seconds))
+    
+    async def delete(self, key: str) -> None:
+        """キャッシュから値を削除し、他のワーカーのL1にも通知する"""
+        await self.l1.delete(key)
+        await self.l2.delete(key)
+        await self._publish_invalidation([key])
+    
+    async def delete_group(self, group: str) -> list[str]:
+        """グループに登録されたキーをすべて削除し、他のワーカーのL1にも通知する"""
+        keys = await self.l2.delete_group(group)
+        self._apply_invalidation(keys)
+        await self._publish_invalidation(keys)
+        return keys
+    
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """ロックを取得（ワーカー間で共有するためRedisで管理する）"""
+        return await self.l2.acquire_lock(key, ttl_seconds)
+    
+    async def release_lock(self, key: str, token: str) -> None:
+        """ロックを解放"""
+        await self.l2.release_lock(key, token)
+    
+    async def stats(self) -> dict[str, Any]:
+        """キャッシュの統計情報"""
+        return {
+            "backend": "tiered",
+            "l1": await self.l1.stats(),
+            "l2": await self.l2.stats(),
+        }
+    
+    async def close(self) -> None:
+        """無効化通知の購読を停止し、接続を閉じる"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.l1.close()
+        await self.l2.close()
+    
+    def handle_invalidation(self, message: str) -> None:
+        """他のワーカーからの無効化通知を処理"""
+        try:
+            keys = json.loads(message)["keys"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            logger.warning(f"Invalid cache invalidation message: {message}")
+            return
+        self._apply_invalidation(keys)
+    
+    def _apply_invalidation(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self.l1._remove(key)
+    
+    async def _publish_invalidation(self, keys: Sequence[str]) -> None:
+        if keys:
+            await self.l2.publish(CACHE_INVALIDATION_CHANNEL, json.dumps({"keys": list(keys)}))
+    
+    def _start_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen_invalidations())
+    
+    async def _listen_invalidations(self) -> None:
+        while True:
+            try:
+                async for message in self.l2.listen(CACHE_INVALIDATION_CHANNEL):
+                    self.handle_invalidation(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation subscription error: {e}", exc_info=True)
+            self.l1.clear()
+            await asyncio.sleep(INVALIDATION_RETRY_SECONDS)
 
 
 # グローバルキャッシュバックエンドインスタンス
@@ -118,44 +501,161 @@ def get_cache_backend() -> CacheBackend:
     if _cache_backend is None:
         redis_url = getattr(settings, 'redis_url', None)
         
-        if redis_url:
+        if redis_url and settings.cache_l1_max_mb > 0:
+            l1 = InMemoryCacheBackend(
+                max_bytes=settings.cache_l1_max_mb * 1024 * 1024,
+                sweep_interval_seconds=settings.cache_sweep_interval_seconds,
+            )
+            _cache_backend = TieredCacheBackend(l1, RedisCacheBackend(redis_url), settings.cache_l1_ttl_seconds)
+            logger.info("Using tiered cache backend (in-memory L1 + Redis L2)")
+        elif redis_url:
             _cache_backend = RedisCacheBackend(redis_url)
             logger.info("Using Redis cache backend")
         else:
-            _cache_backend = InMemoryCacheBackend()
+            _cache_backend = InMemoryCacheBackend(
+                max_bytes=settings.cache_memory_max_mb * 1024 * 1024,
+                sweep_interval_seconds=settings.cache_sweep_interval_seconds,
+            )
             logger.info("Using in-memory cache backend (development)")
     
     return _cache_backend
 
 
-def generate_cache_key(card_id: str, filters: dict[str, Any], params: dict[str, Any]) -> str:
-    """キャッシュキーを生成"""
+async def close_cache_backend() -> None:
+    """キャッシュバックエンドを閉じる"""
+    global _cache_backend
+    
+    if _cache_backend is not None:
+        await _cache_backend.close()
+        _cache_backend = None
+
+
+def generate_cache_key(
+    card_id: str,
+    filters: dict[str, Any],
+    params: dict[str, Any],
+    version: str = "",
+) -> str:
+    """キャッシュキーを生成
+    
+    versionにはカードとデータセットのバージョン（更新日時・S3パス等）を渡す。
+    カードやデータセットが更新されるとキーが変わるため、古い結果は参照されない。
+    """
     filters_str = json.dumps(filters, sort_keys=True)
     params_str = json.dumps(params, sort_keys=True)
-    combined_str = f"{filters_str}|{params_str}"
+    combined_str = f"{filters_str}|{params_str}|{version}"
     combined_hash = hashlib.sha256(combined_str.encode()).hexdigest()[:16]
     return f"card_preview:{card_id}:{combined_hash}"
 
 
-async def get_cached_card_preview(
-    card_id: str,
-    filters: dict[str, Any],
-    params: dict[str, Any],
-) -> Optional[dict[str, Any]]:
-    """キャッシュからカードプレビューを取得"""
-    cache = get_cache_backend()
-    key = generate_cache_key(card_id, filters, params)
+def card_cache_group(card_id: str) -> str:
+    """カードのプレビューキャッシュのキーを登録するグループ"""
+    return f"card_preview_keys:{card_id}"
+
+
+def dataset_cache_group(dataset_id: str) -> str:
+    """データセットを参照するカードのプレビューキャッシュのキーを登録するグループ"""
+    return f"dataset_preview_keys:{dataset_id}"
+
+
+# キャッシュ値の形式（先頭1バイト）。ヘッダーのない値は非圧縮のJSON文字列として扱う
+_FORMAT_RAW = b"\x00"
+_FORMAT_GZIP = b"\x01"
+_FORMAT_ZSTD = b"\x02"
+
+
+@functools.lru_cache(maxsize=None)
+def _zstd_compressor() -> Optional[Any]:
+    try:
+        import zstandard
+    except ImportError:
+        logger.warning("zstandard package not installed, falling back to gzip. Install with: pip install zstandard")
+        return None
+    return zstandard.ZstdCompressor(level=settings.cache_compression_level)
+
+
+@functools.lru_cache(maxsize=None)
+def _zstd_decompressor() -> Any:
+    import zstandard
+    return zstandard.ZstdDecompressor()
+
+
+def encode_cache_value(value: str) -> bytes:
+    """文字列をキャッシュに格納する形式に変換
     
+    cache_compression_min_bytes以上の値は圧縮する（zstdを優先し、使えない場合はgzip）。
+    先頭1バイトに形式を記録するため、設定を変えても既存の値を読み出せる。
+    """
+    data = value.encode("utf-8")
+    if settings.cache_compression == "none" or len(data) < settings.cache_compression_min_bytes:
+        return _FORMAT_RAW + data
+    
+    if settings.cache_compression == "zstd":
+        compressor = _zstd_compressor()
+        if compressor is not None:
+            return _FORMAT_ZSTD + compressor.compress(data)
+    return _FORMAT_GZIP + gzip.compress(data, compresslevel=min(settings.cache_compression_level, 9))
+
+
+def decode_cache_value(value: CacheValue) -> str:
+    """キャッシュから取得した値を文字列に戻す"""
+    if isinstance(value, str):
+        return value
+    
+    header, data = value[:1], value[1:]
+    if header == _FORMAT_RAW:
+        return data.decode("utf-8")
+    if header == _FORMAT_GZIP:
+        return gzip.decompress(data).decode("utf-8")
+    if header == _FORMAT_ZSTD:
+        return _zstd_decompressor().decompress(data).decode("utf-8")
+    return value.decode("utf-8")
+
+
+async def _get_cached_entry(key: str) -> Optional[tuple[dict[str, Any], bool]]:
+    """キャッシュからカードプレビューを取得し、（プレビュー, ソフトTTL内かどうか）を返す"""
+    cache = get_cache_backend()
     cached_value = await cache.get(key)
     if cached_value is None:
         return None
     
     try:
-        return json.loads(cached_value)
-    except json.JSONDecodeError:
+        entry = json.loads(decode_cache_value(cached_value))
+    except ImportError:
+        # zstdで圧縮された値をzstandardのないワーカーが読んだ場合。値は壊れていないため削除せず、ミスとして扱う
+        logger.warning(f"zstandard package not installed, cannot decode cached value for key: {key}")
+        return None
+    except Exception:
         logger.warning(f"Failed to decode cached value for key: {key}")
         await cache.delete(key)
         return None
+    
+    if "fresh_until" not in entry:
+        # ソフトTTLを持たない形式で保存されたエントリ
+        return entry, True
+    return entry["preview"], entry["fresh_until"] > time.time()
+
+
+async def get_cached_card_preview(
+    card_id: str,
+    filters: dict[str, Any],
+    params: dict[str, Any],
+    version: str = "",
+    allow_stale: bool = False,
+) -> Optional[dict[str, Any]]:
+    """キャッシュからカードプレビューを取得
+    
+    allow_staleを指定した場合は、ソフトTTLを過ぎた（ハードTTL内の）プレビューも返す。
+    """
+    key = generate_cache_key(card_id, filters, params, version)
+    entry = await _get_cached_entry(key)
+    if entry is None:
+        return None
+    
+    preview, fresh = entry
+    if not fresh and not allow_stale:
+        return None
+    return preview
 
 
 async def set_cached_card_preview(
@@ -164,32 +664,194 @@ async def set_cached_card_preview(
     params: dict[str, Any],
     preview_data: dict[str, Any],
     ttl_seconds: int = 3600,
+    version: str = "",
+    dataset_id: Optional[str] = None,
+    stale_ttl_seconds: int = 0,
 ) -> None:
-    """カードプレビューをキャッシュに保存"""
+    """カードプレビューをキャッシュに保存
+    
+    ttl_seconds（ソフトTTL）を過ぎてからさらにstale_ttl_seconds（ハードTTLまで）の間は、
+    古いプレビューを返しつつバックグラウンドで更新できる（get_or_compute_card_preview）。
+    dataset_idを指定した場合は、データセット単位でも無効化できるようにする。
+    """
     cache = get_cache_backend()
-    key = generate_cache_key(card_id, filters, params)
+    key = generate_cache_key(card_id, filters, params, version)
+    groups = [card_cache_group(card_id)]
+    if dataset_id:
+        groups.append(dataset_cache_group(dataset_id))
     
     try:
-        value = json.dumps(preview_data)
-        await cache.set(key, value, ttl_seconds)
+        value = encode_cache_value(json.dumps({"preview": preview_data, "fresh_until": time.time() + ttl_seconds}))
+        await cache.set(key, value, ttl_seconds + stale_ttl_seconds, groups=groups)
     except Exception as e:
         logger.error(f"Failed to cache card preview: {e}", exc_info=True)
         # キャッシュ失敗は致命的ではないので続行
 
 
+# 同じキーのプレビューを計算中のFuture（プロセス内）
+_inflight_previews: dict[str, asyncio.Future] = {}
+
+# 実行中のバックグラウンド更新（タスクが途中で破棄されないよう参照を保持する）
+_background_refreshes: set[asyncio.Task] = set()
+
+# 他のワーカーが計算中の場合に、キャッシュに結果が入ったかを確認する間隔
+PREVIEW_LOCK_POLL_SECONDS = 0.1
+
+
+async def get_or_compute_card_preview(
+    card_id: str,
+    filters: dict[str, Any],
+    params: dict[str, Any],
+    compute: Callable[[], Awaitable[dict[str, Any]]],
+    lock_ttl_seconds: float,
+    ttl_seconds: int = 3600,
+    version: str = "",
+    dataset_id: Optional[str] = None,
+    stale_ttl_seconds: int = 0,
+) -> dict[str, Any]:
+    """キャッシュからカードプレビューを取得し、なければcomputeで計算して保存
+    
+    ソフトTTLを過ぎたプレビューは、そのまま返してバックグラウンドで更新する（stale-while-revalidate）。
+    
+    同じキーの計算は1回にまとめる（シングルフライト）。
+    - プロセス内: 計算中のFutureがあれば、その結果（または例外）を待つ
+    - ワーカー間: キャッシュのロックを取得したワーカーのみが計算し、他のワーカーは
+      キャッシュに結果が入るのを待つ。ロックが解放されても結果がない場合（計算の失敗等）は
+      自分でロックを取得して計算する。
+    lock_ttl_seconds には計算にかかる最大秒数を渡す。
+    """
+    key = generate_cache_key(card_id, filters, params, version)
+    lock_key = f"lock:{key}"
+    
+    async def compute_and_store() -> dict[str, Any]:
+        result = await compute()
+        await set_cached_card_preview(
+            card_id, filters, params, result,
+            ttl_seconds=ttl_seconds,
+            version=version,
+            dataset_id=dataset_id,
+            stale_ttl_seconds=stale_ttl_seconds,
+        )
+        return result
+    
+    entry = await _get_cached_entry(key)
+    if entry is not None:
+        preview, fresh = entry
+        if not fresh and key not in _inflight_previews:
+            _schedule_refresh(key, lambda: _refresh_card_preview(lock_key, lock_ttl_seconds, preview, compute_and_store))
+        return preview
+    
+    while True:
+        inflight = _inflight_previews.get(key)
+        if inflight is None:
+            break
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            # 計算していた呼び出し元がキャンセルされた場合は、改めて計算する
+    
+    return await _run_single_flight(key, lambda: _compute_card_preview_once(key, lock_key, lock_ttl_seconds, compute_and_store))
+
+
+def _run_single_flight(key: str, func: Callable[[], Awaitable[dict[str, Any]]]) -> Awaitable[dict[str, Any]]:
+    """funcを実行し、その間に同じキーを要求した呼び出し元には同じ結果を返す
+    
+    計算中であることは呼び出した時点で登録する（タスクとして実行する場合も、開始前の要求がまとまる）。
+    """
+    future = asyncio.get_running_loop().create_future()
+    _inflight_previews[key] = future
+    return _complete_single_flight(key, future, func)
+
+
+async def _complete_single_flight(
+    key: str,
+    future: asyncio.Future,
+    func: Callable[[], Awaitable[dict[str, Any]]],
+) -> dict[str, Any]:
+    try:
+        result = await func()
+    except BaseException as e:
+        if isinstance(e, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(e)
+            # 待機している呼び出し元がいない場合に"exception was never retrieved"を出さない
+            future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _inflight_previews[key]
+
+
+async def _compute_card_preview_once(
+    key: str,
+    lock_key: str,
+    lock_ttl_seconds: float,
+    compute_and_store: Callable[[], Awaitable[dict[str, Any]]],
+) -> dict[str, Any]:
+    """ワーカー間のロックを取得して計算（他のワーカーが計算中の場合はその結果を待つ）"""
+    cache = get_cache_backend()
+    while True:
+        entry = await _get_cached_entry(key)
+        if entry is not None:
+            return entry[0]
+        
+        token = await cache.acquire_lock(lock_key, lock_ttl_seconds)
+        if token is not None:
+            break
+        await asyncio.sleep(PREVIEW_LOCK_POLL_SECONDS)
+    
+    try:
+        # ロックを待っている間に他のワーカーが保存した結果があれば、それを使う
+        entry = await _get_cached_entry(key)
+        if entry is not None:
+            return entry[0]
+        return await compute_and_store()
+    finally:
+        await cache.release_lock(lock_key, token)
+
+
+async def _refresh_card_preview(
+    lock_key: str,
+    lock_ttl_seconds: float,
+    stale_preview: dict[str, Any],
+    compute_and_store: Callable[[], Awaitable[dict[str, Any]]],
+) -> dict[str, Any]:
+    """ソフトTTLを過ぎたプレビューを再計算（他のワーカーが更新中の場合は何もしない）"""
+    cache = get_cache_backend()
+    token = await cache.acquire_lock(lock_key, lock_ttl_seconds)
+    if token is None:
+        return stale_preview
+    try:
+        return await compute_and_store()
+    finally:
+        await cache.release_lock(lock_key, token)
+
+
+def _schedule_refresh(key: str, func: Callable[[], Awaitable[dict[str, Any]]]) -> None:
+    """バックグラウンドでプレビューを更新"""
+    task = asyncio.create_task(_run_single_flight(key, func))
+    _background_refreshes.add(task)
+    task.add_done_callback(_on_refresh_done)
+
+
+def _on_refresh_done(task: asyncio.Task) -> None:
+    _background_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background card preview refresh failed: {task.exception()}")
+
+
 async def invalidate_card_preview_cache(card_id: str) -> None:
     """カードのキャッシュを無効化（カード更新時など）"""
     cache = get_cache_backend()
-    
-    if isinstance(cache, InMemoryCacheBackend):
-        prefix = f"card_preview:{card_id}:"
-        keys_to_delete = [
-            key for key in cache._cache.keys()
-            if key.startswith(prefix)
-        ]
-        for key in keys_to_delete:
-            await cache.delete(key)
-    else:
-        logger.info(
-            f"Cache invalidation for card {card_id} skipped (Redis pattern delete not implemented)"
-        )
+    await cache.delete_group(card_cache_group(card_id))
+
+
+async def invalidate_dataset_preview_cache(dataset_id: str) -> None:
+    """データセットを参照する全カードのキャッシュを無効化（データセット再取り込み時など）"""
+    cache = get_cache_backend()
+    await cache.delete_group(dataset_cache_group(dataset_id))
@@ -1,16 +1,21 @@
 """Cardサービス"""
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple
+import asyncio
+import json
 import uuid
 import httpx
 
-from app.db.dynamodb import get_dynamodb_client, get_table_name
+from app.db.dynamodb import get_dynamodb_client, get_table_name, batch_get_items, query_page
 from app.core.exceptions import NotFoundError, InternalError
 from app.core.config import settings
 from app.models.card import Card, CardCreate, CardUpdate, CardPreviewRequest, CardPreviewResponse
-from app.services.dataset_service import get_dataset
+from app.models.dataset import Dataset
+from app.services.dataset_service import get_dataset, get_datasets
+from app.services.executor_client import get_executor_client, cancel_execution
 from app.services.cache_service import (
     get_cached_card_preview,
+    get_or_compute_card_preview,
     set_cached_card_preview,
     invalidate_card_preview_cache,
 )
@@ -141,59 +146,80 @@ async def get_card(card_id: str) -> Optional[Card]:
     return _item_to_card(response["Item"])
 
 
+async def get_cards(card_ids: List[str]) -> Dict[str, Card]:
+    """複数のCardをまとめて取得（存在しないIDは含まない）"""
+    client = await get_dynamodb_client()
+    items = await batch_get_items(client, CARDS_TABLE, "cardId", card_ids)
+    return {card_id: _item_to_card(item) for card_id, item in items.items()}
+
+
+async def list_card_ids_by_dataset(dataset_id: str) -> List[str]:
+    """Datasetを参照する全CardのIDを取得（CardsByDatasetインデックスをページごとにQuery）"""
+    client = await get_dynamodb_client()
+    query_kwargs: Dict[str, Any] = {
+        "TableName": CARDS_TABLE,
+        "IndexName": "CardsByDataset",
+        "KeyConditionExpression": "datasetId = :datasetId",
+        "ExpressionAttributeValues": {":datasetId": {"S": dataset_id}},
+        "ProjectionExpression": "cardId",
+    }
+    card_ids = []
+    while True:
+        response = await client.query(**query_kwargs)
+        card_ids.extend(item["cardId"]["S"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return card_ids
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
 async def list_cards(
     owner_id: Optional[str] = None,
     dataset_id: Optional[str] = None,
     limit: int = 20,
-    offset: int = 0,
+    cursor: Optional[str] = None,
     q: Optional[str] = None,
-) -> Tuple[List[Card], int]:
-    """Card一覧を取得"""
+) -> Tuple[List[Card], Optional[str]]:
+    """Card一覧を取得（戻り値は（Card一覧, 次ページのカーソル））"""
     client = await get_dynamodb_client()
     
-    query_limit = limit + offset
-    
     if dataset_id:
-        response = await client.query(
-            TableName=CARDS_TABLE,
-            IndexName="CardsByDataset",
-            KeyConditionExpression="datasetId = :datasetId",
-            ExpressionAttributeValues={
+        operation = "query"
+        params = {
+            "TableName": CARDS_TABLE,
+            "IndexName": "CardsByDataset",
+            "KeyConditionExpression": "datasetId = :datasetId",
+            "ExpressionAttributeValues": {
                 ":datasetId": {"S": dataset_id}
             },
-            Limit=query_limit,
-            ScanIndexForward=False,
-        )
-        items = response.get("Items", [])
+            "ScanIndexForward": False,
+        }
+        key_names = ["cardId", "datasetId", "createdAt"]
     elif owner_id:
-        response = await client.query(
-            TableName=CARDS_TABLE,
-            IndexName="CardsByOwner",
-            KeyConditionExpression="ownerId = :ownerId",
-            ExpressionAttributeValues={
+        operation = "query"
+        params = {
+            "TableName": CARDS_TABLE,
+            "IndexName": "CardsByOwner",
+            "KeyConditionExpression": "ownerId = :ownerId",
+            "ExpressionAttributeValues": {
                 ":ownerId": {"S": owner_id}
             },
-            Limit=query_limit,
-            ScanIndexForward=False,
-        )
-        items = response.get("Items", [])
+            "ScanIndexForward": False,
+        }
+        key_names = ["cardId", "ownerId", "createdAt"]
     else:
-        response = await client.scan(
-            TableName=CARDS_TABLE,
-            Limit=query_limit,
-        )
-        items = response.get("Items", [])
-    
-    cards = [_item_to_card(item) for item in items]
-    
-    if dataset_id and owner_id:
-        cards = [c for c in cards if c.owner_id == owner_id]
-    
-    if q:
-        cards = [c for c in cards if q.lower() in c.name.lower()]
-    
-    total = len(cards)
-    return cards[offset:offset+limit], total
+        operation = "scan"
+        params = {"TableName": CARDS_TABLE}
+        key_names = ["cardId"]
+    
+    def item_filter(item: dict) -> bool:
+        if dataset_id and owner_id and item["ownerId"]["S"] != owner_id:
+            return False
+        if q and q.lower() not in item["name"]["S"].lower():
+            return False
+        return True
+    
+    items, next_cursor = await query_page(client, operation, params, key_names, limit, cursor, item_filter)
+    return [_item_to_card(item) for item in items], next_cursor
 
 
 async def update_card(card_id: str, card_data: CardUpdate) -> Card:
@@ -281,54 +307,74 @@ async def delete_card(card_id: str) -> None:
     )
 
 
+def _preview_cache_version(card: Card, dataset: Dataset) -> str:
+    """プレビューキャッシュのバージョン（カードの更新日時とデータセットのS3パス・取り込み日時）"""
+    last_import_at = dataset.last_import_at.timestamp() if dataset.last_import_at else ""
+    return f"{card.updated_at.timestamp()}|{dataset.s3_path}|{last_import_at}"
+
+
 async def preview_card(card_id: str, preview_request: CardPreviewRequest) -> CardPreviewResponse:
     """Cardプレビューを実行"""
     card = await get_card(card_id)
     if not card:
         raise NotFoundError("Card", card_id)
     
-    # キャッシュから取得を試みる
-    cached_preview = await get_cached_card_preview(
-        card_id,
-        preview_request.filters,
-        preview_request.params,
-    )
-    if cached_preview is not None:
-        return CardPreviewResponse(
-            html=cached_preview["html"],
-            used_columns=cached_preview.get("used_columns", []),
-            filter_applicable=cached_preview.get("filter_applicable", []),
-        )
-    
     # Datasetを取得してS3パスを取得
     dataset = await get_dataset(card.dataset_id)
     if not dataset:
         raise NotFoundError("Dataset", card.dataset_id)
     
-    # Executorサービスを呼び出す
+    # キャッシュから取得し、なければExecutorで実行する（カードやデータセットが更新されていればキーが変わる）
+    # 同じカード・フィルタのプレビューが同時に要求された場合、実行は1回にまとめる
+    # TTLを過ぎたプレビューはそのまま返し、バックグラウンドで更新する
+    preview = await get_or_compute_card_preview(
+        card_id,
+        preview_request.filters,
+        preview_request.params,
+        lambda: _execute_preview(card, dataset, preview_request),
+        lock_ttl_seconds=settings.executor_timeout_card + 5,
+        ttl_seconds=settings.cache_ttl_seconds,
+        version=_preview_cache_version(card, dataset),
+        dataset_id=card.dataset_id,
+        stale_ttl_seconds=settings.cache_stale_ttl_seconds,
+    )
+    return CardPreviewResponse(
+        html=preview["html"],
+        used_columns=preview.get("used_columns", []),
+        filter_applicable=preview.get("filter_applicable", []),
+    )
+
+
+async def _execute_preview(card: Card, dataset: Dataset, preview_request: CardPreviewRequest) -> Dict[str, Any]:
+    """ExecutorサービスでCardを実行"""
     executor_url = f"{settings.executor_endpoint}/execute/card"
+    execution_id = f"card_{uuid.uuid4().hex[:12]}"
     request_data = {
+        "execution_id": execution_id,
         "code": card.code,
         "dataset_path": dataset.s3_path,
         "filters": preview_request.filters,
         "params": preview_request.params or {},
     }
+    # 使用カラムが宣言されている場合は、その列のみを読み込ませる（フィルタ列はExecutor側で追加）
+    if settings.executor_column_projection and card.used_columns:
+        request_data["columns"] = card.used_columns
     
     try:
-        async with httpx.AsyncClient(timeout=settings.executor_timeout_card + 5) as client:
-            response = await client.post(executor_url, json=request_data)
-            response.raise_for_status()
-            result = response.json()
-            
-            if result.get("status") != "success":
-                raise InternalError(f"Executor returned error: {result.get('detail', 'Unknown error')}")
-            
-            executor_result = result.get("data", {})
-            preview_response = CardPreviewResponse(
-                html=executor_result.get("html", ""),
-                used_columns=executor_result.get("used_columns", []),
-                filter_applicable=executor_result.get("filter_applicable", []),
-            )
+        client = await get_executor_client()
+        response = await client.post(executor_url, json=request_data, timeout=settings.executor_timeout_card + 5)
+        response.raise_for_status()
+        result = response.json()
+        
+        if result.get("status") != "success":
+            raise InternalError(f"Executor returned error: {result.get('detail', 'Unknown error')}")
+        
+        executor_result = result.get("data", {})
+        preview_response = CardPreviewResponse(
+            html=executor_result.get("html", ""),
+            used_columns=executor_result.get("used_columns", []),
+            filter_applicable=executor_result.get("filter_applicable", []),
+        )
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 503:
             raise InternalError("Card execution queue is full. Please try again later.")
@@ -338,17 +384,136 @@ async def preview_card(card_id: str, preview_request: CardPreviewRequest) -> Car
         else:
             raise InternalError(f"Executor service error: {e.response.status_code}")
     except httpx.TimeoutException:
+        # 結果を待たなくなった実行はExecutor側でも中断させ、実行枠を解放する
+        await cancel_execution(execution_id)
         raise InternalError("Card execution timeout")
     except Exception as e:
         raise InternalError(f"Failed to execute card: {str(e)}")
     
-    # キャッシュに保存
-    await set_cached_card_preview(
-        card_id,
-        preview_request.filters,
-        preview_request.params,
-        preview_response.model_dump(),
-        ttl_seconds=settings.cache_ttl_seconds,
-    )
+    return preview_response.model_dump()
+
+
+def _render_result(card_id: str, preview: CardPreviewResponse) -> Dict[str, Any]:
+    return {"card_id": card_id, "status": "success", "data": preview.model_dump()}
+
+
+def _render_error(card_id: str, error: str) -> Dict[str, Any]:
+    return {"card_id": card_id, "status": "error", "error": error}
+
+
+async def render_cards(card_ids: List[str], filters: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """複数のCardをまとめて実行し、完了したCardから順に結果を返す（ダッシュボード全体の描画用）
+    
+    Card・Datasetはまとめて取得し、キャッシュ済みのCardはすぐに返す。
+    残りのCardはExecutorの一括実行APIに1回のリクエストで渡す（Executor側でDatasetごとにまとめて実行される）。
+    パラメータはダッシュボード表示時と同じく空とし、結果はpreview_cardと同じキーでキャッシュする。
+    """
+    card_ids = list(dict.fromkeys(card_ids))
+    params: Dict[str, Any] = {}
+    cards = await get_cards(card_ids)
+    datasets = await get_datasets([card.dataset_id for card in cards.values()])
+    
+    executor_cards = []
+    cache_versions: Dict[str, str] = {}
+    for card_id in card_ids:
+        card = cards.get(card_id)
+        if card is None:
+            yield _render_error(card_id, f"Card not found: {card_id}")
+            continue
+        dataset = datasets.get(card.dataset_id)
+        if dataset is None:
+            yield _render_error(card.card_id, f"Dataset not found: {card.dataset_id}")
+            continue
+        
+        cache_versions[card_id] = _preview_cache_version(card, dataset)
+        cached_preview = await get_cached_card_preview(card_id, filters, params, version=cache_versions[card_id])
+        if cached_preview is not None:
+            yield _render_result(card_id, CardPreviewResponse(
+                html=cached_preview["html"],
+                used_columns=cached_preview.get("used_columns", []),
+                filter_applicable=cached_preview.get("filter_applicable", []),
+            ))
+            continue
+        
+        executor_card = {
+            "card_id": card.card_id,
+            "code": card.code,
+            "dataset_path": dataset.s3_path,
+            "params": params,
+        }
+        if settings.executor_column_projection and card.used_columns:
+            executor_card["columns"] = card.used_columns
+        executor_cards.append(executor_card)
+    
+    if not executor_cards:
+        return
+    
+    # Executorの一括実行APIを呼び出し、NDJSONで返る結果を順に返す
+    executor_url = f"{settings.executor_endpoint}/execute/cards"
+    execution_id = f"batch_{uuid.uuid4().hex[:12]}"
+    request_data = {
+        "execution_id": execution_id,
+        "cards": executor_cards,
+        "filters": filters,
+    }
+    remaining = [card["card_id"] for card in executor_cards]
+    
+    error = "Card execution did not return a result"
+    # 結果の待ち時間はストリーム全体ではなく1行（Card 1件）ごとに適用する
+    # （Card数が多くても、結果が返り続けている間は打ち切らない）
+    line_timeout = settings.executor_timeout_card + 5
+    try:
+        client = await get_executor_client()
+        async with client.stream(
+            "POST", executor_url, json=request_data, timeout=httpx.Timeout(line_timeout, read=None),
+        ) as response:
+            response.raise_for_status()
+            lines = response.aiter_lines()
+            while True:
+                try:
+                    async with asyncio.timeout(line_timeout):
+                        line = await anext(lines)
+                except StopAsyncIteration:
+                    break
+                if not line:
+                    continue
+                result = json.loads(line)
+                card_id = result["card_id"]
+                if card_id in remaining:
+                    remaining.remove(card_id)
+                
+                if result.get("status") != "success":
+                    yield _render_error(card_id, f"Card execution failed: {result.get('detail', 'Unknown error')}")
+                    continue
+                
+                executor_result = result.get("data", {})
+                preview_response = CardPreviewResponse(
+                    html=executor_result.get("html", ""),
+                    used_columns=executor_result.get("used_columns", []),
+                    filter_applicable=executor_result.get("filter_applicable", []),
+                )
+                await set_cached_card_preview(
+                    card_id,
+                    filters,
+                    params,
+                    preview_response.model_dump(),
+                    ttl_seconds=settings.cache_ttl_seconds,
+                    version=cache_versions[card_id],
+                    dataset_id=cards[card_id].dataset_id,
+                    stale_ttl_seconds=settings.cache_stale_ttl_seconds,
+                )
+                yield _render_result(card_id, preview_response)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 503:
+            error = "Card execution queue is full. Please try again later."
+        else:
+            error = f"Executor service error: {e.response.status_code}"
+    except (httpx.TimeoutException, TimeoutError):
+        await cancel_execution(execution_id)
+        error = "Card execution timeout"
+    except Exception as e:
+        error = f"Failed to execute card: {str(e)}"
     
-    return preview_response
+    # 結果が返らなかったCardはエラーとして返す
+    for card_id in remaining:
+        yield _render_error(card_id, error)
@@ -1,11 +1,9 @@
 """Chatbotサービス"""
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
-import io
 import logging
 
 import pandas as pd
-import pyarrow.parquet as pq
 import vertexai
 from vertexai.preview.generative_models import GenerativeModel
 
@@ -13,7 +11,7 @@ from app.db.dynamodb import get_dynamodb_client, get_table_name
 from app.db.s3 import get_s3_client, get_bucket_name
 from app.core.config import settings
 from app.core.exceptions import NotFoundError
-from app.services.dataset_service import get_dataset
+from app.services.dataset_service import get_dataset, read_dataset_table
 from app.services.dashboard_service import get_referenced_datasets
 
 logger = logging.getLogger(__name__)
@@ -144,11 +142,8 @@ async def generate_dataset_summary(dataset_id: str) -> Dict[str, Any]:
     bucket_name = get_bucket_name("datasets")
     
     try:
-        response = await s3_client.get_object(Bucket=bucket_name, Key=dataset.s3_path)
-        parquet_content = await response["Body"].read()
-        
-        parquet_buffer = io.BytesIO(parquet_content)
-        table = pq.read_table(parquet_buffer)
+        # パーティション分割されたDataset（s3_pathがプレフィックス）も配下のファイルを結合して読み込む
+        table = await read_dataset_table(s3_client, bucket_name, dataset.s3_path)
         df = table.to_pandas()
         
         schema_info = [
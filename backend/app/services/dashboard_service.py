@@ -1,9 +1,9 @@
 """Dashboardサービス"""
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple
 import uuid
 
-from app.db.dynamodb import get_dynamodb_client, get_table_name
+from app.db.dynamodb import get_dynamodb_client, get_table_name, query_page
 from app.core.exceptions import NotFoundError
 from app.models.dashboard import Dashboard, DashboardCreate, DashboardUpdate
 from app.services.card_service import get_card
@@ -137,43 +137,50 @@ async def get_dashboard(dashboard_id: str) -> Optional[Dashboard]:
     return _item_to_dashboard(response["Item"])
 
 
+async def iter_dashboards() -> AsyncIterator[Dashboard]:
+    """全Dashboardを順に取得（Scanをページごとに実行）"""
+    client = await get_dynamodb_client()
+    scan_kwargs: Dict[str, Any] = {"TableName": DASHBOARDS_TABLE}
+    while True:
+        response = await client.scan(**scan_kwargs)
+        for item in response.get("Items", []):
+            yield _item_to_dashboard(item)
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
 async def list_dashboards(
     owner_id: Optional[str] = None,
     limit: int = 20,
-    offset: int = 0,
+    cursor: Optional[str] = None,
     q: Optional[str] = None,
-) -> Tuple[List[Dashboard], int]:
-    """Dashboard一覧を取得"""
+) -> Tuple[List[Dashboard], Optional[str]]:
+    """Dashboard一覧を取得（戻り値は（Dashboard一覧, 次ページのカーソル））"""
     client = await get_dynamodb_client()
     
     if owner_id:
         # GSIを使用してownerIdでクエリ
-        response = await client.query(
-            TableName=DASHBOARDS_TABLE,
-            IndexName="DashboardsByOwner",
-            KeyConditionExpression="ownerId = :ownerId",
-            ExpressionAttributeValues={
+        operation = "query"
+        params = {
+            "TableName": DASHBOARDS_TABLE,
+            "IndexName": "DashboardsByOwner",
+            "KeyConditionExpression": "ownerId = :ownerId",
+            "ExpressionAttributeValues": {
                 ":ownerId": {"S": owner_id}
             },
-            Limit=limit + offset,
-            ScanIndexForward=False,  # 新しい順
-        )
-        items = response.get("Items", [])
+            "ScanIndexForward": False,  # 新しい順
+        }
+        key_names = ["dashboardId", "ownerId", "createdAt"]
     else:
         # Scan
-        response = await client.scan(
-            TableName=DASHBOARDS_TABLE,
-            Limit=limit + offset,
-        )
-        items = response.get("Items", [])
-    
-    dashboards = [_item_to_dashboard(item) for item in items]
-    
-    if q:
-        dashboards = [d for d in dashboards if q.lower() in d.name.lower()]
+        operation = "scan"
+        params = {"TableName": DASHBOARDS_TABLE}
+        key_names = ["dashboardId"]
     
-    total = len(dashboards)
-    return dashboards[offset:offset+limit], total
+    item_filter = (lambda item: q.lower() in item["name"]["S"].lower()) if q else None
+    items, next_cursor = await query_page(client, operation, params, key_names, limit, cursor, item_filter)
+    return [_item_to_dashboard(item) for item in items], next_cursor
 
 
 async def update_dashboard(dashboard_id: str, dashboard_data: DashboardUpdate) -> Dashboard:
@@ -260,16 +267,11 @@ async def clone_dashboard(dashboard_id: str, user_id: str, new_name: Optional[st
     return await create_dashboard(user_id, dashboard_data)
 
 
-async def get_referenced_datasets(dashboard_id: str) -> List[str]:
-    """Dashboardが参照しているDataset一覧を取得"""
-    dashboard = await get_dashboard(dashboard_id)
-    if not dashboard:
-        raise NotFoundError("Dashboard", dashboard_id)
-    
-    # layoutからcard_idを取得
+def get_layout_card_ids(layout: dict) -> List[str]:
+    """layoutに配置されているcard_idを配置順に取得"""
     card_ids = []
-    if "cards" in dashboard.layout:
-        cards = dashboard.layout["cards"]
+    if "cards" in layout:
+        cards = layout["cards"]
         if isinstance(cards, list):
             for card in cards:
                 if isinstance(card, dict) and "cardId" in card:
@@ -277,6 +279,16 @@ async def get_referenced_datasets(dashboard_id: str) -> List[str]:
         elif isinstance(cards, dict):
             for card_id in cards.keys():
                 card_ids.append(card_id)
+    return card_ids
+
+
+async def get_referenced_datasets(dashboard_id: str) -> List[str]:
+    """Dashboardが参照しているDataset一覧を取得"""
+    dashboard = await get_dashboard(dashboard_id)
+    if not dashboard:
+        raise NotFoundError("Dashboard", dashboard_id)
+    
+    card_ids = get_layout_card_ids(dashboard.layout)
     
     # 各Cardからdataset_idを取得
     dataset_ids = set()
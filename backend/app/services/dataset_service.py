@@ -1,20 +1,38 @@
 """Datasetサービス"""
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, BinaryIO
+import asyncio
+import re
 import uuid
 import io
-import pandas as pd
+import tempfile
+import numpy as np
 import pyarrow as pa
+import pyarrow.csv as pacsv
 import pyarrow.parquet as pq
 
-from app.db.dynamodb import get_dynamodb_client, get_table_name
-from app.db.s3 import get_s3_client, get_bucket_name
+from app.db.dynamodb import get_dynamodb_client, get_table_name, batch_get_items, query_page
+from app.db.s3 import get_s3_client, get_bucket_name, list_object_keys, put_objects, S3MultipartWriter
+from app.db.partitioning import (
+    is_partitioned_path,
+    split_table,
+    check_partition_count,
+    partition_object_key,
+)
+from app.core.config import settings
 from app.core.exceptions import NotFoundError
+from app.services.cache_service import invalidate_dataset_preview_cache
 from app.models.dataset import Dataset, DatasetCreate, DatasetUpdate, ColumnSchema, DatasetPreview
 
 
 DATASETS_TABLE = get_table_name("Datasets")
 
+# S3からCSVをダウンロードする際のチャンクサイズ
+S3_DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# 推論した型に変換できない値があった場合のエラー（例: "In CSV column #0: Row #7: CSV conversion error to int64: ..."）
+_CSV_CONVERSION_ERROR_RE = re.compile(r"In CSV column #(\d+): .*CSV conversion error")
+
 
 def _item_to_dataset(item: dict) -> Dataset:
     """DynamoDBアイテムをDatasetモデルに変換"""
@@ -117,54 +135,303 @@ def _schema_to_dynamodb(schema: List[ColumnSchema]) -> dict:
     ]
 
 
+def _column_dtype(arrow_type: pa.DataType) -> str:
+    """Arrow型をスキーマ表示用のdtype文字列に変換"""
+    try:
+        return str(np.dtype(arrow_type.to_pandas_dtype()))
+    except (NotImplementedError, TypeError):
+        return str(arrow_type)
+
+
+class _ColumnTypeMismatch(Exception):
+    """先頭ブロックで推論した列の型に、後続のブロックの値が変換できない"""
+    
+    def __init__(self, column: str, column_type: pa.DataType):
+        super().__init__(f"Column {column} does not fit the inferred type {column_type}")
+        self.column = column
+        self.column_type = column_type
+
+
+def _column_type_mismatch(
+    error: pa.ArrowInvalid,
+    column_types: Dict[str, pa.DataType],
+) -> Optional[_ColumnTypeMismatch]:
+    """CSVの型変換エラーから、変換できなかった列を特定する（column_typesはCSV上の列順）"""
+    match = _CSV_CONVERSION_ERROR_RE.match(str(error))
+    if match is None or int(match.group(1)) >= len(column_types):
+        return None
+    name = list(column_types)[int(match.group(1))]
+    return _ColumnTypeMismatch(name, column_types[name])
+
+
+def _widen_type(column_type: pa.DataType) -> pa.DataType:
+    """型変換エラーになった列の型を広げる（整数 → 浮動小数点 → 文字列）"""
+    if pa.types.is_integer(column_type):
+        return pa.float64()
+    return pa.string()
+
+
+class _CsvBlockReader:
+    """CSVをブロック単位で読み込むリーダー
+    
+    ファイル全体をメモリに載せないため、ピークメモリはブロックサイズに比例する。
+    型推論は先頭ブロックで行われる（column_typesで指定した列を除く）。
+    後続のブロックに推論した型へ変換できない値がある場合は_ColumnTypeMismatchを送出する。
+    skip_rowsを指定すると、ヘッダーの後のその行数を読み飛ばす（値の変換は行わない）。
+    """
+    
+    def __init__(
+        self,
+        csv_file: BinaryIO,
+        encoding: str,
+        delimiter: str,
+        has_header: bool,
+        column_types: Optional[Dict[str, pa.DataType]] = None,
+        skip_rows: int = 0,
+    ):
+        read_options = pacsv.ReadOptions(
+            encoding=encoding,
+            block_size=settings.dataset_import_block_size_mb * 1024 * 1024,
+            autogenerate_column_names=not has_header,
+            skip_rows_after_names=skip_rows,
+        )
+        parse_options = pacsv.ParseOptions(delimiter=delimiter)
+        start = csv_file.tell()
+        
+        def open_reader(column_types: Dict[str, pa.DataType]) -> pacsv.CSVStreamingReader:
+            # 空文字列はpandas.read_csvと同様に欠損値として扱う
+            convert_options = pacsv.ConvertOptions(strings_can_be_null=True, column_types=column_types)
+            try:
+                return pacsv.open_csv(
+                    csv_file,
+                    read_options=read_options,
+                    parse_options=parse_options,
+                    convert_options=convert_options,
+                )
+            except pa.ArrowInvalid as e:
+                # 開く際に最初のブロックが変換される（型を固定して読み直した場合に型が合わないことがある）
+                mismatch = _column_type_mismatch(e, column_types)
+                if mismatch is not None:
+                    raise mismatch from None
+                raise ValueError(f"Failed to parse CSV: {e}")
+            except (pa.ArrowException, LookupError, UnicodeError) as e:
+                raise ValueError(f"Failed to parse CSV: {e}")
+        
+        column_types = dict(column_types or {})
+        self._reader = open_reader(column_types)
+        
+        # 日付・時刻はpandas.read_csvと同様に文字列のまま保持する
+        # （推論後に文字列へキャストすると表記が変わるため、文字列型を指定して読み直す）
+        temporal_columns = [field.name for field in self._reader.schema if pa.types.is_temporal(field.type)]
+        if temporal_columns:
+            column_types.update({name: pa.string() for name in temporal_columns})
+            csv_file.seek(start)
+            self._reader = open_reader(column_types)
+        
+        fields = []
+        for i, field in enumerate(self._reader.schema):
+            name = field.name if has_header else str(i)
+            fields.append(pa.field(name, field.type))
+        self.schema = pa.schema(fields)
+        # CSV上の列名 -> 型（column_typesとして渡すと同じ型で読み直せる）
+        self.column_types = {field.name: field.type for field in self._reader.schema}
+        self.row_count = 0
+        self._nullable_columns = set()
+    
+    def read_block(self) -> Optional[pa.Table]:
+        """次のブロックを読み込む（終端ではNone）"""
+        try:
+            while True:
+                try:
+                    batch = self._reader.read_next_batch()
+                except StopIteration:
+                    return None
+                if batch.num_rows > 0:
+                    break
+            table = pa.Table.from_batches([batch]).rename_columns(self.schema.names)
+        except pa.ArrowInvalid as e:
+            mismatch = _column_type_mismatch(e, self.column_types)
+            if mismatch is None:
+                raise ValueError(f"Failed to parse CSV: {e}")
+            raise mismatch from None
+        except (pa.ArrowException, LookupError, UnicodeError) as e:
+            raise ValueError(f"Failed to parse CSV: {e}")
+        
+        self.row_count += table.num_rows
+        for name, column in zip(self.schema.names, table.columns):
+            if column.null_count > 0:
+                self._nullable_columns.add(name)
+        return table
+    
+    def column_schema(self) -> List[ColumnSchema]:
+        """読み込んだ内容からスキーマを生成"""
+        return [
+            ColumnSchema(
+                name=field.name,
+                dtype=_column_dtype(field.type),
+                nullable=field.name in self._nullable_columns,
+            )
+            for field in self.schema
+        ]
+
+
+def _scan_csv_column_types(
+    csv_file: BinaryIO,
+    encoding: str,
+    delimiter: str,
+    has_header: bool,
+) -> Tuple[Dict[str, pa.DataType], int]:
+    """CSV全体を読み、全ブロックの値が収まる各列の型と行数を求める（S3には書き出さない）
+    
+    推論した型に変換できない値があった場合は、その列の型を広げて（整数 → 浮動小数点 → 文字列）
+    読み込み済みの行を読み飛ばし、続きから読み直す。
+    """
+    start = csv_file.tell()
+    column_types: Optional[Dict[str, pa.DataType]] = None
+    row_count = 0
+    try:
+        while True:
+            reader = None
+            try:
+                reader = _CsvBlockReader(csv_file, encoding, delimiter, has_header, column_types, skip_rows=row_count)
+                # 読み直しても他の列の型が変わらないよう、全列の型を固定する
+                column_types = reader.column_types
+                while reader.read_block() is not None:
+                    pass
+                return column_types, row_count + reader.row_count
+            except _ColumnTypeMismatch as e:
+                widened = _widen_type(e.column_type)
+                if widened == e.column_type:
+                    raise ValueError(f"Failed to parse CSV: {e}")
+                column_types[e.column] = widened
+                if reader is not None:
+                    row_count += reader.row_count
+                csv_file.seek(start)
+    finally:
+        csv_file.seek(start)
+
+
+def _write_csv_blocks(reader: _CsvBlockReader, sink: BinaryIO) -> None:
+    """CSVの各ブロックをParquetの行グループとして逐次書き出す"""
+    with pq.ParquetWriter(sink, reader.schema) as writer:
+        while (table := reader.read_block()) is not None:
+            writer.write_table(table)
+
+
+def _encode_partitions(
+    table: pa.Table,
+    base_path: str,
+    partition_column: str,
+    part: int,
+) -> List[Tuple[str, str, bytes]]:
+    """テーブルをパーティションキーごとに分割してParquetにエンコード（キー, S3キー, 内容）"""
+    encoded = []
+    for key, partition_table in split_table(table, partition_column):
+        buffer = io.BytesIO()
+        pq.write_table(partition_table, buffer)
+        encoded.append((key, partition_object_key(base_path, partition_column, key, part), buffer.getvalue()))
+    return encoded
+
+
+async def _store_csv_as_parquet(
+    csv_file: BinaryIO,
+    s3_path: str,
+    encoding: str,
+    delimiter: str,
+    has_header: bool,
+    partition_column: Optional[str] = None,
+) -> Tuple[List[ColumnSchema], int]:
+    """CSVをParquetに変換してS3に保存
+    
+    パーティションカラムが指定されない場合、書き出された行グループは
+    マルチパートアップロードのパートとして逐次送信する。
+    指定された場合は、ブロックごとに日付パーティション別のファイルを書き出す。
+    
+    先頭ブロックで推論した型に変換できない値が後続のブロックにある場合に備えて、
+    書き出す前にCSV全体を読んで各列の型を確定させる（S3への書き込みは1回だけ行う）。
+    """
+    column_types, row_count = await asyncio.to_thread(
+        _scan_csv_column_types, csv_file, encoding, delimiter, has_header,
+    )
+    if row_count == 0:
+        raise ValueError("CSV has no data")
+    
+    try:
+        return await _convert_csv_to_parquet(
+            csv_file, s3_path, encoding, delimiter, has_header, partition_column, column_types,
+        )
+    except _ColumnTypeMismatch as e:
+        raise ValueError(f"Failed to parse CSV: {e}")
+
+
+async def _convert_csv_to_parquet(
+    csv_file: BinaryIO,
+    s3_path: str,
+    encoding: str,
+    delimiter: str,
+    has_header: bool,
+    partition_column: Optional[str],
+    column_types: Dict[str, pa.DataType],
+) -> Tuple[List[ColumnSchema], int]:
+    """column_typesで指定した列の型を使ってCSVをParquetに変換し、S3に保存"""
+    s3_client = await get_s3_client()
+    bucket_name = get_bucket_name("datasets")
+    
+    # CPUバウンドな変換処理はイベントループを塞がないようスレッドで実行
+    reader = await asyncio.to_thread(
+        _CsvBlockReader, csv_file, encoding, delimiter, has_header, column_types,
+    )
+    
+    if not partition_column:
+        async with S3MultipartWriter(s3_client, bucket_name, s3_path) as sink:
+            await asyncio.to_thread(_write_csv_blocks, reader, sink)
+    else:
+        if partition_column not in reader.schema.names:
+            raise ValueError(f"Partition column not found: {partition_column}")
+        
+        block_index = 0
+        partition_keys_seen = set()
+        while (table := await asyncio.to_thread(reader.read_block)) is not None:
+            partitions = await asyncio.to_thread(
+                _encode_partitions, table, s3_path, partition_column, block_index,
+            )
+            # ブロックをまたいでもパーティション数が上限を超えないようにする
+            partition_keys_seen.update(key for key, _, _ in partitions)
+            check_partition_count(len(partition_keys_seen))
+            await put_objects(s3_client, bucket_name, [(object_key, body) for _, object_key, body in partitions])
+            block_index += 1
+    
+    return reader.column_schema(), reader.row_count
+
+
+def _dataset_s3_path(dataset_id: str, partition_column: Optional[str]) -> str:
+    """DatasetのS3パスを生成（パーティション分割時はプレフィックス）"""
+    if partition_column:
+        return f"datasets/{dataset_id}/partitions/"
+    return f"datasets/{dataset_id}/data.parquet"
+
+
 async def create_dataset_from_local_csv(
     user_id: str,
     name: str,
-    csv_content: bytes,
+    csv_file: BinaryIO,
     encoding: str = "utf-8",
     delimiter: str = ",",
     has_header: bool = True,
+    partition_column: Optional[str] = None,
 ) -> Dataset:
     """ローカルCSVからDatasetを作成"""
-    # CSVを読み込む
-    try:
-        df = pd.read_csv(
-            io.BytesIO(csv_content),
-            encoding=encoding,
-            sep=delimiter,
-            header=0 if has_header else None,
-        )
-    except Exception as e:
-        raise ValueError(f"Failed to parse CSV: {e}")
-    
-    if df.empty:
-        raise ValueError("CSV has no data")
-    
-    # スキーマを生成
-    schema = [
-        ColumnSchema(
-            name=str(col),
-            dtype=str(df[col].dtype),
-            nullable=df[col].isna().any(),
-        )
-        for col in df.columns
-    ]
-    
-    # Parquetに変換してS3に保存
+    # CSVをParquetに変換してS3に保存
     dataset_id = f"dataset_{uuid.uuid4().hex[:12]}"
-    s3_path = f"datasets/{dataset_id}/data.parquet"
-    
-    parquet_buffer = io.BytesIO()
-    table = pa.Table.from_pandas(df)
-    pq.write_table(table, parquet_buffer)
-    parquet_buffer.seek(0)
-    
-    s3_client = await get_s3_client()
-    bucket_name = get_bucket_name("datasets")
-    await s3_client.put_object(
-        Bucket=bucket_name,
-        Key=s3_path,
-        Body=parquet_buffer.getvalue(),
+    s3_path = _dataset_s3_path(dataset_id, partition_column)
+    
+    schema, row_count = await _store_csv_as_parquet(
+        csv_file,
+        s3_path,
+        encoding=encoding,
+        delimiter=delimiter,
+        has_header=has_header,
+        partition_column=partition_column,
     )
     
     # DynamoDBにメタデータを保存
@@ -181,14 +448,16 @@ async def create_dataset_from_local_csv(
             "has_header": has_header,
         },
         "schema": _schema_to_dynamodb(schema),
-        "rowCount": len(df),
-        "columnCount": len(df.columns),
+        "rowCount": row_count,
+        "columnCount": len(schema),
         "s3Path": s3_path,
         "createdAt": now,
         "updatedAt": now,
         "lastImportAt": now,
         "lastImportBy": user_id,
     }
+    if partition_column:
+        item_data["partitionColumn"] = partition_column
     
     client = await get_dynamodb_client()
     await client.put_item(
@@ -203,10 +472,10 @@ async def create_dataset_from_local_csv(
         source_type="local_csv",
         source_config=item_data["sourceConfig"],
         schema=schema,
-        row_count=len(df),
-        column_count=len(df.columns),
+        row_count=row_count,
+        column_count=len(schema),
         s3_path=s3_path,
-        partition_column=None,
+        partition_column=partition_column,
         created_at=datetime.fromtimestamp(now),
         updated_at=datetime.fromtimestamp(now),
         last_import_at=datetime.fromtimestamp(now),
@@ -222,55 +491,36 @@ async def create_dataset_from_s3_csv(
     encoding: str = "utf-8",
     delimiter: str = ",",
     has_header: bool = True,
+    partition_column: Optional[str] = None,
 ) -> Dataset:
     """S3 CSVからDatasetを作成"""
-    # S3からCSVをダウンロード
-    s3_client = await get_s3_client()
-    try:
-        response = await s3_client.get_object(Bucket=bucket, Key=key)
-        csv_content = await response["Body"].read()
-    except Exception as e:
-        raise ValueError(f"Failed to download CSV from S3: {e}")
+    dataset_id = f"dataset_{uuid.uuid4().hex[:12]}"
+    s3_path = _dataset_s3_path(dataset_id, partition_column)
     
-    # CSVを読み込む
-    try:
-        df = pd.read_csv(
-            io.BytesIO(csv_content),
+    s3_client = await get_s3_client()
+    with tempfile.TemporaryFile() as csv_file:
+        # S3からCSVをチャンク単位でダウンロード（メモリに全体を保持しない）
+        try:
+            response = await s3_client.get_object(Bucket=bucket, Key=key)
+            body = response["Body"]
+            while True:
+                chunk = await body.read(S3_DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                csv_file.write(chunk)
+        except Exception as e:
+            raise ValueError(f"Failed to download CSV from S3: {e}")
+        csv_file.seek(0)
+        
+        # CSVをParquetに変換してS3に保存
+        schema, row_count = await _store_csv_as_parquet(
+            csv_file,
+            s3_path,
             encoding=encoding,
-            sep=delimiter,
-            header=0 if has_header else None,
-        )
-    except Exception as e:
-        raise ValueError(f"Failed to parse CSV: {e}")
-    
-    if df.empty:
-        raise ValueError("CSV has no data")
-    
-    # スキーマを生成
-    schema = [
-        ColumnSchema(
-            name=str(col),
-            dtype=str(df[col].dtype),
-            nullable=df[col].isna().any(),
+            delimiter=delimiter,
+            has_header=has_header,
+            partition_column=partition_column,
         )
-        for col in df.columns
-    ]
-    
-    # Parquetに変換してS3に保存
-    dataset_id = f"dataset_{uuid.uuid4().hex[:12]}"
-    s3_path = f"datasets/{dataset_id}/data.parquet"
-    
-    parquet_buffer = io.BytesIO()
-    table = pa.Table.from_pandas(df)
-    pq.write_table(table, parquet_buffer)
-    parquet_buffer.seek(0)
-    
-    datasets_bucket = get_bucket_name("datasets")
-    await s3_client.put_object(
-        Bucket=datasets_bucket,
-        Key=s3_path,
-        Body=parquet_buffer.getvalue(),
-    )
     
     # DynamoDBにメタデータを保存
     now = int(datetime.utcnow().timestamp())
@@ -288,14 +538,16 @@ async def create_dataset_from_s3_csv(
             "has_header": has_header,
         },
         "schema": _schema_to_dynamodb(schema),
-        "rowCount": len(df),
-        "columnCount": len(df.columns),
+        "rowCount": row_count,
+        "columnCount": len(schema),
         "s3Path": s3_path,
         "createdAt": now,
         "updatedAt": now,
         "lastImportAt": now,
         "lastImportBy": user_id,
     }
+    if partition_column:
+        item_data["partitionColumn"] = partition_column
     
     client = await get_dynamodb_client()
     await client.put_item(
@@ -310,10 +562,10 @@ async def create_dataset_from_s3_csv(
         source_type="s3_csv",
         source_config=item_data["sourceConfig"],
         schema=schema,
-        row_count=len(df),
-        column_count=len(df.columns),
+        row_count=row_count,
+        column_count=len(schema),
         s3_path=s3_path,
-        partition_column=None,
+        partition_column=partition_column,
         created_at=datetime.fromtimestamp(now),
         updated_at=datetime.fromtimestamp(now),
         last_import_at=datetime.fromtimestamp(now),
@@ -329,6 +581,7 @@ async def create_dataset_from_transform_output(
     schema: List[ColumnSchema],
     row_count: int,
     column_count: int,
+    partition_column: Optional[str] = None,
 ) -> Dataset:
     """Transform実行の出力からDatasetを作成"""
     dataset_id = f"dataset_{uuid.uuid4().hex[:12]}"
@@ -351,6 +604,8 @@ async def create_dataset_from_transform_output(
         "lastImportAt": now,
         "lastImportBy": user_id,
     }
+    if partition_column:
+        item_data["partitionColumn"] = partition_column
     
     client = await get_dynamodb_client()
     await client.put_item(
@@ -368,7 +623,7 @@ async def create_dataset_from_transform_output(
         row_count=row_count,
         column_count=column_count,
         s3_path=s3_path,
-        partition_column=None,
+        partition_column=partition_column,
         created_at=datetime.fromtimestamp(now),
         updated_at=datetime.fromtimestamp(now),
         last_import_at=datetime.fromtimestamp(now),
@@ -390,43 +645,44 @@ async def get_dataset(dataset_id: str) -> Optional[Dataset]:
     return _item_to_dataset(response["Item"])
 
 
+async def get_datasets(dataset_ids: List[str]) -> Dict[str, Dataset]:
+    """複数のDatasetをまとめて取得（存在しないIDは含まない）"""
+    client = await get_dynamodb_client()
+    items = await batch_get_items(client, DATASETS_TABLE, "datasetId", dataset_ids)
+    return {dataset_id: _item_to_dataset(item) for dataset_id, item in items.items()}
+
+
 async def list_datasets(
     owner_id: Optional[str] = None,
     limit: int = 20,
-    offset: int = 0,
+    cursor: Optional[str] = None,
     q: Optional[str] = None,
-) -> Tuple[List[Dataset], int]:
-    """Dataset一覧を取得"""
+) -> Tuple[List[Dataset], Optional[str]]:
+    """Dataset一覧を取得（戻り値は（Dataset一覧, 次ページのカーソル））"""
     client = await get_dynamodb_client()
     
     if owner_id:
         # GSIを使用してownerIdでクエリ
-        response = await client.query(
-            TableName=DATASETS_TABLE,
-            IndexName="DatasetsByOwner",
-            KeyConditionExpression="ownerId = :ownerId",
-            ExpressionAttributeValues={
+        operation = "query"
+        params = {
+            "TableName": DATASETS_TABLE,
+            "IndexName": "DatasetsByOwner",
+            "KeyConditionExpression": "ownerId = :ownerId",
+            "ExpressionAttributeValues": {
                 ":ownerId": {"S": owner_id}
             },
-            Limit=limit + offset,
-            ScanIndexForward=False,  # 新しい順
-        )
-        items = response.get("Items", [])
+            "ScanIndexForward": False,  # 新しい順
+        }
+        key_names = ["datasetId", "ownerId", "createdAt"]
     else:
         # Scan
-        response = await client.scan(
-            TableName=DATASETS_TABLE,
-            Limit=limit + offset,
-        )
-        items = response.get("Items", [])
+        operation = "scan"
+        params = {"TableName": DATASETS_TABLE}
+        key_names = ["datasetId"]
     
-    datasets = [_item_to_dataset(item) for item in items]
-    
-    if q:
-        datasets = [d for d in datasets if q.lower() in d.name.lower()]
-    
-    total = len(datasets)
-    return datasets[offset:offset+limit], total
+    item_filter = (lambda item: q.lower() in item["name"]["S"].lower()) if q else None
+    items, next_cursor = await query_page(client, operation, params, key_names, limit, cursor, item_filter)
+    return [_item_to_dataset(item) for item in items], next_cursor
 
 
 async def update_dataset(dataset_id: str, dataset_data: DatasetUpdate) -> Dataset:
@@ -483,6 +739,9 @@ async def delete_dataset(dataset_id: str) -> None:
         Key={"datasetId": {"S": dataset_id}},
     )
     
+    # このDatasetを参照するカードのキャッシュを無効化
+    await invalidate_dataset_preview_cache(dataset_id)
+    
     # S3からも削除（オプション）
     # s3_client = await get_s3_client()
     # bucket_name = get_bucket_name("datasets")
@@ -513,6 +772,7 @@ async def reimport_dataset(dataset_id: str, user_id: str) -> Dataset:
             encoding=config.get("encoding", "utf-8"),
             delimiter=config.get("delimiter", ","),
             has_header=config.get("has_header", True),
+            partition_column=dataset.partition_column,
         )
     else:
         raise ValueError(f"Reimport not supported for source type: {dataset.source_type}")
@@ -546,6 +806,11 @@ async def reimport_dataset(dataset_id: str, user_id: str) -> Dataset:
         },
     )
     
+    # 再取り込み前のデータで作られたカードのキャッシュを無効化し、参照しているDashboardを事前生成する
+    await invalidate_dataset_preview_cache(dataset_id)
+    from app.services.prewarm_service import schedule_dataset_prewarm
+    schedule_dataset_prewarm(dataset_id)
+    
     # スキーマ変更フラグを追加
     updated_dataset = await get_dataset(dataset_id)
     if schema_changed:
@@ -555,6 +820,41 @@ async def reimport_dataset(dataset_id: str, user_id: str) -> Dataset:
     return updated_dataset
 
 
+async def read_dataset_table(
+    s3_client,
+    bucket_name: str,
+    s3_path: str,
+    max_rows: Optional[int] = None,
+) -> pa.Table:
+    """DatasetのParquetをS3から読み込む
+    
+    パーティション分割されている場合（s3_pathがプレフィックス）は、配下のファイルを
+    キー順に読み込んで結合する。max_rowsを指定した場合は、その行数に達した時点で
+    残りのファイルの読み込みを打ち切る（単一ファイルの場合は全行を返す）。
+    """
+    if not is_partitioned_path(s3_path):
+        response = await s3_client.get_object(Bucket=bucket_name, Key=s3_path)
+        return pq.read_table(io.BytesIO(await response["Body"].read()))
+    
+    object_keys = sorted(
+        key for key in await list_object_keys(s3_client, bucket_name, s3_path)
+        if key.endswith(".parquet")
+    )
+    if not object_keys:
+        raise ValueError(f"No partition files found under {s3_path}")
+    
+    tables = []
+    rows = 0
+    for object_key in object_keys:
+        response = await s3_client.get_object(Bucket=bucket_name, Key=object_key)
+        table = pq.read_table(io.BytesIO(await response["Body"].read()))
+        tables.append(table)
+        rows += table.num_rows
+        if max_rows is not None and rows >= max_rows:
+            break
+    return pa.concat_tables(tables)
+
+
 async def get_dataset_preview(dataset_id: str, limit: int = 100) -> DatasetPreview:
     """Datasetプレビューを取得"""
     dataset = await get_dataset(dataset_id)
@@ -566,13 +866,10 @@ async def get_dataset_preview(dataset_id: str, limit: int = 100) -> DatasetPrevi
     bucket_name = get_bucket_name("datasets")
     
     try:
-        response = await s3_client.get_object(Bucket=bucket_name, Key=dataset.s3_path)
-        parquet_content = await response["Body"].read()
-        
-        # Parquetを読み込む
-        parquet_buffer = io.BytesIO(parquet_content)
-        table = pq.read_table(parquet_buffer)
+        table = await read_dataset_table(s3_client, bucket_name, dataset.s3_path, max_rows=limit)
         df = table.to_pandas()
+        # パーティション分割時は先頭のファイルのみ読み込むため、総行数はメタデータから取得する
+        total_rows = dataset.row_count if is_partitioned_path(dataset.s3_path) else len(df)
         
         # 先頭limit行を取得
         preview_df = df.head(limit)
@@ -580,7 +877,7 @@ async def get_dataset_preview(dataset_id: str, limit: int = 100) -> DatasetPrevi
         return DatasetPreview(
             columns=list(preview_df.columns),
             rows=preview_df.to_dict("records"),
-            total_rows=len(df),
+            total_rows=total_rows,
         )
     except Exception as e:
         raise ValueError(f"Failed to load dataset preview: {e}")
@@ -0,0 +1,76 @@
+"""Executorサービスとの通信
+
+Executorへのリクエストはアプリケーション全体で共有するHTTPクライアントで行い、
+接続を再利用する（リクエストごとのTCP接続の確立を避ける）。
+"""
+import httpx
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# キャンセル要求のタイムアウト（秒）
+CANCEL_TIMEOUT_SECONDS = 5
+
+_executor_client: httpx.AsyncClient | None = None
+
+
+async def get_executor_client() -> httpx.AsyncClient:
+    """Executor用のHTTPクライアントを取得（シングルトン）
+    
+    タイムアウトはリクエストごとに指定する。
+    """
+    global _executor_client
+    
+    if _executor_client is None:
+        limits = httpx.Limits(
+            max_connections=settings.executor_max_connections,
+            max_keepalive_connections=settings.executor_max_keepalive_connections,
+            keepalive_expiry=settings.executor_keepalive_expiry,
+        )
+        try:
+            _executor_client = httpx.AsyncClient(
+                base_url=settings.executor_endpoint,
+                limits=limits,
+                http2=settings.executor_http2,
+                timeout=settings.executor_timeout_card + 5,
+            )
+        except ImportError:
+            logger.error("h2 package not installed. Install with: pip install httpx[http2]")
+            raise
+    
+    return _executor_client
+
+
+async def close_executor_client() -> None:
+    """Executor用のHTTPクライアントを閉じる"""
+    global _executor_client
+    
+    if _executor_client is not None:
+        await _executor_client.aclose()
+        _executor_client = None
+
+
+async def cancel_execution(execution_id: str) -> None:
+    """Executorで実行中（または待機中）の処理をキャンセル
+    
+    タイムアウト等で結果を待たなくなった実行の実行枠を解放するためのもの。
+    キャンセルに失敗しても呼び出し元の処理には影響させない。
+    """
+    try:
+        client = await get_executor_client()
+        response = await client.post(f"/executions/{execution_id}/cancel", timeout=CANCEL_TIMEOUT_SECONDS)
+        # 404は既に完了しているため問題ない
+        if response.status_code not in (200, 404):
+            logger.warning(
+                "Failed to cancel executor execution",
+                execution_id=execution_id,
+                status_code=response.status_code,
+            )
+    except httpx.HTTPError as e:
+        logger.warning(
+            "Failed to cancel executor execution",
+            execution_id=execution_id,
+            error=str(e),
+        )
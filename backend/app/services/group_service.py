@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional, List
 import uuid
 
-from app.db.dynamodb import get_dynamodb_client, get_table_name
+from app.db.dynamodb import get_dynamodb_client, get_table_name, query_page
 from app.core.exceptions import NotFoundError
 from app.models.group import Group, GroupCreate, GroupUpdate, GroupMember
 
@@ -77,22 +77,19 @@ async def get_group(group_id: str) -> Optional[Group]:
     return _item_to_group(response["Item"])
 
 
-async def list_groups(limit: int = 20, offset: int = 0, q: Optional[str] = None) -> tuple[List[Group], int]:
-    """グループ一覧を取得"""
+async def list_groups(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+) -> tuple[List[Group], Optional[str]]:
+    """グループ一覧を取得（戻り値は（グループ一覧, 次ページのカーソル））"""
     client = await get_dynamodb_client()
     
-    response = await client.scan(
-        TableName=GROUPS_TABLE,
-        Limit=limit + offset,
+    item_filter = (lambda item: q.lower() in item["name"]["S"].lower()) if q else None
+    items, next_cursor = await query_page(
+        client, "scan", {"TableName": GROUPS_TABLE}, ["groupId"], limit, cursor, item_filter,
     )
-    
-    groups = [_item_to_group(item) for item in response.get("Items", [])]
-    
-    if q:
-        groups = [g for g in groups if q.lower() in g.name.lower()]
-    
-    total = len(groups)
-    return groups[offset:offset+limit], total
+    return [_item_to_group(item) for item in items], next_cursor
 
 
 async def update_group(group_id: str, group_data: GroupUpdate) -> Group:
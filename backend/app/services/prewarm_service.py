@@ -0,0 +1,146 @@
+"""Cardプレビューキャッシュの事前生成サービス
+
+Dashboardに配置された全Cardを、フィルタなし・デフォルトのFilterView・共有FilterViewの
+フィルタ条件でレンダリングし、キャッシュに格納しておく（閲覧時にExecutorを待たずに済む）。
+キャッシュ済みのCardはrender_cardsが再実行しないため、繰り返し実行しても負荷は小さい。
+"""
+import asyncio
+import json
+from typing import Any, Awaitable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.dashboard import Dashboard
+from app.services.cache_service import get_cache_backend
+from app.services.card_service import list_card_ids_by_dataset, render_cards
+from app.services.dashboard_service import get_layout_card_ids, iter_dashboards
+from app.services.filter_view_service import list_filter_views
+
+
+logger = get_logger(__name__)
+
+# 定期実行を複数ワーカーで重複させないためのロック
+PREWARM_SCHEDULE_LOCK_KEY = "lock:cache_prewarm_schedule"
+
+# 実行中のバックグラウンドタスク（タスクが途中で破棄されないよう参照を保持する）
+_background_tasks: set[asyncio.Task] = set()
+_scheduler: Optional[asyncio.Task] = None
+
+
+async def get_prewarm_filters(dashboard: Dashboard) -> List[Dict[str, Any]]:
+    """事前生成するフィルタ条件（フィルタなし・デフォルトのFilterView・共有FilterView）"""
+    filters_list: List[Dict[str, Any]] = [{}]
+    for filter_view in await list_filter_views(dashboard.dashboard_id):
+        if (
+            filter_view.is_shared
+            or filter_view.is_default
+            or filter_view.filter_view_id == dashboard.default_filter_view_id
+        ):
+            filters_list.append(filter_view.filter_state)
+    
+    # 同じフィルタ条件は1回のみ
+    unique: Dict[str, Dict[str, Any]] = {}
+    for filters in filters_list:
+        unique.setdefault(json.dumps(filters, sort_keys=True), filters)
+    return list(unique.values())
+
+
+async def prewarm_dashboard(dashboard: Dashboard, card_ids: Optional[List[str]] = None) -> Dict[str, int]:
+    """Dashboardの全Card（card_idsを指定した場合はそのCardのみ）を事前生成し、成功・失敗の件数を返す"""
+    if card_ids is None:
+        card_ids = get_layout_card_ids(dashboard.layout)
+    counts = {"success": 0, "error": 0}
+    if not card_ids:
+        return counts
+    
+    for filters in await get_prewarm_filters(dashboard):
+        async for result in render_cards(card_ids, filters):
+            counts["success" if result["status"] == "success" else "error"] += 1
+    
+    logger.info("cache_prewarm_dashboard", dashboard_id=dashboard.dashboard_id, **counts)
+    return counts
+
+
+async def prewarm_dataset_dashboards(dataset_id: str) -> int:
+    """Datasetを参照するCardを、それを含む各Dashboardのフィルタ条件で事前生成し、対象のDashboard数を返す
+    
+    対象のCardはCardsByDatasetインデックスから取得するため、参照するCardがなければDashboardは走査しない。
+    """
+    card_ids = await list_card_ids_by_dataset(dataset_id)
+    if not card_ids:
+        return 0
+    
+    targets = set(card_ids)
+    prewarmed = 0
+    async for dashboard in iter_dashboards():
+        dashboard_card_ids = [
+            card_id for card_id in get_layout_card_ids(dashboard.layout) if card_id in targets
+        ]
+        if dashboard_card_ids:
+            await prewarm_dashboard(dashboard, dashboard_card_ids)
+            prewarmed += 1
+    return prewarmed
+
+
+async def prewarm_all_dashboards() -> int:
+    """全Dashboardを事前生成し、対象のDashboard数を返す"""
+    prewarmed = 0
+    async for dashboard in iter_dashboards():
+        await prewarm_dashboard(dashboard)
+        prewarmed += 1
+    return prewarmed
+
+
+def schedule_dataset_prewarm(dataset_id: str) -> None:
+    """Datasetを参照するDashboardの事前生成をバックグラウンドで開始（再取り込み後）"""
+    if not settings.cache_prewarm_enabled:
+        return
+    _run_in_background(prewarm_dataset_dashboards(dataset_id), dataset_id=dataset_id)
+
+
+def _run_in_background(coro: Awaitable[Any], **log_context: Any) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    
+    def on_done(task: asyncio.Task) -> None:
+        _background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("cache_prewarm_failed", error=str(task.exception()), **log_context)
+    
+    task.add_done_callback(on_done)
+
+
+def start_prewarm_scheduler() -> None:
+    """全Dashboardの定期的な事前生成を開始（cache_prewarm_interval_secondsが0の場合は何もしない）"""
+    global _scheduler
+    
+    if settings.cache_prewarm_interval_seconds <= 0:
+        return
+    if _scheduler is None or _scheduler.done():
+        _scheduler = asyncio.create_task(_prewarm_periodically(settings.cache_prewarm_interval_seconds))
+
+
+async def stop_prewarm_scheduler() -> None:
+    """定期実行と実行中の事前生成を停止"""
+    global _scheduler
+    
+    tasks = list(_background_tasks)
+    if _scheduler is not None:
+        tasks.append(_scheduler)
+        _scheduler = None
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _prewarm_periodically(interval_seconds: int) -> None:
+    while True:
+        # ロックは解放せず期限切れに任せ、全ワーカーを通じて間隔ごとに1回だけ実行する
+        token = await get_cache_backend().acquire_lock(PREWARM_SCHEDULE_LOCK_KEY, interval_seconds)
+        if token is not None:
+            try:
+                prewarmed = await prewarm_all_dashboards()
+                logger.info("cache_prewarm_scheduled_completed", dashboards=prewarmed)
+            except Exception as e:
+                logger.error("cache_prewarm_failed", error=str(e), exc_info=True)
+        await asyncio.sleep(interval_seconds)
@@ -4,11 +4,12 @@ from typing import Optional, List, Tuple
 import uuid
 import httpx
 
-from app.db.dynamodb import get_dynamodb_client, get_table_name
+from app.db.dynamodb import get_dynamodb_client, get_table_name, query_page
 from app.core.exceptions import NotFoundError, InternalError
 from app.core.config import settings
 from app.models.transform import Transform, TransformCreate, TransformUpdate, TransformExecution
 from app.services.dataset_service import get_dataset, ColumnSchema
+from app.services.executor_client import get_executor_client, cancel_execution
 
 
 TRANSFORMS_TABLE = get_table_name("Transforms")
@@ -140,40 +141,34 @@ async def create_transform(user_id: str, transform_data: TransformCreate) -> Tra
 async def list_transforms(
     owner_id: Optional[str] = None,
     limit: int = 20,
-    offset: int = 0,
+    cursor: Optional[str] = None,
     q: Optional[str] = None,
-) -> Tuple[List[Transform], int]:
-    """Transform一覧を取得"""
+) -> Tuple[List[Transform], Optional[str]]:
+    """Transform一覧を取得（戻り値は（Transform一覧, 次ページのカーソル））"""
     client = await get_dynamodb_client()
     
     if owner_id:
         # GSIを使用してownerIdでクエリ
-        response = await client.query(
-            TableName=TRANSFORMS_TABLE,
-            IndexName="TransformsByOwner",
-            KeyConditionExpression="ownerId = :ownerId",
-            ExpressionAttributeValues={
+        operation = "query"
+        params = {
+            "TableName": TRANSFORMS_TABLE,
+            "IndexName": "TransformsByOwner",
+            "KeyConditionExpression": "ownerId = :ownerId",
+            "ExpressionAttributeValues": {
                 ":ownerId": {"S": owner_id}
             },
-            Limit=limit + offset,
-            ScanIndexForward=False,  # 新しい順
-        )
-        items = response.get("Items", [])
+            "ScanIndexForward": False,  # 新しい順
+        }
+        key_names = ["transformId", "ownerId", "createdAt"]
     else:
         # Scan
-        response = await client.scan(
-            TableName=TRANSFORMS_TABLE,
-            Limit=limit + offset,
-        )
-        items = response.get("Items", [])
-    
-    transforms = [_item_to_transform(item) for item in items]
-    
-    if q:
-        transforms = [t for t in transforms if q.lower() in t.name.lower()]
+        operation = "scan"
+        params = {"TableName": TRANSFORMS_TABLE}
+        key_names = ["transformId"]
     
-    total = len(transforms)
-    return transforms[offset:offset+limit], total
+    item_filter = (lambda item: q.lower() in item["name"]["S"].lower()) if q else None
+    items, next_cursor = await query_page(client, operation, params, key_names, limit, cursor, item_filter)
+    return [_item_to_transform(item) for item in items], next_cursor
 
 
 async def get_transform(transform_id: str) -> Optional[Transform]:
@@ -319,75 +314,81 @@ async def execute_transform(transform_id: str, user_id: str) -> TransformExecuti
         request_data = {
             "code": transform.code,
             "input_dataset_paths": input_dataset_paths,
+            # params.partition_column が指定されていれば出力を日付パーティションに分割する
+            "partition_column": transform.params.get("partition_column"),
+            "execution_id": execution_id,
         }
         
-        async with httpx.AsyncClient(timeout=settings.executor_timeout_transform + 10) as http_client:
-            response = await http_client.post(executor_url, json=request_data)
-            response.raise_for_status()
-            result = response.json()
-            
-            if result.get("status") != "success":
-                raise InternalError(f"Executor returned error: {result.get('detail', 'Unknown error')}")
-            
-            executor_result = result.get("data", {})
-            s3_path = executor_result.get("s3_path")
-            row_count = executor_result.get("row_count", 0)
-            column_count = executor_result.get("column_count", 0)
-            columns = executor_result.get("columns", [])
-            
-            if not s3_path:
-                raise InternalError("Executor did not return S3 path")
-            
-            # 出力Datasetを作成
-            from app.services.dataset_service import create_dataset_from_transform_output
-            output_dataset = await create_dataset_from_transform_output(
-                user_id=user_id,
-                name=f"{transform.name}_output",
-                transform_id=transform_id,
-                s3_path=s3_path,
-                schema=[ColumnSchema(name=col, dtype="string", nullable=True) for col in columns],
-                row_count=row_count,
-                column_count=column_count,
-            )
-            
-            # Transformのoutput_dataset_idを更新
-            update_expressions = ["outputDatasetId = :outputDatasetId", "lastExecutedAt = :lastExecutedAt"]
-            expression_attribute_values = {
+        http_client = await get_executor_client()
+        response = await http_client.post(
+            executor_url, json=request_data, timeout=settings.executor_timeout_transform + 10,
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        if result.get("status") != "success":
+            raise InternalError(f"Executor returned error: {result.get('detail', 'Unknown error')}")
+        
+        executor_result = result.get("data", {})
+        s3_path = executor_result.get("s3_path")
+        row_count = executor_result.get("row_count", 0)
+        column_count = executor_result.get("column_count", 0)
+        columns = executor_result.get("columns", [])
+        
+        if not s3_path:
+            raise InternalError("Executor did not return S3 path")
+        
+        # 出力Datasetを作成
+        from app.services.dataset_service import create_dataset_from_transform_output
+        output_dataset = await create_dataset_from_transform_output(
+            user_id=user_id,
+            name=f"{transform.name}_output",
+            transform_id=transform_id,
+            s3_path=s3_path,
+            schema=[ColumnSchema(name=col, dtype="string", nullable=True) for col in columns],
+            row_count=row_count,
+            column_count=column_count,
+            partition_column=executor_result.get("partition_column"),
+        )
+        
+        # Transformのoutput_dataset_idを更新
+        update_expressions = ["outputDatasetId = :outputDatasetId", "lastExecutedAt = :lastExecutedAt"]
+        expression_attribute_values = {
+            ":outputDatasetId": {"S": output_dataset.dataset_id},
+            ":lastExecutedAt": {"N": str(now)},
+        }
+        
+        await client.update_item(
+            TableName=TRANSFORMS_TABLE,
+            Key={"transformId": {"S": transform_id}},
+            UpdateExpression=f"SET {', '.join(update_expressions)}",
+            ExpressionAttributeValues=expression_attribute_values,
+        )
+        
+        # 実行履歴を更新
+        finished_at = int(datetime.utcnow().timestamp())
+        await client.update_item(
+            TableName=EXECUTIONS_TABLE,
+            Key={"executionId": {"S": execution_id}},
+            UpdateExpression="SET #status = :status, finishedAt = :finishedAt, outputDatasetId = :outputDatasetId",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={
+                ":status": {"S": "completed"},
+                ":finishedAt": {"N": str(finished_at)},
                 ":outputDatasetId": {"S": output_dataset.dataset_id},
-                ":lastExecutedAt": {"N": str(now)},
-            }
-            
-            await client.update_item(
-                TableName=TRANSFORMS_TABLE,
-                Key={"transformId": {"S": transform_id}},
-                UpdateExpression=f"SET {', '.join(update_expressions)}",
-                ExpressionAttributeValues=expression_attribute_values,
-            )
-            
-            # 実行履歴を更新
-            finished_at = int(datetime.utcnow().timestamp())
-            await client.update_item(
-                TableName=EXECUTIONS_TABLE,
-                Key={"executionId": {"S": execution_id}},
-                UpdateExpression="SET #status = :status, finishedAt = :finishedAt, outputDatasetId = :outputDatasetId",
-                ExpressionAttributeNames={"#status": "status"},
-                ExpressionAttributeValues={
-                    ":status": {"S": "completed"},
-                    ":finishedAt": {"N": str(finished_at)},
-                    ":outputDatasetId": {"S": output_dataset.dataset_id},
-                },
-            )
-            
-            return TransformExecution(
-                execution_id=execution_id,
-                transform_id=transform_id,
-                status="completed",
-                started_at=datetime.fromtimestamp(now),
-                finished_at=datetime.fromtimestamp(finished_at),
-                error_message=None,
-                output_dataset_id=output_dataset.dataset_id,
-            )
-            
+            },
+        )
+        
+        return TransformExecution(
+            execution_id=execution_id,
+            transform_id=transform_id,
+            status="completed",
+            started_at=datetime.fromtimestamp(now),
+            finished_at=datetime.fromtimestamp(finished_at),
+            error_message=None,
+            output_dataset_id=output_dataset.dataset_id,
+        )
+        
     except httpx.HTTPStatusError as e:
         error_message = f"Executor service error: {e.response.status_code}"
         if e.response.status_code == 503:
@@ -412,6 +413,8 @@ async def execute_transform(transform_id: str, user_id: str) -> TransformExecuti
         
         raise InternalError(error_message)
     except httpx.TimeoutException:
+        # Executor側で実行が続いている場合は中断させる
+        await cancel_execution(execution_id)
         error_message = "Transform execution timeout"
         finished_at = int(datetime.utcnow().timestamp())
         await client.update_item(
@@ -446,24 +449,24 @@ async def execute_transform(transform_id: str, user_id: str) -> TransformExecuti
 async def list_transform_executions(
     transform_id: str,
     limit: int = 20,
-    offset: int = 0,
-) -> Tuple[List[TransformExecution], int]:
-    """Transform実行履歴を取得"""
+    cursor: Optional[str] = None,
+) -> Tuple[List[TransformExecution], Optional[str]]:
+    """Transform実行履歴を取得（戻り値は（実行履歴, 次ページのカーソル））"""
     client = await get_dynamodb_client()
     
     # GSIを使用してtransformIdでクエリ
-    response = await client.query(
-        TableName=EXECUTIONS_TABLE,
-        IndexName="ExecutionsByTransform",
-        KeyConditionExpression="transformId = :transformId",
-        ExpressionAttributeValues={
+    params = {
+        "TableName": EXECUTIONS_TABLE,
+        "IndexName": "ExecutionsByTransform",
+        "KeyConditionExpression": "transformId = :transformId",
+        "ExpressionAttributeValues": {
             ":transformId": {"S": transform_id}
         },
-        Limit=limit + offset,
-        ScanIndexForward=False,  # 新しい順
+        "ScanIndexForward": False,  # 新しい順
+    }
+    items, next_cursor = await query_page(
+        client, "query", params, ["executionId", "transformId", "startedAt"], limit, cursor,
     )
-    
-    items = response.get("Items", [])
     executions = []
     
     for item in items:
@@ -489,5 +492,4 @@ async def list_transform_executions(
             output_dataset_id=output_dataset_id,
         ))
     
-    total = len(executions)
-    return executions[offset:offset+limit], total
+    return executions, next_cursor
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional
 import uuid
 
-from app.db.dynamodb import get_dynamodb_client, get_table_name
+from app.db.dynamodb import get_dynamodb_client, get_table_name, query_page
 from app.core.security import hash_password
 from app.core.exceptions import NotFoundError
 from app.models.user import User, UserCreate, UserUpdate, UserInDB
@@ -113,24 +113,22 @@ async def get_user_by_email(email: str) -> Optional[UserInDB]:
     return _item_to_user_in_db(items[0])
 
 
-async def list_users(limit: int = 20, offset: int = 0, q: Optional[str] = None) -> tuple[list[User], int]:
-    """ユーザ一覧を取得"""
+async def list_users(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+) -> tuple[list[User], Optional[str]]:
+    """ユーザ一覧を取得（戻り値は（ユーザ一覧, 次ページのカーソル））"""
     client = await get_dynamodb_client()
     
-    # スキャン（本番ではGSI + クエリを使用）
-    response = await client.scan(
-        TableName=TABLE_NAME,
-        Limit=limit,
-    )
-    
-    users = [_item_to_user(item) for item in response.get("Items", [])]
+    def item_filter(item: dict) -> bool:
+        q_lower = q.lower()
+        return q_lower in item["name"]["S"].lower() or q_lower in item["email"]["S"].lower()
     
-    # 簡易的な検索（本番ではFilterExpressionを使用）
-    if q:
-        users = [u for u in users if q.lower() in u.name.lower() or q.lower() in u.email.lower()]
-    
-    total = len(users)
-    return users[offset:offset+limit], total
+    items, next_cursor = await query_page(
+        client, "scan", {"TableName": TABLE_NAME}, ["userId"], limit, cursor, item_filter if q else None,
+    )
+    return [_item_to_user(item) for item in items], next_cursor
 
 
 async def update_user(user_id: str, user_data: UserUpdate) -> User:
@@ -491,3 +491,26 @@ def setup_dynamodb_tables(mock_dynamodb):
         _ensure_table_exists(client, table_def["TableName"], table_def)
     
     yield dynamodb
+
+
+@pytest.fixture
+def collect_cursor_pages(test_client, auth_headers):
+    """next_cursorを辿って一覧APIの全ページのIDを集める"""
+    def _collect(path, id_field, limit=2, max_pages=10):
+        ids = []
+        cursor = None
+        for _ in range(max_pages):
+            params = {"limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            response = test_client.get(path, params=params, headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()
+            assert len(data["data"]) <= limit
+            ids.extend(item[id_field] for item in data["data"])
+            cursor = data["pagination"]["next_cursor"]
+            assert data["pagination"]["has_next"] == (cursor is not None)
+            if cursor is None:
+                return ids
+        raise AssertionError(f"{path}: {max_pages}ページ以内に終端に到達しない")
+    return _collect
@@ -0,0 +1,28 @@
+"""Admin APIのテスト"""
+from unittest.mock import patch
+from fastapi import status
+
+from app.core.config import settings
+from app.services.cache_service import InMemoryCacheBackend
+
+
+def test_get_cache_stats_success(test_client, auth_headers):
+    """キャッシュ統計情報取得成功（管理者）"""
+    cache = InMemoryCacheBackend()
+    with patch.object(settings, "admin_user_ids", "user_admin, user_test123"), \
+            patch("app.api.routes.admin.get_cache_backend", return_value=cache):
+        response = test_client.get("/api/admin/cache/stats", headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()["data"]
+    assert data["backend"] == "memory"
+    for key in ("entries", "bytes", "max_bytes", "hits", "misses", "evictions"):
+        assert key in data
+
+
+def test_get_cache_stats_forbidden(test_client, auth_headers):
+    """キャッシュ統計情報取得失敗（管理者以外）"""
+    with patch.object(settings, "admin_user_ids", "user_admin"):
+        response = test_client.get("/api/admin/cache/stats", headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_403_FORBIDDEN
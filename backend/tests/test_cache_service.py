@@ -1,7 +1,9 @@
 """Cache Serviceのテスト"""
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 import json
+import time
 from unittest.mock import patch
 
 from app.services.cache_service import (
@@ -10,6 +12,7 @@ from app.services.cache_service import (
     get_cached_card_preview,
     set_cached_card_preview,
     invalidate_card_preview_cache,
+    invalidate_dataset_preview_cache,
     get_cache_backend,
 )
 
@@ -66,6 +69,44 @@ async def test_in_memory_cache_delete(in_memory_cache):
     assert value is None
 
 
+@pytest.mark.asyncio
+async def test_in_memory_cache_lru_eviction():
+    """合計サイズが上限を超えると最も古く使われたエントリから削除される"""
+    value = "x" * 1000
+    cache = InMemoryCacheBackend(max_bytes=3000)
+    await cache.set("key1", value, ttl_seconds=60)
+    await cache.set("key2", value, ttl_seconds=60)
+    await cache.get("key1")
+    await cache.set("key3", value, ttl_seconds=60)
+    
+    assert await cache.get("key1") == value
+    assert await cache.get("key2") is None
+    assert await cache.get("key3") == value
+    
+    stats = await cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= 3000
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_sweep_expired(in_memory_cache):
+    """期限切れのエントリは参照されなくても削除される"""
+    await in_memory_cache.set("key1", "value1", ttl_seconds=60, groups=["group1"])
+    await in_memory_cache.set("key2", "value2", ttl_seconds=60, groups=["group1"])
+    
+    with patch("app.services.cache_service.time.monotonic", return_value=time.monotonic() + 61):
+        assert in_memory_cache.sweep_expired() == 2
+    
+    stats = await in_memory_cache.stats()
+    assert stats["entries"] == 0
+    assert stats["bytes"] == 0
+    assert stats["expirations"] == 2
+    assert in_memory_cache._groups == {}
+
+
 def test_generate_cache_key():
     """キャッシュキー生成テスト"""
     card_id = "card_test123"
@@ -170,3 +211,372 @@ async def test_invalidate_card_preview_cache(in_memory_cache):
         # キャッシュから取得できないことを確認
         cached = await get_cached_card_preview(card_id, filters, params)
         assert cached is None
+
+
+@pytest.mark.asyncio
+async def test_in_memory_cache_delete_group(in_memory_cache):
+    """グループに登録したキーのみがまとめて削除される"""
+    await in_memory_cache.set("key1", "value1", ttl_seconds=60, groups=["group1"])
+    await in_memory_cache.set("key2", "value2", ttl_seconds=60, groups=["group1", "group2"])
+    await in_memory_cache.set("key3", "value3", ttl_seconds=60, groups=["group2"])
+    
+    await in_memory_cache.delete_group("group1")
+    
+    assert await in_memory_cache.get("key1") is None
+    assert await in_memory_cache.get("key2") is None
+    assert await in_memory_cache.get("key3") == "value3"
+
+
+@pytest.mark.asyncio
+async def test_cached_card_preview_version(in_memory_cache):
+    """カードやデータセットのバージョンが変わると以前のキャッシュは参照されない"""
+    card_id = "card_test123"
+    preview_data = {"html": "<div>Test</div>", "used_columns": [], "filter_applicable": []}
+    
+    assert generate_cache_key(card_id, {}, {}, "v1") != generate_cache_key(card_id, {}, {}, "v2")
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=in_memory_cache):
+        await set_cached_card_preview(card_id, {}, {}, preview_data, ttl_seconds=60, version="v1")
+        
+        assert await get_cached_card_preview(card_id, {}, {}, version="v1") is not None
+        assert await get_cached_card_preview(card_id, {}, {}, version="v2") is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_dataset_preview_cache(in_memory_cache):
+    """データセットを参照するカードのキャッシュのみを無効化する"""
+    preview_data = {"html": "<div>Test</div>", "used_columns": [], "filter_applicable": []}
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=in_memory_cache):
+        await set_cached_card_preview("card_1", {}, {}, preview_data, ttl_seconds=60, dataset_id="dataset_1")
+        await set_cached_card_preview("card_2", {}, {}, preview_data, ttl_seconds=60, dataset_id="dataset_1")
+        await set_cached_card_preview("card_3", {}, {}, preview_data, ttl_seconds=60, dataset_id="dataset_2")
+        
+        await invalidate_dataset_preview_cache("dataset_1")
+        
+        assert await get_cached_card_preview("card_1", {}, {}) is None
+        assert await get_cached_card_preview("card_2", {}, {}) is None
+        assert await get_cached_card_preview("card_3", {}, {}) is not None
+
+
+class _FakeRedisPipeline:
+    """テスト用のRedisパイプライン（コマンドを記録し、execute時にまとめて実行する）"""
+    
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *args):
+        pass
+    
+    def __getattr__(self, name):
+        return lambda *args: self._commands.append((name, args))
+    
+    async def execute(self):
+        return [await getattr(self._redis, name)(*args) for name, args in self._commands]
+
+
+class _FakeRedis:
+    """テスト用のRedisクライアント（使用するコマンドのみ実装）"""
+    
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.subscribers = []
+    
+    def pipeline(self, transaction=True):
+        return _FakeRedisPipeline(self)
+    
+    async def get(self, key):
+        return self.values.get(key)
+    
+    async def setex(self, key, ttl_seconds, value):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+    
+    async def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member.encode())
+    
+    async def expire(self, key, ttl_seconds):
+        pass
+    
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+    
+    async def delete(self, *keys):
+        for key in keys:
+            key = key.decode() if isinstance(key, bytes) else key
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+    
+    async def publish(self, channel, message):
+        for pubsub in self.subscribers:
+            if channel in pubsub.channels:
+                pubsub.messages.put_nowait({"type": "message", "data": message.encode()})
+    
+    def pubsub(self):
+        return _FakePubSub(self)
+    
+    async def aclose(self):
+        pass
+
+
+class _FakePubSub:
+    """テスト用のRedis pub/sub"""
+    
+    def __init__(self, redis):
+        self._redis = redis
+        self.channels = set()
+        self.messages = asyncio.Queue()
+    
+    async def subscribe(self, channel):
+        self.channels.add(channel)
+        self._redis.subscribers.append(self)
+        self.messages.put_nowait({"type": "subscribe", "data": 1})
+    
+    async def listen(self):
+        while True:
+            yield await self.messages.get()
+    
+    async def aclose(self):
+        self._redis.subscribers.remove(self)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_card_preview_cache_redis():
+    """Redisバックエンドでもカードのキャッシュのみを無効化できる（キーの走査は行わない）"""
+    from app.services.cache_service import RedisCacheBackend
+    
+    redis_cache = RedisCacheBackend("redis://localhost:6379/0")
+    redis_cache._redis_client = _FakeRedis()
+    preview_data = {"html": "<div>Test</div>", "used_columns": [], "filter_applicable": []}
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=redis_cache):
+        await set_cached_card_preview("card_1", {"category": "A"}, {}, preview_data, ttl_seconds=60)
+        await set_cached_card_preview("card_1", {"category": "B"}, {}, preview_data, ttl_seconds=60)
+        await set_cached_card_preview("card_2", {"category": "A"}, {}, preview_data, ttl_seconds=60)
+        
+        await invalidate_card_preview_cache("card_1")
+        
+        assert await get_cached_card_preview("card_1", {"category": "A"}, {}) is None
+        assert await get_cached_card_preview("card_1", {"category": "B"}, {}) is None
+        assert await get_cached_card_preview("card_2", {"category": "A"}, {}) is not None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_serves_from_l1():
+    """L2から取得した値はL1に格納され、以降はL2を参照しない"""
+    from app.services.cache_service import RedisCacheBackend, TieredCacheBackend
+    
+    redis = _FakeRedis()
+    l2 = RedisCacheBackend("redis://localhost:6379/0")
+    l2._redis_client = redis
+    tiered = TieredCacheBackend(InMemoryCacheBackend(), l2, l1_ttl_seconds=60)
+    
+    await l2.set("key", b"value", ttl_seconds=60)
+    assert await tiered.get("key") == b"value"
+    assert l2.hits == 1
+    
+    assert await tiered.get("key") == b"value"
+    assert l2.hits == 1
+    assert tiered.l1.hits == 1
+    
+    await tiered.close()
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_invalidation_across_workers():
+    """あるワーカーで無効化したキーは、pub/sub経由で他のワーカーのL1からも削除される"""
+    from app.services.cache_service import RedisCacheBackend, TieredCacheBackend, card_cache_group
+    
+    redis = _FakeRedis()
+    workers = []
+    for _ in range(2):
+        l2 = RedisCacheBackend("redis://localhost:6379/0")
+        l2._redis_client = redis
+        workers.append(TieredCacheBackend(InMemoryCacheBackend(), l2, l1_ttl_seconds=60))
+    worker_a, worker_b = workers
+    
+    await worker_a.set("card_1_key", b"value", ttl_seconds=60, groups=[card_cache_group("card_1")])
+    await worker_a.set("card_2_key", b"value", ttl_seconds=60)
+    assert await worker_b.get("card_1_key") == b"value"
+    assert await worker_b.get("card_2_key") == b"value"
+    # 無効化通知の購読開始を待つ
+    for _ in range(5):
+        await asyncio.sleep(0)
+    
+    await worker_a.delete_group(card_cache_group("card_1"))
+    for _ in range(5):
+        await asyncio.sleep(0)
+    
+    assert await worker_b.l1.get("card_1_key") is None
+    assert await worker_b.get("card_1_key") is None
+    assert await worker_b.l1.get("card_2_key") == b"value"
+    
+    for worker in workers:
+        await worker.close()
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_card_preview_single_flight(in_memory_cache):
+    """同じキーの同時要求は1回の計算にまとめられる"""
+    from app.services.cache_service import get_or_compute_card_preview
+    
+    calls = 0
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"html": "<div>Test</div>"}
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=in_memory_cache):
+        results = await asyncio.gather(*[
+            get_or_compute_card_preview("card_1", {"category": "A"}, {}, compute, lock_ttl_seconds=10, ttl_seconds=60)
+            for _ in range(10)
+        ])
+        
+        assert calls == 1
+        assert all(result == {"html": "<div>Test</div>"} for result in results)
+        assert await get_cached_card_preview("card_1", {"category": "A"}, {}) is not None
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_card_preview_error(in_memory_cache):
+    """計算が失敗した場合は待機中の全員に例外が伝わり、結果はキャッシュされない"""
+    from app.services.cache_service import get_or_compute_card_preview
+    
+    calls = 0
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("execution failed")
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=in_memory_cache):
+        results = await asyncio.gather(
+            *[get_or_compute_card_preview("card_1", {}, {}, compute, lock_ttl_seconds=10) for _ in range(3)],
+            return_exceptions=True,
+        )
+        
+        assert calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        
+        # ロックは解放されているため、次の要求で再計算される
+        with pytest.raises(RuntimeError):
+            await get_or_compute_card_preview("card_1", {}, {}, compute, lock_ttl_seconds=10)
+        assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_card_preview_waits_for_other_worker(in_memory_cache):
+    """他のワーカーがロックを保持している間は計算せず、キャッシュに入った結果を使う"""
+    from app.services.cache_service import get_or_compute_card_preview
+    
+    async def compute():
+        raise AssertionError("should not compute")
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=in_memory_cache):
+        lock_key = f"lock:{generate_cache_key('card_1', {}, {})}"
+        token = await in_memory_cache.acquire_lock(lock_key, ttl_seconds=10)
+        task = asyncio.create_task(get_or_compute_card_preview("card_1", {}, {}, compute, lock_ttl_seconds=10))
+        await asyncio.sleep(0.15)
+        assert not task.done()
+        
+        await set_cached_card_preview("card_1", {}, {}, {"html": "<div>Other</div>"}, ttl_seconds=60)
+        await in_memory_cache.release_lock(lock_key, token)
+        
+        assert await asyncio.wait_for(task, timeout=1) == {"html": "<div>Other</div>"}
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_card_preview_stale_while_revalidate(in_memory_cache):
+    """ソフトTTLを過ぎたプレビューはそのまま返し、バックグラウンドで更新する"""
+    from app.services.cache_service import get_or_compute_card_preview
+    
+    calls = 0
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return {"html": f"<div>{calls}</div>"}
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=in_memory_cache):
+        await set_cached_card_preview("card_1", {}, {}, {"html": "<div>stale</div>"}, ttl_seconds=0, stale_ttl_seconds=60)
+        
+        # ソフトTTL経過後は通常の取得では参照されない
+        assert await get_cached_card_preview("card_1", {}, {}) is None
+        assert await get_cached_card_preview("card_1", {}, {}, allow_stale=True) == {"html": "<div>stale</div>"}
+        
+        results = await asyncio.gather(*[
+            get_or_compute_card_preview("card_1", {}, {}, compute, lock_ttl_seconds=10, ttl_seconds=60, stale_ttl_seconds=60)
+            for _ in range(3)
+        ])
+        assert results == [{"html": "<div>stale</div>"}] * 3
+        
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert calls == 1
+        assert await get_cached_card_preview("card_1", {}, {}) == {"html": "<div>1</div>"}
+
+
+def test_encode_cache_value():
+    """閾値以上の値は圧縮し、形式に関わらず元の文字列に戻せる"""
+    from app.services.cache_service import encode_cache_value, decode_cache_value
+    
+    small = '{"html": "<div>Test</div>"}'
+    large = json.dumps({"html": "<div>" + "plotly " * 2000 + "</div>"})
+    
+    assert decode_cache_value(encode_cache_value(small)) == small
+    assert len(encode_cache_value(small)) == len(small) + 1
+    
+    encoded = encode_cache_value(large)
+    assert len(encoded) < len(large) / 10
+    assert decode_cache_value(encoded) == large
+    
+    with patch('app.services.cache_service.settings.cache_compression', "gzip"):
+        encoded = encode_cache_value(large)
+        assert encoded[:1] == b"\x01"
+        assert decode_cache_value(encoded) == large
+    
+    with patch('app.services.cache_service.settings.cache_compression', "none"):
+        assert decode_cache_value(encode_cache_value(large)) == large
+    
+    # ヘッダーのない値（圧縮導入前に保存された値）
+    assert decode_cache_value(small.encode()) == small
+
+
+@pytest.mark.asyncio
+async def test_cached_card_preview_zstd_unavailable(in_memory_cache):
+    """zstandardがない場合、zstdで圧縮された値はミスとして扱い、削除しない"""
+    key = generate_cache_key("card_1", {}, {})
+    await in_memory_cache.set(key, b"\x02zstd-compressed", ttl_seconds=60)
+    
+    def missing_zstandard():
+        raise ImportError("No module named 'zstandard'")
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=in_memory_cache), \
+         patch('app.services.cache_service._zstd_decompressor', missing_zstandard):
+        assert await get_cached_card_preview("card_1", {}, {}) is None
+    
+    assert await in_memory_cache.get(key) == b"\x02zstd-compressed"
+
+
+@pytest.mark.asyncio
+async def test_cached_card_preview_compressed_redis():
+    """Redisには圧縮した値が格納される"""
+    from app.services.cache_service import RedisCacheBackend
+    
+    redis_cache = RedisCacheBackend("redis://localhost:6379/0")
+    redis_cache._redis_client = _FakeRedis()
+    preview_data = {"html": "<div>" + "plotly " * 2000 + "</div>", "used_columns": [], "filter_applicable": []}
+    
+    with patch('app.services.cache_service.get_cache_backend', return_value=redis_cache):
+        await set_cached_card_preview("card_1", {}, {}, preview_data, ttl_seconds=60)
+        
+        stored = redis_cache._redis_client.values[generate_cache_key("card_1", {}, {})]
+        assert len(stored) < len(json.dumps(preview_data)) / 10
+        assert await get_cached_card_preview("card_1", {}, {}) == preview_data
@@ -26,6 +26,38 @@ def test_list_cards_success(test_client, setup_dynamodb_tables, sample_card, aut
 
 
 
+def test_list_cards_cursor_pagination(test_client, setup_dynamodb_tables, sample_card, collect_cursor_pages):
+    """カーソルで全ページを重複なく取得できる"""
+    dynamodb = setup_dynamodb_tables
+    table = dynamodb.Table(get_table_name("Cards"))
+    for i in range(5):
+        table.put_item(Item={**sample_card, "cardId": f"card_{i}", "createdAt": sample_card["createdAt"] + i})
+    
+    card_ids = collect_cursor_pages("/api/cards", "card_id")
+    
+    assert sorted(card_ids) == [f"card_{i}" for i in range(5)]
+
+
+
+
+@pytest.mark.asyncio
+async def test_list_card_ids_by_dataset(setup_dynamodb_tables, sample_card):
+    """Datasetを参照するCardのIDをインデックスから取得できる"""
+    from app.services.card_service import list_card_ids_by_dataset
+    
+    dynamodb = setup_dynamodb_tables
+    table = dynamodb.Table(get_table_name("Cards"))
+    table.put_item(Item={**sample_card, "cardId": "card_1"})
+    table.put_item(Item={**sample_card, "cardId": "card_2"})
+    table.put_item(Item={**sample_card, "cardId": "card_other", "datasetId": "dataset_other"})
+    
+    card_ids = await list_card_ids_by_dataset("dataset_test123")
+    
+    assert sorted(card_ids) == ["card_1", "card_2"]
+
+
+
+
 def test_create_card_success(test_client, setup_dynamodb_tables, sample_dataset, auth_headers):
     """Card作成成功"""
     # Datasetを作成（Card作成に必要）
@@ -177,3 +209,54 @@ def test_preview_card_not_implemented(test_client, setup_dynamodb_tables, sample
     
     # Executor未実装のため500エラー
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+
+
+@pytest.mark.asyncio
+async def test_render_cards_applies_timeout_per_result(monkeypatch):
+    """結果の待ち時間は1件ごとに適用され、途中で止まった場合は残りのCardをタイムアウトとして返す"""
+    import asyncio
+    from contextlib import asynccontextmanager
+    from types import SimpleNamespace
+    from unittest.mock import AsyncMock
+    from app.core.config import settings
+    from app.services import card_service
+    
+    cards = {
+        card_id: SimpleNamespace(card_id=card_id, code="result = 1", dataset_id="ds1", used_columns=[])
+        for card_id in ("card_1", "card_2")
+    }
+    
+    async def stream_lines():
+        yield '{"card_id": "card_1", "status": "success", "data": {"html": "<p>1</p>"}}'
+        await asyncio.sleep(60)
+    
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+        
+        def aiter_lines(self):
+            return stream_lines()
+    
+    class FakeClient:
+        @asynccontextmanager
+        async def stream(self, *args, **kwargs):
+            yield FakeResponse()
+    
+    cancel = AsyncMock()
+    monkeypatch.setattr(settings, "executor_timeout_card", -4.8)
+    monkeypatch.setattr(card_service, "get_cards", AsyncMock(return_value=cards))
+    monkeypatch.setattr(card_service, "get_datasets", AsyncMock(return_value={"ds1": SimpleNamespace(s3_path="datasets/ds1/data.parquet")}))
+    monkeypatch.setattr(card_service, "_preview_cache_version", lambda card, dataset: "v1")
+    monkeypatch.setattr(card_service, "get_cached_card_preview", AsyncMock(return_value=None))
+    monkeypatch.setattr(card_service, "set_cached_card_preview", AsyncMock())
+    monkeypatch.setattr(card_service, "get_executor_client", AsyncMock(return_value=FakeClient()))
+    monkeypatch.setattr(card_service, "cancel_execution", cancel)
+    
+    results = [result async for result in card_service.render_cards(["card_1", "card_2"], {})]
+    
+    assert results[0]["card_id"] == "card_1"
+    assert results[0]["status"] == "success"
+    assert results[1] == {"card_id": "card_2", "status": "error", "error": "Card execution timeout"}
+    cancel.assert_awaited_once()
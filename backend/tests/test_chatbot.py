@@ -169,6 +169,35 @@ async def test_generate_dataset_summary(mock_s3_client):
     assert summary["statistics"]["name"]["type"] == "categorical"
 
 
+@pytest.mark.asyncio
+async def test_generate_dataset_summary_partitioned(mock_s3):
+    """パーティション分割されたDatasetは配下のファイルを結合してサマリを生成する"""
+    import io
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from tests.conftest import AsyncClientWrapper
+    
+    base_path = "datasets/dataset_123/partitions/"
+    for key, values in [("2024-01-01", [1, 2]), ("2024-01-02", [3])]:
+        buffer = io.BytesIO()
+        pq.write_table(pa.table({"date": [key] * len(values), "value": values}), buffer)
+        mock_s3.put_object(Bucket="bi-datasets", Key=f"{base_path}date={key}/part-00000.parquet", Body=buffer.getvalue())
+    
+    mock_dataset = MagicMock()
+    mock_dataset.name = "Partitioned Dataset"
+    mock_dataset.row_count = 3
+    mock_dataset.column_count = 2
+    mock_dataset.s3_path = base_path
+    mock_dataset.schema = []
+    
+    with patch("app.services.chatbot_service.get_dataset", return_value=mock_dataset):
+        with patch("app.services.chatbot_service.get_s3_client", return_value=AsyncClientWrapper(mock_s3)):
+            summary = await generate_dataset_summary("dataset_123")
+    
+    assert [row["value"] for row in summary["sample_rows"]] == [1, 2, 3]
+    assert summary["statistics"]["value"]["type"] == "numeric"
+
+
 @pytest.mark.asyncio
 async def test_chat_success(mock_vertex_ai, mock_dynamodb_client):
     """チャット - 成功"""
@@ -26,6 +26,20 @@ def test_list_dashboards_success(test_client, setup_dynamodb_tables, sample_dash
 
 
 
+def test_list_dashboards_cursor_pagination(test_client, setup_dynamodb_tables, sample_dashboard, collect_cursor_pages):
+    """カーソルで全ページを重複なく取得できる"""
+    dynamodb = setup_dynamodb_tables
+    table = dynamodb.Table(get_table_name("Dashboards"))
+    for i in range(5):
+        table.put_item(Item={**sample_dashboard, "dashboardId": f"dashboard_{i}", "createdAt": sample_dashboard["createdAt"] + i})
+    
+    dashboard_ids = collect_cursor_pages("/api/dashboards", "dashboard_id")
+    
+    assert sorted(dashboard_ids) == [f"dashboard_{i}" for i in range(5)]
+
+
+
+
 def test_create_dashboard_success(test_client, setup_dynamodb_tables, auth_headers):
     """Dashboard作成成功"""
     response = test_client.post(
@@ -218,3 +232,55 @@ def test_get_referenced_datasets_success(test_client, setup_dynamodb_tables, sam
     data = response.json()
     assert "data" in data
     assert isinstance(data["data"], list)
+
+
+def test_render_dashboard_success(test_client, setup_dynamodb_tables, sample_dashboard, sample_card, sample_dataset, auth_headers):
+    """Dashboard一括描画成功（完了したCardから順にNDJSONで返り、結果はキャッシュされる）"""
+    import json
+    from unittest.mock import patch
+    import httpx
+    from app.services.cache_service import InMemoryCacheBackend
+    
+    dynamodb = setup_dynamodb_tables
+    dashboard = sample_dashboard.copy()
+    dashboard["layout"] = {"cards": [{"cardId": "card_test123"}, {"cardId": "card_missing"}]}
+    dynamodb.Table(get_table_name("Dashboards")).put_item(Item=dashboard)
+    dynamodb.Table(get_table_name("Cards")).put_item(Item=sample_card)
+    dynamodb.Table(get_table_name("Datasets")).put_item(Item=sample_dataset)
+    
+    executor_requests = []
+    
+    def executor_handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        executor_requests.append(body)
+        lines = [
+            json.dumps({"card_id": card["card_id"], "status": "success", "data": {"html": "<div>Test</div>"}})
+            for card in body["cards"]
+        ]
+        return httpx.Response(200, text="\n".join(lines) + "\n")
+    
+    async def executor_client():
+        return httpx.AsyncClient(transport=httpx.MockTransport(executor_handler), base_url="http://executor")
+    
+    cache = InMemoryCacheBackend()
+    headers = {**auth_headers, "X-CSRF-Token": "token"}
+    test_client.cookies.set("csrf_token", "token")
+    with patch("app.services.card_service.get_executor_client", executor_client), \
+            patch("app.services.cache_service.get_cache_backend", return_value=cache):
+        for _ in range(2):
+            response = test_client.post(
+                "/api/dashboards/dashboard_test123/render",
+                json={"filters": {"category": "A"}},
+                headers=headers,
+            )
+            assert response.status_code == status.HTTP_200_OK
+            results = {r["card_id"]: r for r in map(json.loads, response.text.splitlines())}
+            assert results["card_missing"]["status"] == "error"
+            assert results["card_test123"]["status"] == "success"
+            assert results["card_test123"]["data"]["html"] == "<div>Test</div>"
+    
+    # 2回目はキャッシュから返るため、Executorは1回だけ呼ばれる
+    assert len(executor_requests) == 1
+    assert executor_requests[0]["filters"] == {"category": "A"}
+    assert [card["card_id"] for card in executor_requests[0]["cards"]] == ["card_test123"]
+    assert executor_requests[0]["cards"][0]["dataset_path"] == sample_dataset["s3Path"]
@@ -43,6 +43,20 @@ def test_list_datasets_success(test_client, setup_dynamodb_tables, sample_datase
 
 
 
+def test_list_datasets_cursor_pagination(test_client, setup_dynamodb_tables, sample_dataset, collect_cursor_pages):
+    """カーソルで全ページを重複なく取得できる"""
+    dynamodb = setup_dynamodb_tables
+    table = dynamodb.Table(get_table_name("Datasets"))
+    for i in range(5):
+        table.put_item(Item={**sample_dataset, "datasetId": f"dataset_{i}", "createdAt": sample_dataset["createdAt"] + i})
+    
+    dataset_ids = collect_cursor_pages("/api/datasets", "dataset_id")
+    
+    assert sorted(dataset_ids) == [f"dataset_{i}" for i in range(5)]
+
+
+
+
 def test_create_dataset_from_csv_success(test_client, setup_dynamodb_tables, mock_s3, sample_csv_content, auth_headers):
     """CSVからDataset作成成功"""
     response = test_client.post(
@@ -259,3 +273,205 @@ def test_get_dataset_preview_success(test_client, setup_dynamodb_tables, mock_s3
     assert "data" in data
     assert "columns" in data["data"]
     assert "rows" in data["data"]
+
+
+
+
+@pytest.mark.asyncio
+async def test_create_dataset_from_local_csv_streams_row_groups(setup_dynamodb_tables, mock_s3):
+    """大きなCSVはブロック単位で読み込まれ、複数の行グループとして書き出される"""
+    from unittest.mock import patch
+    from app.services.dataset_service import create_dataset_from_local_csv
+    
+    row_count = 60000
+    df = pd.DataFrame({
+        "category": ["A", "B", "C"] * (row_count // 3),
+        "date": ["2024-01-01"] * row_count,
+        "value": range(row_count),
+    })
+    df.loc[10, "category"] = None
+    csv_content = df.to_csv(index=False).encode("utf-8")
+    
+    with patch("app.services.dataset_service.settings.dataset_import_block_size_mb", 1):
+        dataset = await create_dataset_from_local_csv(
+            user_id="user_test123",
+            name="Large Dataset",
+            csv_file=io.BytesIO(csv_content),
+        )
+    
+    assert dataset.row_count == row_count
+    assert dataset.column_count == 3
+    schema = {col.name: col for col in dataset.schema}
+    assert schema["value"].dtype == "int64"
+    assert schema["date"].dtype == "object"
+    assert schema["category"].nullable is True
+    assert schema["value"].nullable is False
+    
+    response = mock_s3.get_object(Bucket=get_bucket_name("datasets"), Key=dataset.s3_path)
+    parquet_file = pq.ParquetFile(io.BytesIO(response["Body"].read()))
+    assert parquet_file.metadata.num_rows == row_count
+    assert parquet_file.metadata.num_row_groups > 1
+
+
+@pytest.mark.asyncio
+async def test_create_dataset_from_local_csv_widens_types_after_first_block(setup_dynamodb_tables, mock_s3):
+    """先頭ブロック以降に推論した型へ変換できない値があれば、列の型を広げて取り込む"""
+    from unittest.mock import patch
+    from app.db.s3 import S3MultipartWriter
+    from app.services.dataset_service import create_dataset_from_local_csv
+    
+    # 1MBのブロックが3つになる大きさ（先頭ブロック以降に型の合わない値を置く）
+    row_count = 300000
+    df = pd.DataFrame({
+        "value": [str(i) for i in range(row_count)],
+        "code": [str(i % 100) for i in range(row_count)],
+    })
+    df.loc[row_count // 2, "value"] = "1.5"
+    df.loc[row_count - 1, "code"] = "unknown"
+    csv_content = df.to_csv(index=False).encode("utf-8")
+    
+    # 型を広げる列が複数あっても、S3への書き込みは1回だけ行う
+    writers = []
+    
+    def multipart_writer(*args, **kwargs):
+        writers.append(args)
+        return S3MultipartWriter(*args, **kwargs)
+    
+    with patch("app.services.dataset_service.settings.dataset_import_block_size_mb", 1), \
+         patch("app.services.dataset_service.S3MultipartWriter", side_effect=multipart_writer):
+        dataset = await create_dataset_from_local_csv(
+            user_id="user_test123",
+            name="Mixed Types",
+            csv_file=io.BytesIO(csv_content),
+        )
+    
+    assert len(writers) == 1
+    assert dataset.row_count == row_count
+    schema = {col.name: col for col in dataset.schema}
+    assert schema["value"].dtype == "float64"
+    assert schema["code"].dtype == "object"
+    
+    response = mock_s3.get_object(Bucket=get_bucket_name("datasets"), Key=dataset.s3_path)
+    table = pq.read_table(io.BytesIO(response["Body"].read()))
+    assert table.column("value")[row_count // 2].as_py() == 1.5
+    assert table.column("value")[-1].as_py() == row_count - 1
+    assert table.column("code")[-1].as_py() == "unknown"
+    assert table.column("code")[1].as_py() == "1"
+
+
+@pytest.mark.asyncio
+async def test_create_dataset_from_local_csv_keeps_date_text(setup_dynamodb_tables, mock_s3):
+    """日付・時刻の列は元の表記のまま文字列として取り込む"""
+    from app.services.dataset_service import create_dataset_from_local_csv
+    
+    dataset = await create_dataset_from_local_csv(
+        user_id="user_test123",
+        name="Dates",
+        csv_file=io.BytesIO(b"date,value\n2024-01-01T12:00,1\n2024-01-02,2\n"),
+    )
+    
+    assert {col.name: col.dtype for col in dataset.schema}["date"] == "object"
+    response = mock_s3.get_object(Bucket=get_bucket_name("datasets"), Key=dataset.s3_path)
+    table = pq.read_table(io.BytesIO(response["Body"].read()))
+    assert table.column("date").to_pylist() == ["2024-01-01T12:00", "2024-01-02"]
+
+
+@pytest.mark.asyncio
+async def test_create_dataset_from_local_csv_without_header(setup_dynamodb_tables, mock_s3):
+    """ヘッダーなしCSVは列番号を列名として取り込む"""
+    from app.services.dataset_service import create_dataset_from_local_csv
+    
+    dataset = await create_dataset_from_local_csv(
+        user_id="user_test123",
+        name="No Header",
+        csv_file=io.BytesIO(b"a,1\nb,2\n"),
+        has_header=False,
+    )
+    
+    assert [col.name for col in dataset.schema] == ["0", "1"]
+    assert dataset.row_count == 2
+
+
+@pytest.mark.asyncio
+async def test_create_dataset_from_local_csv_no_data(setup_dynamodb_tables, mock_s3):
+    """ヘッダーのみのCSVはエラーになる"""
+    from app.services.dataset_service import create_dataset_from_local_csv
+    
+    with pytest.raises(ValueError, match="CSV has no data"):
+        await create_dataset_from_local_csv(
+            user_id="user_test123",
+            name="Empty",
+            csv_file=io.BytesIO(b"invalid,csv,content\n"),
+        )
+    
+    # S3にオブジェクトを残さない
+    response = mock_s3.list_objects_v2(Bucket=get_bucket_name("datasets"), Prefix="datasets/")
+    assert response.get("KeyCount", 0) == 0
+
+
+@pytest.mark.asyncio
+async def test_create_dataset_from_local_csv_partitioned(setup_dynamodb_tables, mock_s3):
+    """パーティションカラム指定時は日付別のファイルとして保存される"""
+    from app.services.dataset_service import create_dataset_from_local_csv, get_dataset_preview
+    
+    csv_content = (
+        "date,category,value\n"
+        "2024-01-01,A,100\n"
+        "2024-01-01 12:00:00,B,150\n"
+        "2024-01-02,A,200\n"
+        ",B,300\n"
+    ).encode("utf-8")
+    
+    dataset = await create_dataset_from_local_csv(
+        user_id="user_test123",
+        name="Partitioned",
+        csv_file=io.BytesIO(csv_content),
+        partition_column="date",
+    )
+    
+    assert dataset.partition_column == "date"
+    assert dataset.s3_path == f"datasets/{dataset.dataset_id}/partitions/"
+    assert dataset.row_count == 4
+    
+    response = mock_s3.list_objects_v2(Bucket=get_bucket_name("datasets"), Prefix=dataset.s3_path)
+    keys = sorted(obj["Key"][len(dataset.s3_path):] for obj in response["Contents"])
+    assert keys == [
+        "date=2024-01-01/part-00000.parquet",
+        "date=2024-01-02/part-00000.parquet",
+        "date=__HIVE_DEFAULT_PARTITION__/part-00000.parquet",
+    ]
+    
+    body = mock_s3.get_object(Bucket=get_bucket_name("datasets"), Key=dataset.s3_path + keys[0])["Body"].read()
+    assert pq.read_table(io.BytesIO(body)).column("value").to_pylist() == [100, 150]
+    
+    preview = await get_dataset_preview(dataset.dataset_id, limit=10)
+    assert preview.total_rows == 4
+    assert preview.columns == ["date", "category", "value"]
+
+
+@pytest.mark.asyncio
+async def test_create_dataset_from_local_csv_partition_column_not_date(setup_dynamodb_tables, mock_s3):
+    """日付形式でない値を含むカラムではパーティション分割しない"""
+    from app.services.dataset_service import create_dataset_from_local_csv
+    
+    with pytest.raises(ValueError, match="Partition column must contain dates"):
+        await create_dataset_from_local_csv(
+            user_id="user_test123",
+            name="Partitioned",
+            csv_file=io.BytesIO(b"date,user_id\n2024-01-01,u1\n2024-01-02,u2\n"),
+            partition_column="user_id",
+        )
+
+
+@pytest.mark.asyncio
+async def test_create_dataset_from_local_csv_partition_column_not_found(setup_dynamodb_tables, mock_s3):
+    """存在しないパーティションカラムはエラーになる"""
+    from app.services.dataset_service import create_dataset_from_local_csv
+    
+    with pytest.raises(ValueError, match="Partition column not found"):
+        await create_dataset_from_local_csv(
+            user_id="user_test123",
+            name="Partitioned",
+            csv_file=io.BytesIO(b"a,b\n1,2\n"),
+            partition_column="date",
+        )
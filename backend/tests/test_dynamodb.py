@@ -18,3 +18,63 @@ def test_get_table_name():
     """テーブル名を正しく生成する"""
     table_name = get_table_name("Users")
     assert table_name == "bi_Users"
+
+
+
+
+@pytest.mark.asyncio
+async def test_batch_get_items_retries_unprocessed_keys_with_backoff(monkeypatch):
+    """処理されなかったキーは待ち時間を伸ばしながら再リクエストする"""
+    from app.db import dynamodb
+    
+    table_name = get_table_name("Cards")
+    responses = [
+        {"Responses": {table_name: []}, "UnprocessedKeys": {table_name: {"Keys": [{"cardId": {"S": "card_1"}}]}}},
+        {"Responses": {table_name: []}, "UnprocessedKeys": {table_name: {"Keys": [{"cardId": {"S": "card_1"}}]}}},
+        {"Responses": {table_name: [{"cardId": {"S": "card_1"}}]}},
+    ]
+    
+    class FakeClient:
+        async def batch_get_item(self, RequestItems):
+            return responses.pop(0)
+    
+    delays = []
+    
+    async def fake_sleep(delay):
+        delays.append(delay)
+    
+    monkeypatch.setattr(dynamodb.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(dynamodb.random, "uniform", lambda low, high: high)
+    
+    items = await dynamodb.batch_get_items(FakeClient(), table_name, "cardId", ["card_1"])
+    
+    assert list(items) == ["card_1"]
+    assert delays == [dynamodb.BATCH_GET_RETRY_BASE_DELAY, dynamodb.BATCH_GET_RETRY_BASE_DELAY * 2]
+
+
+
+
+@pytest.mark.asyncio
+async def test_batch_get_items_gives_up_after_max_retries(monkeypatch):
+    """再試行の上限を超えても処理されないキーが残る場合はエラー"""
+    from app.core.exceptions import InternalError
+    from app.db import dynamodb
+    
+    table_name = get_table_name("Cards")
+    
+    class FakeClient:
+        calls = 0
+        
+        async def batch_get_item(self, RequestItems):
+            self.calls += 1
+            return {"Responses": {}, "UnprocessedKeys": RequestItems}
+    
+    async def fake_sleep(delay):
+        pass
+    
+    monkeypatch.setattr(dynamodb.asyncio, "sleep", fake_sleep)
+    client = FakeClient()
+    
+    with pytest.raises(InternalError):
+        await dynamodb.batch_get_items(client, table_name, "cardId", ["card_1"])
+    assert client.calls == dynamodb.BATCH_GET_MAX_RETRIES + 1
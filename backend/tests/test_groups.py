@@ -26,6 +26,65 @@ def test_list_groups_success(test_client, setup_dynamodb_tables, sample_group, a
 
 
 
+def test_list_groups_cursor_pagination(test_client, setup_dynamodb_tables, sample_group, auth_headers):
+    """カーソルで全ページを重複なく取得できる"""
+    dynamodb = setup_dynamodb_tables
+    table = dynamodb.Table(get_table_name("Groups"))
+    for i in range(5):
+        table.put_item(Item={**sample_group, "groupId": f"group_{i}", "name": f"Group {i}"})
+    
+    group_ids = []
+    cursor = None
+    for _ in range(5):
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = test_client.get("/api/groups", params=params, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data["data"]) <= 2
+        group_ids.extend(g["group_id"] for g in data["data"])
+        cursor = data["pagination"]["next_cursor"]
+        assert data["pagination"]["has_next"] == (cursor is not None)
+        if cursor is None:
+            break
+    
+    assert sorted(group_ids) == [f"group_{i}" for i in range(5)]
+    
+    # 検索で除外されるアイテムがあっても、limit件まで続きを読み込む
+    response = test_client.get("/api/groups", params={"limit": 2, "q": "group 3"}, headers=auth_headers)
+    assert [g["group_id"] for g in response.json()["data"]] == ["group_3"]
+
+
+def test_list_groups_filtered_read_is_capped(test_client, setup_dynamodb_tables, sample_group, auth_headers, monkeypatch):
+    """検索で除外され続けても読み込み上限で打ち切り、続きのカーソルを返す"""
+    import app.db.dynamodb as dynamodb_module
+    monkeypatch.setattr(dynamodb_module, "FILTERED_READ_PAGE_SIZE", 2)
+    monkeypatch.setattr(dynamodb_module, "MAX_READ_ITEMS_PER_CALL", 2)
+    dynamodb = setup_dynamodb_tables
+    table = dynamodb.Table(get_table_name("Groups"))
+    for i in range(5):
+        table.put_item(Item={**sample_group, "groupId": f"group_{i}", "name": f"Group {i}"})
+    
+    response = test_client.get("/api/groups", params={"limit": 2, "q": "no match"}, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["data"] == []
+    assert data["pagination"]["has_next"] is True
+
+
+
+
+def test_list_groups_invalid_cursor(test_client, setup_dynamodb_tables, auth_headers):
+    """不正なカーソルは400"""
+    response = test_client.get("/api/groups", params={"cursor": "invalid"}, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+
+
 def test_create_group_success(test_client, setup_dynamodb_tables, auth_headers):
     """グループ作成成功"""
     response = test_client.post(
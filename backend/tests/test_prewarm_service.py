@@ -0,0 +1,123 @@
+"""Prewarm Serviceのテスト"""
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+
+from app.models.dashboard import Dashboard, FilterView
+from app.services.prewarm_service import get_prewarm_filters, prewarm_dashboard, prewarm_dataset_dashboards
+
+
+def _dashboard(default_filter_view_id=None) -> Dashboard:
+    return Dashboard(
+        dashboard_id="dashboard_1",
+        name="Dashboard",
+        owner_id="user_1",
+        layout={"cards": [{"cardId": "card_1"}, {"cardId": "card_2"}]},
+        filters=[],
+        default_filter_view_id=default_filter_view_id,
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+
+
+def _filter_view(filter_view_id, filter_state, is_shared=False, is_default=False) -> FilterView:
+    return FilterView(
+        filter_view_id=filter_view_id,
+        dashboard_id="dashboard_1",
+        name=filter_view_id,
+        owner_id="user_1",
+        filter_state=filter_state,
+        is_shared=is_shared,
+        is_default=is_default,
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_prewarm_filters():
+    """フィルタなし・デフォルト・共有のFilterViewが対象になる（個人用のFilterViewは対象外）"""
+    filter_views = [
+        _filter_view("fv_default", {"region": "East"}),
+        _filter_view("fv_shared", {"region": "West"}, is_shared=True),
+        _filter_view("fv_shared_dup", {"region": "West"}, is_shared=True),
+        _filter_view("fv_private", {"region": "North"}),
+    ]
+    
+    async def mock_list_filter_views(dashboard_id):
+        return filter_views
+    
+    with patch('app.services.prewarm_service.list_filter_views', mock_list_filter_views):
+        filters_list = await get_prewarm_filters(_dashboard(default_filter_view_id="fv_default"))
+    
+    assert filters_list == [{}, {"region": "East"}, {"region": "West"}]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_dashboard():
+    """フィルタ条件ごとにDashboardの全Cardをレンダリングする"""
+    rendered = []
+    
+    async def mock_list_filter_views(dashboard_id):
+        return [_filter_view("fv_shared", {"region": "West"}, is_shared=True)]
+    
+    async def mock_render_cards(card_ids, filters):
+        for card_id in card_ids:
+            rendered.append((card_id, filters))
+            if card_id == "card_2":
+                yield {"card_id": card_id, "status": "error", "error": "failed"}
+            else:
+                yield {"card_id": card_id, "status": "success", "data": {"html": ""}}
+    
+    with patch('app.services.prewarm_service.list_filter_views', mock_list_filter_views), \
+         patch('app.services.prewarm_service.render_cards', mock_render_cards):
+        counts = await prewarm_dashboard(_dashboard())
+    
+    assert counts == {"success": 2, "error": 2}
+    assert rendered == [
+        ("card_1", {}),
+        ("card_2", {}),
+        ("card_1", {"region": "West"}),
+        ("card_2", {"region": "West"}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_dataset_dashboards():
+    """Datasetを参照するCardのみを、そのCardを含むDashboardごとに事前生成する"""
+    other = _dashboard().model_copy(update={"dashboard_id": "dashboard_2", "layout": {"cards": [{"cardId": "card_3"}]}})
+    prewarmed = []
+    
+    async def mock_list_card_ids_by_dataset(dataset_id):
+        assert dataset_id == "dataset_1"
+        return ["card_2"]
+    
+    async def mock_iter_dashboards():
+        for dashboard in [_dashboard(), other]:
+            yield dashboard
+    
+    async def mock_prewarm_dashboard(dashboard, card_ids=None):
+        prewarmed.append((dashboard.dashboard_id, card_ids))
+        return {"success": len(card_ids), "error": 0}
+    
+    with patch('app.services.prewarm_service.list_card_ids_by_dataset', mock_list_card_ids_by_dataset), \
+         patch('app.services.prewarm_service.iter_dashboards', mock_iter_dashboards), \
+         patch('app.services.prewarm_service.prewarm_dashboard', mock_prewarm_dashboard):
+        count = await prewarm_dataset_dashboards("dataset_1")
+    
+    assert count == 1
+    assert prewarmed == [("dashboard_1", ["card_2"])]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_dataset_dashboards_without_cards():
+    """Datasetを参照するCardがなければDashboardを走査しない"""
+    async def mock_list_card_ids_by_dataset(dataset_id):
+        return []
+    
+    def fail_iter_dashboards():
+        raise AssertionError("dashboards should not be scanned")
+    
+    with patch('app.services.prewarm_service.list_card_ids_by_dataset', mock_list_card_ids_by_dataset), \
+         patch('app.services.prewarm_service.iter_dashboards', fail_iter_dashboards):
+        assert await prewarm_dataset_dashboards("dataset_1") == 0
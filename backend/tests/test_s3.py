@@ -1,7 +1,13 @@
 """S3接続層のテスト"""
+import asyncio
+import io
+import os
 import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-from app.db.s3 import get_s3_client, get_bucket_name
+from app.db.s3 import get_s3_client, get_bucket_name, list_object_keys, put_objects, S3MultipartWriter
+from tests.conftest import AsyncClientWrapper
 
 
 
@@ -24,3 +30,88 @@ def test_get_bucket_name_static():
     """Staticバケット名を取得できる"""
     bucket_name = get_bucket_name("static")
     assert bucket_name == "bi-static"
+
+
+
+@pytest.mark.asyncio
+async def test_s3_multipart_writer_uploads_parts(mock_s3):
+    """書き込みがパート単位でアップロードされ、1つのオブジェクトに結合される"""
+    part_size = 5 * 1024 * 1024
+    data = os.urandom(part_size * 2 + 100)
+    client = AsyncClientWrapper(mock_s3)
+    
+    async with S3MultipartWriter(client, "bi-datasets", "test/data.bin", part_size=part_size, max_concurrency=2) as sink:
+        def write_chunks():
+            for i in range(0, len(data), 1024 * 1024):
+                sink.write(data[i:i + 1024 * 1024])
+        await asyncio.to_thread(write_chunks)
+    
+    response = mock_s3.get_object(Bucket="bi-datasets", Key="test/data.bin")
+    assert response["Body"].read() == data
+    assert response["ETag"].strip('"').endswith("-3")
+
+
+
+@pytest.mark.asyncio
+async def test_s3_multipart_writer_parquet(mock_s3):
+    """ParquetWriterの出力先として使用できる"""
+    table = pa.table({"col1": ["a", "b", "c"], "col2": [1, 2, 3]})
+    client = AsyncClientWrapper(mock_s3)
+    
+    async with S3MultipartWriter(client, "bi-datasets", "test/data.parquet") as sink:
+        await asyncio.to_thread(pq.write_table, table, sink)
+    
+    response = mock_s3.get_object(Bucket="bi-datasets", Key="test/data.parquet")
+    assert pq.read_table(io.BytesIO(response["Body"].read())).equals(table)
+
+
+
+@pytest.mark.asyncio
+async def test_s3_multipart_writer_aborts_on_error(mock_s3):
+    """例外発生時はアップロードを中止し、オブジェクトを作成しない"""
+    client = AsyncClientWrapper(mock_s3)
+    
+    with pytest.raises(ValueError):
+        async with S3MultipartWriter(client, "bi-datasets", "test/failed.bin") as sink:
+            await asyncio.to_thread(sink.write, b"partial")
+            raise ValueError("conversion failed")
+    
+    assert mock_s3.list_multipart_uploads(Bucket="bi-datasets").get("Uploads", []) == []
+    assert mock_s3.list_objects_v2(Bucket="bi-datasets", Prefix="test/").get("KeyCount") == 0
+
+
+
+@pytest.mark.asyncio
+async def test_list_object_keys_follows_continuation(mock_s3):
+    """1回の一覧取得の上限（1000件）を超えるオブジェクトも全件取得できる"""
+    for i in range(1001):
+        mock_s3.put_object(Bucket="bi-datasets", Key=f"listing/part-{i:05d}.parquet", Body=b"")
+    mock_s3.put_object(Bucket="bi-datasets", Key="other/part-00000.parquet", Body=b"")
+    
+    keys = await list_object_keys(AsyncClientWrapper(mock_s3), "bi-datasets", "listing/")
+    
+    assert keys == [f"listing/part-{i:05d}.parquet" for i in range(1001)]
+
+
+
+@pytest.mark.asyncio
+async def test_put_objects_limits_concurrency():
+    """同時アップロード数はmax_concurrencyまでに抑えられる"""
+    class CountingClient:
+        def __init__(self):
+            self.running = 0
+            self.max_running = 0
+            self.keys = []
+        
+        async def put_object(self, Bucket, Key, Body):
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            await asyncio.sleep(0.01)
+            self.keys.append(Key)
+            self.running -= 1
+    
+    client = CountingClient()
+    await put_objects(client, "bi-datasets", [(f"key-{i}", b"") for i in range(10)], max_concurrency=3)
+    
+    assert sorted(client.keys) == sorted(f"key-{i}" for i in range(10))
+    assert client.max_running == 3
@@ -28,6 +28,20 @@ def test_list_transforms_success(test_client, setup_dynamodb_tables, sample_tran
 
 
 
+def test_list_transforms_cursor_pagination(test_client, setup_dynamodb_tables, sample_transform, collect_cursor_pages):
+    """カーソルで全ページを重複なく取得できる"""
+    dynamodb = setup_dynamodb_tables
+    table = dynamodb.Table(get_table_name("Transforms"))
+    for i in range(5):
+        table.put_item(Item={**sample_transform, "transformId": f"transform_{i}", "createdAt": sample_transform["createdAt"] + i})
+    
+    transform_ids = collect_cursor_pages("/api/transforms", "transform_id")
+    
+    assert sorted(transform_ids) == [f"transform_{i}" for i in range(5)]
+
+
+
+
 def test_create_transform_success(test_client, setup_dynamodb_tables, sample_dataset, auth_headers):
     """Transform作成成功"""
     # Datasetを作成（Transform作成に必要）
@@ -152,3 +166,23 @@ def test_list_executions_success(test_client, setup_dynamodb_tables, sample_tran
     data = response.json()
     assert "data" in data
     assert "pagination" in data
+
+
+
+
+def test_list_executions_cursor_pagination(test_client, setup_dynamodb_tables, sample_transform, collect_cursor_pages):
+    """実行履歴もカーソルで全ページを重複なく取得できる"""
+    dynamodb = setup_dynamodb_tables
+    dynamodb.Table(get_table_name("Transforms")).put_item(Item=sample_transform)
+    executions_table = dynamodb.Table(get_table_name("TransformExecutions"))
+    for i in range(5):
+        executions_table.put_item(Item={
+            "executionId": f"exec_{i}",
+            "transformId": "transform_test123",
+            "status": "completed",
+            "startedAt": sample_transform["createdAt"] + i,
+        })
+    
+    execution_ids = collect_cursor_pages("/api/transforms/transform_test123/executions", "execution_id")
+    
+    assert sorted(execution_ids) == [f"exec_{i}" for i in range(5)]
@@ -4,7 +4,7 @@ from fastapi import status
 import boto3
 
 from app.core.security import hash_password
-from app.db.dynamodb import get_table_name
+from app.db.dynamodb import encode_cursor, get_table_name
 
 
 
@@ -45,6 +45,31 @@ def test_list_users_with_query(test_client, setup_dynamodb_tables, sample_user,
 
 
 
+def test_list_users_cursor_pagination(test_client, setup_dynamodb_tables, sample_user, collect_cursor_pages):
+    """カーソルで全ページを重複なく取得できる"""
+    dynamodb = setup_dynamodb_tables
+    table = dynamodb.Table(get_table_name("Users"))
+    for i in range(5):
+        table.put_item(Item={**sample_user, "userId": f"user_{i}", "email": f"user{i}@example.com"})
+    
+    user_ids = collect_cursor_pages("/api/users", "user_id")
+    
+    assert sorted(user_ids) == [f"user_{i}" for i in range(5)]
+
+
+
+
+def test_list_users_cursor_with_foreign_keys(test_client, setup_dynamodb_tables, auth_headers):
+    """別テーブルのキーを持つカーソルは400"""
+    cursor = encode_cursor({"datasetId": {"S": "dataset_1"}})
+    
+    response = test_client.get("/api/users", params={"cursor": cursor}, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+
+
 def test_get_user_success(test_client, setup_dynamodb_tables, sample_user, auth_headers):
     """ユーザ詳細取得成功"""
     # ユーザを作成
@@ -26,6 +26,20 @@ class Settings(BaseSettings):
     max_concurrent_transforms: int = 5
     queue_size_cards: int = 50
     queue_size_transforms: int = 20
+    
+    # ワーカープロセス設定（ユーザーコードはワーカープロセスで実行する）
+    # Card用・Transform用のプールはそれぞれmax_concurrent_cards・max_concurrent_transformsと同数のワーカーを持つ
+    worker_shared_dir: str = "/dev/shm"  # データセット受け渡し用のArrow IPCファイルの保存先
+    worker_timeout_grace_seconds: int = 5  # 制限時間を超えて応答しないワーカーを強制終了するまでの猶予
+    worker_max_tasks: int = 100  # この回数実行したワーカーは入れ替える（0で無制限）
+    worker_max_rss_mb: int = 1024  # 実行中のピークRSSがこの値を超えたワーカーは入れ替える（0で無制限）
+    
+    # データセットキャッシュ設定
+    dataset_cache_max_mb: int = 1024  # デコード済みテーブルのメモリキャッシュ上限（0で無効）
+    dataset_disk_cache_dir: str | None = None  # Parquetファイルのディスクキャッシュの保存先（未設定で無効）
+    dataset_disk_cache_max_mb: int = 10240  # ディスクキャッシュの上限
+    filtered_cache_max_mb: int = 256  # フィルタ適用済みテーブルのキャッシュ上限（0で無効）
+    filtered_cache_ttl_seconds: int = 30  # フィルタ適用済みテーブルの保持期間
 
 
 settings = Settings()
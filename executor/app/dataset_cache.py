@@ -0,0 +1,246 @@
+"""デコード済みデータセットのプロセス内キャッシュ
+
+S3上のParquetファイルはパスごとに不変（再取り込み時は新しいパスに書き込まれる）なので、
+S3パスをキーとしてデコード済みのArrowテーブルをLRUで保持する。
+列の絞り込み（プロジェクション）で読み込んだ場合は、読み込んだ列のみを保持する。
+
+また、同じデータセット・同じフィルタ条件で実行される複数のCard（同じダッシュボード上のCard等）が
+フィルタ処理を共有できるよう、フィルタ適用済みのテーブルを短いTTLで保持する。
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+from app.config import settings
+
+
+class _Entry:
+    def __init__(self, table: pa.Table, file_columns: Sequence[str]):
+        self.table = table
+        self.file_columns = set(file_columns)  # ファイルに存在する全列
+        self.nbytes = table.nbytes
+
+
+class ArrowTableCache:
+    """合計バイト数で上限を設けたArrowテーブルのLRUキャッシュ"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str, columns: Optional[Sequence[str]] = None) -> Optional[pa.Table]:
+        """キャッシュ済みのテーブルを取得（指定列をすべて保持していない場合はNone）
+
+        columnsがNoneの場合は全列を保持しているエントリのみ該当とする。
+        ファイルに存在しない列名は無視する。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._covers(entry, columns):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.table
+
+    def cached_columns(self, key: str) -> Optional[Sequence[str]]:
+        """キャッシュ済みの列名（エントリがない場合はNone）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.table.column_names if entry is not None else None
+
+    def put(self, key: str, table: pa.Table, file_columns: Sequence[str]) -> bool:
+        """テーブルを格納（上限を超える大きさのテーブルは格納しない）
+
+        file_columnsにはファイルに存在する全列名を渡す。
+        """
+        entry = _Entry(table, file_columns)
+        if not self.enabled or entry.nbytes > self.max_bytes:
+            return False
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+            self._entries[key] = entry
+            self.current_bytes += entry.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        """キャッシュを空にする"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """キャッシュの統計情報"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    @staticmethod
+    def _covers(entry: _Entry, columns: Optional[Sequence[str]]) -> bool:
+        wanted = entry.file_columns if columns is None else entry.file_columns & set(columns)
+        return wanted <= set(entry.table.column_names)
+
+
+def normalize_filters(filters: Dict[str, Any]) -> str:
+    """フィルタ条件を正規化した文字列（キーの順序やリスト内の値の順序に依存しない）"""
+    def normalize(value: Any) -> Any:
+        if isinstance(value, list):
+            return sorted((normalize(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True, default=str))
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        return value
+    return json.dumps(normalize(filters), sort_keys=True, default=str)
+
+
+class _FilteredEntry:
+    def __init__(self, table: pa.Table, columns: Optional[Sequence[str]], expires_at: float):
+        self.table = table
+        self.columns = None if columns is None else set(columns)  # Noneは全列
+        self.expires_at = expires_at
+        self.nbytes = table.nbytes
+
+
+class FilteredTableCache:
+    """フィルタ適用済みテーブルのキャッシュ（S3パスと正規化したフィルタ条件をキーとする）
+
+    エントリはttl_seconds経過後に無効となる。合計バイト数が上限を超えた場合は最も古く使われたエントリから削除する。
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], _FilteredEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def get(
+        self,
+        s3_path: str,
+        filters: Dict[str, Any],
+        columns: Optional[Sequence[str]] = None,
+    ) -> Optional[pa.Table]:
+        """フィルタ適用済みのテーブルを取得（期限切れ、または指定列をすべて保持していない場合はNone）
+
+        columnsがNoneの場合は全列を保持しているエントリのみ該当とする。
+        """
+        key = (s3_path, normalize_filters(filters))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None or not self._covers(entry, columns):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if columns is None:
+                return entry.table
+            wanted = set(columns)
+            return entry.table.select([name for name in entry.table.column_names if name in wanted])
+
+    def put(
+        self,
+        s3_path: str,
+        filters: Dict[str, Any],
+        columns: Optional[Sequence[str]],
+        table: pa.Table,
+    ) -> bool:
+        """フィルタ適用済みのテーブルを格納（上限を超える大きさのテーブルは格納しない）
+
+        columnsには読み込み時に指定した列名（全列の場合はNone）を渡す。
+        """
+        entry = _FilteredEntry(table, columns, time.monotonic() + self.ttl_seconds)
+        if not self.enabled or entry.nbytes > self.max_bytes:
+            return False
+
+        key = (s3_path, normalize_filters(filters))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self.current_bytes += entry.nbytes
+            self._evict()
+        return True
+
+    def clear(self) -> None:
+        """キャッシュを空にする"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """キャッシュの統計情報"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.nbytes
+
+    def _evict(self) -> None:
+        """期限切れのエントリを削除し、上限を超えている間は最も古く使われたエントリを削除"""
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+            self._remove(key)
+            self.expirations += 1
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    @staticmethod
+    def _covers(entry: _FilteredEntry, columns: Optional[Sequence[str]]) -> bool:
+        if entry.columns is None:
+            return True
+        return columns is not None and set(columns) <= entry.columns
+
+
+dataset_cache = ArrowTableCache(settings.dataset_cache_max_mb * 1024 * 1024)
+filtered_table_cache = FilteredTableCache(
+    settings.filtered_cache_max_mb * 1024 * 1024,
+    settings.filtered_cache_ttl_seconds,
+)
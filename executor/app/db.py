@@ -1,5 +1,8 @@
 """データベース接続層（Executor用）"""
-from typing import Literal
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Iterable, Literal, List, Optional, Tuple
 import aioboto3
 from botocore.config import Config
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -21,6 +24,8 @@ class Settings(BaseSettings):
     s3_bucket_static: str = "bi-static"
     s3_access_key: str | None = None
     s3_secret_key: str | None = None
+    s3_multipart_part_size_mb: int = 8  # マルチパートアップロードのパートサイズ（最小5MB）
+    s3_multipart_max_concurrency: int = 4  # 同時にアップロードするパート数
 
 
 settings = Settings()
@@ -80,3 +85,170 @@ async def close_s3():
         await _s3_client_ctx.__aexit__(None, None, None)
         _s3_client_ctx = None
         _s3_client = None
+
+
+async def put_objects(
+    s3_client,
+    bucket: str,
+    objects: Iterable[Tuple[str, bytes]],
+    max_concurrency: Optional[int] = None,
+) -> None:
+    """複数のオブジェクトを並行してアップロード（同時アップロード数はmax_concurrencyまで）"""
+    slots = asyncio.Semaphore(max_concurrency or settings.s3_multipart_max_concurrency)
+    
+    async def put(key: str, body: bytes) -> None:
+        async with slots:
+            await s3_client.put_object(Bucket=bucket, Key=key, Body=body)
+    
+    await asyncio.gather(*(put(key, body) for key, body in objects))
+
+
+class S3MultipartWriter:
+    """S3マルチパートアップロードへの書き込みストリーム
+    
+    pyarrowのParquetWriterなどから同期的に書き込まれたバイト列をパート単位に区切り、
+    イベントループ上で並行してアップロードする。書き込みはワーカースレッド
+    （asyncio.to_thread等）から行う必要がある。同時アップロード数を超えると
+    書き込み側がブロックされるため、保持するバッファは
+    part_size * (max_concurrency + 1) 程度に抑えられる。
+    
+    使用例:
+        async with S3MultipartWriter(s3_client, bucket, key) as sink:
+            await asyncio.to_thread(pq.write_table, table, sink)
+    """
+    
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        key: str,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self._s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size or settings.s3_multipart_part_size_mb * 1024 * 1024
+        self.max_concurrency = max_concurrency or settings.s3_multipart_max_concurrency
+        self.closed = False
+        self._upload_id: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._buffer = bytearray()
+        self._position = 0
+        self._parts: List[Future] = []
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+    
+    async def __aenter__(self) -> "S3MultipartWriter":
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        response = await self._s3_client.create_multipart_upload(Bucket=self.bucket, Key=self.key)
+        self._upload_id = response["UploadId"]
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            await self.complete()
+        else:
+            await self.abort()
+    
+    def write(self, data) -> int:
+        """バイト列を書き込む（パートサイズに達した分はアップロードを開始）"""
+        if self.closed:
+            raise ValueError("I/O operation on closed writer")
+        if threading.get_ident() == self._loop_thread_id:
+            raise RuntimeError("S3MultipartWriter.write must be called from a worker thread")
+        self._raise_failed_part()
+        
+        data = memoryview(data).cast("B")
+        self._buffer.extend(data)
+        self._position += len(data)
+        
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            # 同時アップロード数の上限に達している場合は空きを待つ（バックプレッシャー）
+            self._slots.acquire()
+            self._submit_part(part)
+        
+        return len(data)
+    
+    def tell(self) -> int:
+        """書き込み済みバイト数"""
+        return self._position
+    
+    def flush(self) -> None:
+        """パート単位でアップロードするため何もしない"""
+    
+    def close(self) -> None:
+        """アップロードの完了はcomplete()で行うため何もしない"""
+    
+    async def complete(self) -> None:
+        """残りのバッファをアップロードしてマルチパートアップロードを完了する"""
+        if self.closed:
+            return
+        self.closed = True
+        
+        try:
+            # 最終パート（パートが1つもない場合は空でも送る）
+            if self._buffer or not self._parts:
+                await asyncio.to_thread(self._slots.acquire)
+                self._submit_part(bytes(self._buffer))
+                self._buffer.clear()
+            
+            parts = await asyncio.gather(*(asyncio.wrap_future(f) for f in self._parts))
+            await self._s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": list(parts)},
+            )
+        except BaseException:
+            await self._abort_upload()
+            raise
+    
+    async def abort(self) -> None:
+        """マルチパートアップロードを中止する"""
+        if self.closed:
+            return
+        self.closed = True
+        await self._abort_upload()
+    
+    async def _abort_upload(self) -> None:
+        # 実行中のパートの終了を待ってから中止する
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in self._parts), return_exceptions=True)
+        try:
+            await self._s3_client.abort_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+            )
+        except Exception:
+            pass  # 中止の失敗はライフサイクルルールで回収される
+    
+    def _submit_part(self, data: bytes) -> None:
+        part_number = len(self._parts) + 1
+        coro = self._upload_part(part_number, data)
+        if threading.get_ident() == self._loop_thread_id:
+            future = asyncio.ensure_future(coro)
+        else:
+            future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        self._parts.append(future)
+    
+    async def _upload_part(self, part_number: int, data: bytes) -> dict:
+        try:
+            response = await self._s3_client.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            self._slots.release()
+    
+    def _raise_failed_part(self) -> None:
+        for future in self._parts:
+            if future.done() and future.exception() is not None:
+                raise future.exception()
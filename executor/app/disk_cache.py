@@ -0,0 +1,176 @@
+"""S3上のParquetファイルのローカルディスクキャッシュ
+
+ファイルはS3オブジェクトの内容（ETagとサイズ）から算出したダイジェストをファイル名として保存する
+（コンテンツアドレス方式）。合計サイズが上限を超えた場合は最も古く使われたファイルから削除する。
+プロセス再起動後も既存のファイルを引き継ぐため、メモリキャッシュから追い出された場合や
+再起動直後でもS3から再ダウンロードせずに済む。
+読み込み中のファイルは参照カウントで固定され、上限を超えても削除されない。
+"""
+import asyncio
+import contextlib
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+
+# S3からダウンロードする際のチャンクサイズ
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+_CACHE_FILE_SUFFIX = ".parquet"
+
+
+class ParquetDiskCache:
+    """合計サイズで上限を設けたParquetファイルのLRUディスクキャッシュ"""
+
+    def __init__(self, directory: Optional[str], max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._files: "OrderedDict[str, int]" = OrderedDict()  # ダイジェスト -> ファイルサイズ
+        self._digests: Dict[str, str] = {}  # S3キー -> ダイジェスト
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._pins: Dict[str, int] = {}  # ダイジェスト -> 読み込み中の数
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory) and self.max_bytes > 0
+
+    @contextlib.asynccontextmanager
+    async def open(self, s3_client, bucket: str, key: str) -> AsyncIterator[str]:
+        """S3オブジェクトのローカルパスを取得し、ブロックを抜けるまで削除されないよう固定する"""
+        digest, path = await self._acquire(s3_client, bucket, key)
+        try:
+            yield path
+        finally:
+            self._pins[digest] -= 1
+            if not self._pins[digest]:
+                del self._pins[digest]
+                # 固定中のため削除できなかった分を削除する
+                self._evict()
+
+    async def _acquire(self, s3_client, bucket: str, key: str) -> Tuple[str, str]:
+        """ローカルパスを取得して固定する（キャッシュにない場合はダウンロードする）"""
+        await self._load()
+
+        digest = self._digests.get(key)
+        if digest is None:
+            head = await s3_client.head_object(Bucket=bucket, Key=key)
+            digest = hashlib.sha256(f"{head['ETag']}:{head['ContentLength']}".encode()).hexdigest()
+            self._digests[key] = digest
+
+        lock = self._locks.setdefault(digest, asyncio.Lock())
+        async with lock:
+            path = self._path(digest)
+            if digest in self._files and os.path.exists(path):
+                self._files.move_to_end(digest)
+                os.utime(path)
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.current_bytes -= self._files.pop(digest, 0)
+                size = await self._download(s3_client, bucket, key, path)
+                self._files[digest] = size
+                self.current_bytes += size
+            # 呼び出し元に返すまでの間に削除されないよう、ロック内で固定する
+            self._pins[digest] = self._pins.get(digest, 0) + 1
+            self._evict()
+            return digest, path
+
+    def stats(self) -> Dict[str, int]:
+        """キャッシュの統計情報"""
+        return {
+            "files": len(self._files),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest + _CACHE_FILE_SUFFIX)
+
+    async def _load(self) -> None:
+        """既存のキャッシュファイルを最終アクセス時刻の古い順に登録"""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            entries = await asyncio.to_thread(self._scan_directory)
+            for _, digest, size in sorted(entries):
+                self._files[digest] = size
+                self.current_bytes += size
+            self._loaded = True
+            self._evict()
+
+    def _scan_directory(self) -> List[Tuple[float, str, int]]:
+        """保存先のキャッシュファイル（最終アクセス時刻, ダイジェスト, サイズ）を列挙"""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    # 前回のプロセスでダウンロード途中だったファイル
+                    os.remove(path)
+                    continue
+                if not name.endswith(_CACHE_FILE_SUFFIX):
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-len(_CACHE_FILE_SUFFIX)], stat.st_size))
+        return entries
+
+    async def _download(self, s3_client, bucket: str, key: str, path: str) -> int:
+        """一時ファイルにダウンロードしてから配置する（途中で失敗したファイルを残さない）"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            size = 0
+            with os.fdopen(fd, "wb") as f:
+                response = await s3_client.get_object(Bucket=bucket, Key=key)
+                body = response["Body"]
+                while True:
+                    chunk = await body.read(DOWNLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    await asyncio.to_thread(f.write, chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, path)
+            return size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _evict(self) -> None:
+        """上限を超えている間、最も古く使われたファイルを削除（読み込み中・ダウンロード中のファイルを除く）"""
+        for digest in list(self._files):
+            if self.current_bytes <= self.max_bytes:
+                break
+            lock = self._locks.get(digest)
+            if digest in self._pins or (lock is not None and lock.locked()):
+                continue
+            self._locks.pop(digest, None)
+            size = self._files.pop(digest)
+            self.current_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+
+
+disk_cache = ParquetDiskCache(
+    settings.dataset_disk_cache_dir,
+    settings.dataset_disk_cache_max_mb * 1024 * 1024,
+)
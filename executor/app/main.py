@@ -1,13 +1,25 @@
 """Executor エントリポイント"""
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import asyncio
+import json
 import uuid
 
-from app.runner import execute_card as run_card, execute_transform as run_transform, ExecutionError
+from app.runner import (
+    execute_card as run_card,
+    execute_card_group as run_card_group,
+    execute_transform as run_transform,
+    ExecutionError,
+    ExecutionTimeout,
+)
 from app.queue import ExecutionQueue, QueueFullError
 from app.config import settings
 from app.db import close_s3
+from app.dataset_cache import dataset_cache, filtered_table_cache
+from app.disk_cache import disk_cache
+from app.worker_pool import card_worker_pool, transform_worker_pool
 
 app = FastAPI(
     title="BI Executor",
@@ -31,6 +43,8 @@ async def startup_event():
     """アプリケーション起動時にワーカーを開始"""
     card_queue.start()
     transform_queue.start()
+    card_worker_pool.start()
+    transform_worker_pool.start()
 
 
 @app.on_event("shutdown")
@@ -38,19 +52,46 @@ async def shutdown_event():
     """アプリケーション終了時にワーカーを停止し、接続を閉じる"""
     card_queue.stop()
     transform_queue.stop()
+    card_worker_pool.stop()
+    transform_worker_pool.stop()
     await close_s3()
 
 
+# 実行結果を待つ間、クライアントの切断を確認する間隔（秒）
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
 class CardExecuteRequest(BaseModel):
+    # 指定時はこのIDで実行をキャンセルできる（未指定時はExecutorで採番）
+    execution_id: Optional[str] = None
     code: str
     dataset_path: str
     filters: Dict[str, Any] = {}
     params: Dict[str, Any] = {}
+    # 指定時はこの列（とフィルタ対象の列）のみを読み込む
+    columns: Optional[List[str]] = None
+
+
+class BatchCardItem(BaseModel):
+    card_id: str
+    code: str
+    dataset_path: str
+    params: Dict[str, Any] = {}
+    columns: Optional[List[str]] = None
+
+
+class BatchCardExecuteRequest(BaseModel):
+    # 指定時はこのIDで全Cardの実行をキャンセルできる
+    execution_id: Optional[str] = None
+    cards: List[BatchCardItem]
+    filters: Dict[str, Any] = {}
 
 
 class TransformExecuteRequest(BaseModel):
+    execution_id: Optional[str] = None
     code: str
     input_dataset_paths: Dict[str, str]
+    partition_column: Optional[str] = None
 
 
 @app.get("/health")
@@ -59,8 +100,86 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/stats/dataset-cache")
+async def dataset_cache_stats():
+    """データセットキャッシュの統計情報"""
+    return {
+        "memory": dataset_cache.stats(),
+        "filtered": filtered_table_cache.stats(),
+        "disk": disk_cache.stats(),
+    }
+
+
+@app.get("/stats/queues")
+async def queue_stats():
+    """実行キューの状態（待機数・待ち時間・実行時間）"""
+    return {
+        "card": card_queue.stats(),
+        "transform": transform_queue.stats(),
+    }
+
+
+@app.get("/stats/workers")
+async def worker_stats():
+    """ワーカープロセスプールの状態"""
+    return {
+        "card": card_worker_pool.stats(),
+        "transform": transform_worker_pool.stats(),
+    }
+
+
+@app.post("/executions/{execution_id}/cancel")
+async def cancel_execution(execution_id: str):
+    """実行をキャンセル（待機中の場合は実行せず、実行中の場合はワーカーを停止する）"""
+    if (
+        card_queue.cancel(execution_id)
+        or transform_queue.cancel(execution_id)
+        or _cancel_batch(execution_id)
+    ):
+        return {"status": "cancelled", "execution_id": execution_id}
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Execution not found: {execution_id}",
+    )
+
+
+async def _submit_and_wait(
+    queue: ExecutionQueue,
+    http_request: Request,
+    execution_id: str,
+    execute,
+) -> Any:
+    """キューにタスクを追加して完了を待つ
+    
+    待機中にクライアントが切断した場合やキャンセルされた場合は、実行を中断して409を返す。
+    """
+    if execution_id in queue.tasks:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Execution already exists: {execution_id}",
+        )
+    
+    # キュー経由で同時実行数の上限内で1回だけ実行し、完了を待つ
+    future = await queue.submit(execution_id, execute)
+    try:
+        while not future.done():
+            await asyncio.wait({future}, timeout=DISCONNECT_POLL_INTERVAL)
+            if not future.done() and await http_request.is_disconnected():
+                future.cancel()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    
+    if future.cancelled():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Execution cancelled: {execution_id}",
+        )
+    return future.result()
+
+
 @app.post("/execute/card")
-async def execute_card_endpoint(request: CardExecuteRequest):
+async def execute_card_endpoint(request: CardExecuteRequest, http_request: Request):
     """Card実行"""
     try:
         # キューが満杯の場合は503を返す
@@ -70,7 +189,7 @@ async def execute_card_endpoint(request: CardExecuteRequest):
                 detail="Card execution queue is full. Please try again later."
             )
         
-        task_id = f"card_{uuid.uuid4().hex[:12]}"
+        execution_id = request.execution_id or f"card_{uuid.uuid4().hex[:12]}"
         
         async def execute():
             return await run_card(
@@ -78,14 +197,11 @@ async def execute_card_endpoint(request: CardExecuteRequest):
                 dataset_path=request.dataset_path,
                 filters=request.filters,
                 params=request.params,
+                columns=request.columns,
             )
         
-        await card_queue.submit(task_id, execute)
-        
-        # 実際の実装では、タスクの完了を待つ必要があるが、
-        # ここでは簡略化してキューに追加するだけ
-        result = await execute()
-        return {"status": "success", "data": result}
+        result = await _submit_and_wait(card_queue, http_request, execution_id, execute)
+        return {"status": "success", "execution_id": execution_id, "data": result}
     except QueueFullError:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -93,12 +209,133 @@ async def execute_card_endpoint(request: CardExecuteRequest):
         )
     except ExecutionError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
 
+# 一括実行ID -> データセットごとのタスクのFuture
+batch_executions: Dict[str, List[asyncio.Future]] = {}
+
+
+def _cancel_batch(execution_id: str) -> bool:
+    futures = batch_executions.get(execution_id)
+    if futures is None:
+        return False
+    for future in futures:
+        future.cancel()
+    return True
+
+
+def _batch_result_line(card_id: str, result: Any) -> str:
+    """一括実行の結果1件をNDJSONの1行に変換"""
+    if isinstance(result, dict):
+        line = {"card_id": card_id, "status": "success", "data": result}
+    elif isinstance(result, (ExecutionError, ExecutionTimeout)):
+        line = {"card_id": card_id, "status": "error", "detail": str(result)}
+    elif isinstance(result, asyncio.CancelledError):
+        line = {"card_id": card_id, "status": "error", "detail": "Execution cancelled"}
+    else:
+        line = {"card_id": card_id, "status": "error", "detail": f"Internal error: {result}"}
+    return json.dumps(line, ensure_ascii=False) + "\n"
+
+
+@app.post("/execute/cards")
+async def execute_cards_endpoint(request: BatchCardExecuteRequest):
+    """Card一括実行（ダッシュボード全体の描画用）
+    
+    Cardをデータセットごとにまとめ、各データセットの読み込みとフィルタの適用は1回だけ行う。
+    データセットごとに1つのキュータスクとして実行し、結果はCardが完了した順に
+    NDJSON（1行に {"card_id", "status", "data" または "detail"}）でストリーミングする。
+    """
+    execution_id = request.execution_id or f"batch_{uuid.uuid4().hex[:12]}"
+    if execution_id in batch_executions:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Execution already exists: {execution_id}",
+        )
+    
+    groups: Dict[str, List[BatchCardItem]] = {}
+    for card in request.cards:
+        groups.setdefault(card.dataset_path, []).append(card)
+    
+    results: asyncio.Queue = asyncio.Queue()
+    
+    def make_execute(dataset_path: str, cards: List[BatchCardItem]):
+        async def execute():
+            await run_card_group(
+                dataset_path,
+                [card.model_dump(include={"code", "params", "columns"}) for card in cards],
+                request.filters,
+                lambda index, result: results.put_nowait((cards[index].card_id, result)),
+            )
+        return execute
+    
+    # 全データセット分のタスクを追加できない場合は、追加済みのタスクも取り消して503を返す
+    futures: List[asyncio.Future] = []
+    try:
+        for index, (dataset_path, cards) in enumerate(groups.items()):
+            future = await card_queue.submit(f"{execution_id}/{index}", make_execute(dataset_path, cards))
+            futures.append(future)
+    except QueueFullError:
+        for future in futures:
+            future.cancel()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Card execution queue is full. Please try again later."
+        )
+    batch_executions[execution_id] = futures
+    
+    group_cards = {id(future): cards for future, cards in zip(futures, groups.values())}
+    
+    def on_group_done(future: asyncio.Future):
+        # 中断・失敗したデータセットのCardのうち、結果が出ていないものはエラーとして返す
+        if future.cancelled():
+            error = asyncio.CancelledError()
+        elif future.exception() is not None:
+            error = future.exception()
+        else:
+            error = None
+        results.put_nowait((None, (group_cards[id(future)], error)))
+    
+    for future in futures:
+        future.add_done_callback(on_group_done)
+    
+    async def stream():
+        finished_cards = set()
+        remaining_groups = len(futures)
+        try:
+            while remaining_groups:
+                card_id, result = await results.get()
+                if card_id is not None:
+                    finished_cards.add(card_id)
+                    yield _batch_result_line(card_id, result)
+                    continue
+                
+                remaining_groups -= 1
+                cards, error = result
+                if error is None:
+                    continue
+                for card in cards:
+                    if card.card_id not in finished_cards:
+                        finished_cards.add(card.card_id)
+                        yield _batch_result_line(card.card_id, error)
+        finally:
+            # クライアントが切断した場合は実行中・待機中のタスクを中断する
+            for future in futures:
+                future.cancel()
+            batch_executions.pop(execution_id, None)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Execution-Id": execution_id},
+    )
+
+
 @app.post("/execute/transform")
-async def execute_transform_endpoint(request: TransformExecuteRequest):
+async def execute_transform_endpoint(request: TransformExecuteRequest, http_request: Request):
     """Transform実行"""
     try:
         # キューが満杯の場合は503を返す
@@ -108,28 +345,28 @@ async def execute_transform_endpoint(request: TransformExecuteRequest):
                 detail="Transform execution queue is full. Please try again later."
             )
         
-        task_id = f"transform_{uuid.uuid4().hex[:12]}"
+        execution_id = request.execution_id or f"transform_{uuid.uuid4().hex[:12]}"
         
         async def execute():
             return await run_transform(
                 code=request.code,
                 input_dataset_paths=request.input_dataset_paths,
+                partition_column=request.partition_column,
             )
         
-        await transform_queue.submit(task_id, execute)
-        
-        # 実際の実装では、タスクの完了を待つ必要があるが、
-        # ここでは簡略化してキューに追加するだけ
-        result = await execute()
+        result = await _submit_and_wait(transform_queue, http_request, execution_id, execute)
         
         # Executor側でDataFrameをS3に保存済みなので、S3パスとメタデータを返す
         return {
             "status": "success",
+            "execution_id": execution_id,
             "data": {
                 "s3_path": result["s3_path"],
                 "row_count": result["row_count"],
                 "column_count": result["column_count"],
                 "columns": result["columns"],
+                "partition_column": result["partition_column"],
+                "resource_usage": result["resource_usage"],
             }
         }
     except QueueFullError:
@@ -139,5 +376,7 @@ async def execute_transform_endpoint(request: TransformExecuteRequest):
         )
     except ExecutionError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
@@ -0,0 +1,347 @@
+"""S3上のParquetファイルの部分読み込み
+
+列やフィルタを指定した読み込みでは、フッター（メタデータ）と必要な列チャンクのバイト範囲のみを
+Range GETで取得し、不要な列や条件に該当しない行グループはダウンロードもデコードもしない。
+"""
+import asyncio
+import functools
+import io
+import operator
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+# フッター取得時に末尾から読み込むバイト数（pyarrowの初回フッター読み込みと同じ大きさ）
+FOOTER_READ_SIZE = 64 * 1024
+
+# 隣接する列チャンクをまとめて取得する際に許容する隙間
+RANGE_COALESCE_GAP = 1024 * 1024
+
+
+class _SparseFile(io.RawIOBase):
+    """取得済みのバイト範囲のみを保持する読み込み専用ファイル"""
+
+    def __init__(self, size: int, ranges: Dict[int, bytes]):
+        self._size = size
+        self._ranges = sorted(ranges.items())
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        else:
+            self._position = self._size + offset
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self._size - self._position)
+        if length <= 0:
+            return 0
+        for start, data in self._ranges:
+            end = start + len(data)
+            if start <= self._position and self._position + length <= end:
+                offset = self._position - start
+                buffer[:length] = data[offset:offset + length]
+                self._position += length
+                return length
+        raise IOError(f"Byte range {self._position}-{self._position + length} was not fetched")
+
+
+def _parse_content_range(content_range: str) -> int:
+    """Content-Rangeヘッダ（bytes start-end/total）からオブジェクトサイズを取得"""
+    return int(content_range.rsplit("/", 1)[1])
+
+
+def _coalesce_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """近接するバイト範囲（開始, 終了）を結合してリクエスト数を減らす"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start - merged[-1][1] <= RANGE_COALESCE_GAP:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _value_kind(data_type: pa.DataType) -> str:
+    """比較可能な値の種類（数値・文字列・日付時刻）"""
+    if (
+        pa.types.is_integer(data_type)
+        or pa.types.is_floating(data_type)
+        or pa.types.is_decimal(data_type)
+        or pa.types.is_boolean(data_type)
+    ):
+        return "number"
+    if pa.types.is_string(data_type) or pa.types.is_large_string(data_type):
+        return "string"
+    if pa.types.is_temporal(data_type):
+        return "temporal"
+    return str(data_type)
+
+
+def _cast_value(value: Any, field_type: pa.DataType) -> pa.Scalar:
+    """フィルタ値を列の型に変換（変換できない場合はpa.ArrowInvalid等を送出）
+
+    pandasでの比較と同様に、種類の異なる値は変換しない（"5"は整数列の5に一致しない）。
+    ただし日付時刻の列に対する文字列は日付時刻として解釈する。
+    数値同士は値が変わらない場合のみ列の型に変換し、それ以外（整数列に対する1.5等）は
+    float64のまま比較する（切り捨て・丸めで一致する行が変わらないようにする）。
+    """
+    if pa.types.is_dictionary(field_type):
+        field_type = field_type.value_type
+    scalar = pa.scalar(value)
+    value_kind = _value_kind(scalar.type)
+    field_kind = _value_kind(field_type)
+    if value_kind != field_kind and not (value_kind == "string" and field_kind == "temporal"):
+        raise pa.ArrowInvalid(f"Cannot compare {scalar.type} value with {field_type} column")
+    if value_kind == "number" and scalar.type != field_type:
+        try:
+            cast = scalar.cast(field_type)
+            if cast.cast(scalar.type).as_py() == scalar.as_py():
+                return cast
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+        return scalar.cast(pa.float64())
+    return scalar.cast(field_type)
+
+
+def filters_to_expression(filters: Dict[str, Any], schema: pa.Schema) -> Optional[ds.Expression]:
+    """ダッシュボードのフィルタ条件をpyarrowのフィルタ式に変換
+
+    - リスト: いずれかに一致（isin）
+    - {"start", "end"}: 範囲（両端を含む）
+    - それ以外: 一致
+    スキーマに存在しない列のフィルタや、startとendが揃っていない範囲指定は無視する。
+    種類の異なる値など列の型と比較できない値は、一致・範囲のいずれでもどの行にも一致しない。
+    """
+    expressions = []
+    for name, value in filters.items():
+        if name not in schema.names:
+            continue
+
+        field = pc.field(name)
+        field_type = schema.field(name).type
+        if isinstance(value, list):
+            # 列の型に変換できない値はどの行にも一致しない
+            values = []
+            for v in value:
+                try:
+                    values.append(_cast_value(v, field_type).as_py())
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                    continue
+            expressions.append(field.isin(values))
+        elif isinstance(value, dict):
+            if "start" in value and "end" in value:
+                try:
+                    start = _cast_value(value["start"], field_type)
+                    end = _cast_value(value["end"], field_type)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                    expressions.append(pc.scalar(False))
+                    continue
+                expressions.append((field >= start) & (field <= end))
+        else:
+            try:
+                expressions.append(field == _cast_value(value, field_type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                expressions.append(pc.scalar(False))
+
+    if not expressions:
+        return None
+    return functools.reduce(operator.and_, expressions)
+
+
+def column_chunk_ranges(
+    metadata: pq.FileMetaData,
+    columns: Sequence[str],
+    row_groups: Optional[Sequence[int]] = None,
+) -> List[Tuple[int, int]]:
+    """指定列（・指定行グループ）の列チャンクが格納されているバイト範囲（開始, 終了）を算出"""
+    wanted = set(columns)
+    if row_groups is None:
+        row_groups = range(metadata.num_row_groups)
+    ranges = []
+    for rg_index in row_groups:
+        row_group = metadata.row_group(rg_index)
+        for col_index in range(row_group.num_columns):
+            chunk = row_group.column(col_index)
+            if chunk.path_in_schema.split(".")[0] not in wanted:
+                continue
+            start = chunk.data_page_offset
+            if chunk.has_dictionary_page and chunk.dictionary_page_offset:
+                start = min(start, chunk.dictionary_page_offset)
+            ranges.append((start, start + chunk.total_compressed_size))
+    return ranges
+
+
+async def _get_range(s3_client, bucket: str, key: str, byte_range: str) -> Tuple[bytes, str]:
+    response = await s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={byte_range}")
+    body = await response["Body"].read()
+    return body, response.get("ContentRange", "")
+
+
+def _matching_row_groups(parquet_source: _SparseFile, expression: ds.Expression) -> List[int]:
+    """行グループの統計情報（min/max等）からフィルタ式に該当し得る行グループを選択"""
+    fragment = ds.ParquetFileFormat().make_fragment(pa.PythonFile(parquet_source, mode="r"))
+    return [
+        row_group.id
+        for row_group_fragment in fragment.split_by_row_group(expression)
+        for row_group in row_group_fragment.row_groups
+    ]
+
+
+def _projection(schema: pa.Schema, columns: Optional[Sequence[str]]) -> List[str]:
+    """スキーマに存在する列のみをスキーマの順序で返す（Noneの場合は全列）"""
+    if columns is None:
+        return schema.names
+    wanted = set(columns)
+    return [name for name in schema.names if name in wanted]
+
+
+def filter_table(
+    table: pa.Table,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> pa.Table:
+    """読み込み済みのテーブルにフィルタと列の絞り込みを適用"""
+    expression = filters_to_expression(filters or {}, table.schema)
+    if expression is not None:
+        table = table.filter(expression)
+    return table.select(_projection(table.schema, columns))
+
+
+def uncompressed_size(metadata: pq.FileMetaData, columns: Optional[Sequence[str]] = None) -> int:
+    """指定列をデコードした場合のおおよそのサイズ（バイト）"""
+    wanted = set(_projection(metadata.schema.to_arrow_schema(), columns))
+    total = 0
+    for rg_index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg_index)
+        for col_index in range(row_group.num_columns):
+            chunk = row_group.column(col_index)
+            if chunk.path_in_schema.split(".")[0] in wanted:
+                total += chunk.total_uncompressed_size
+    return total
+
+
+class ParquetObject:
+    """フッター（メタデータ）を取得済みのS3上のParquetファイル"""
+
+    def __init__(self, s3_client, bucket: str, key: str, size: int, footer: bytes):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self._footer_ranges = {size - len(footer): footer}
+        self.metadata = pq.ParquetFile(_SparseFile(size, self._footer_ranges)).metadata
+        self.schema = self.metadata.schema.to_arrow_schema()
+
+    @classmethod
+    async def open(cls, s3_client, bucket: str, key: str) -> "ParquetObject":
+        """フッターをsuffix Range GETで取得する"""
+        tail, content_range = await _get_range(s3_client, bucket, key, f"-{FOOTER_READ_SIZE}")
+        size = _parse_content_range(content_range) if content_range else len(tail)
+        metadata_length = struct.unpack("<I", tail[-8:-4])[0]
+        if metadata_length + 8 > len(tail):
+            tail, _ = await _get_range(s3_client, bucket, key, f"-{metadata_length + 8}")
+        return cls(s3_client, bucket, key, size, tail)
+
+    def uncompressed_size(self, columns: Optional[Sequence[str]] = None) -> int:
+        """指定列をデコードした場合のおおよそのサイズ（バイト）"""
+        return uncompressed_size(self.metadata, columns)
+
+    async def read(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> pa.Table:
+        """必要な列チャンクのみを取得して読み込む
+
+        columns指定時は該当列の列チャンクのみを取得する（ファイルに存在しない列名は無視する）。
+        filters指定時は統計情報で該当し得ない行グループを取得せず、読み込んだ行にもフィルタを適用する。
+        """
+        projection = _projection(self.schema, columns)
+        expression = filters_to_expression(filters or {}, self.schema)
+        if expression is None:
+            row_groups = list(range(self.metadata.num_row_groups))
+            read_columns = projection
+        else:
+            row_groups = _matching_row_groups(_SparseFile(self.size, self._footer_ranges), expression)
+            read_columns = [name for name in self.schema.names if name in set(projection) or name in filters]
+        if not row_groups:
+            return self.schema.empty_table().select(projection)
+
+        # 必要な列チャンクを並行して取得
+        ranges = dict(self._footer_ranges)
+        chunk_ranges = _coalesce_ranges(column_chunk_ranges(self.metadata, read_columns, row_groups))
+        bodies = await asyncio.gather(*(
+            _get_range(self.s3_client, self.bucket, self.key, f"{start}-{end - 1}")
+            for start, end in chunk_ranges
+        ))
+        for (start, _), (body, _) in zip(chunk_ranges, bodies):
+            ranges[start] = body
+
+        parquet_file = pq.ParquetFile(_SparseFile(self.size, ranges), metadata=self.metadata)
+        table = parquet_file.read_row_groups(row_groups, columns=read_columns)
+        if expression is not None:
+            table = table.filter(expression).select(projection)
+        return table
+
+
+class LocalParquetFile:
+    """ローカルディスク上のParquetファイル（メモリマップで読み込む）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.metadata = pq.read_metadata(path)
+        self.schema = self.metadata.schema.to_arrow_schema()
+
+    def uncompressed_size(self, columns: Optional[Sequence[str]] = None) -> int:
+        """指定列をデコードした場合のおおよそのサイズ（バイト）"""
+        return uncompressed_size(self.metadata, columns)
+
+    async def read(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> pa.Table:
+        """列とフィルタを指定して読み込む（該当し得ない行グループはデコードしない）"""
+        return await asyncio.to_thread(self._read, columns, filters)
+
+    def _read(self, columns: Optional[Sequence[str]], filters: Optional[Dict[str, Any]]) -> pa.Table:
+        projection = _projection(self.schema, columns)
+        expression = filters_to_expression(filters or {}, self.schema)
+        with pa.memory_map(self.path, "r") as source:
+            fragment = ds.ParquetFileFormat().make_fragment(source)
+            return fragment.to_table(schema=self.schema, columns=projection, filter=expression)
+
+
+async def read_parquet_columns(
+    s3_client,
+    bucket: str,
+    key: str,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> pa.Table:
+    """S3上のParquetファイルを読み込む（列・フィルタ指定時は必要な範囲のみ取得）"""
+    if columns is None and not filters:
+        response = await s3_client.get_object(Bucket=bucket, Key=key)
+        content = await response["Body"].read()
+        return pq.read_table(io.BytesIO(content))
+
+    parquet_object = await ParquetObject.open(s3_client, bucket, key)
+    return await parquet_object.read(columns, filters)
@@ -0,0 +1,138 @@
+"""パーティション分割（日付別Parquetレイアウト）
+
+パーティション分割されたDatasetは以下のレイアウトでS3に保存される。
+
+    datasets/{datasetId}/partitions/{column}={YYYY-MM-DD}/part-00000.parquet
+
+DatasetのS3パスは末尾が "/" のプレフィックス（datasets/{datasetId}/partitions/）となる。
+"""
+import datetime
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# NULL値を格納するパーティション名（Hive互換）
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# 1つのDatasetに作成できるパーティション数の上限（日付パーティションで約10年分）
+MAX_PARTITIONS = 3660
+
+_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}"
+_DATE_RE = re.compile(_DATE_PATTERN)
+
+
+def is_partitioned_path(s3_path: str) -> bool:
+    """S3パスがパーティション分割されたDatasetを指すかどうか"""
+    return s3_path.endswith("/")
+
+
+def partition_key(value: Any) -> Optional[str]:
+    """フィルタ値をパーティションキーに変換（日付形式でない値はNone）"""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, str) and _DATE_RE.match(value):
+        return value[:10]
+    return None
+
+
+def partition_keys(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """列の各値に対応するパーティションキー（YYYY-MM-DD）を算出
+
+    日付形式でない値が含まれる場合は、値ごとにパーティションが作られるのを防ぐためValueErrorとする。
+    """
+    if pa.types.is_temporal(column.type):
+        if pa.types.is_date(column.type):
+            column = pc.cast(column, pa.timestamp("s"))
+        keys = pc.strftime(column, format="%Y-%m-%d")
+    else:
+        keys = pc.cast(column, pa.string())
+        not_dates = pc.filter(keys, pc.invert(pc.match_substring_regex(keys, _DATE_PATTERN)))
+        if len(not_dates) > 0:
+            raise ValueError(f"Partition column must contain dates: {not_dates[0].as_py()!r}")
+        keys = pc.utf8_slice_codeunits(keys, 0, 10)
+    return pc.fill_null(keys, NULL_PARTITION)
+
+
+def check_partition_count(count: int) -> None:
+    """パーティション数が上限を超えていないか確認"""
+    if count > MAX_PARTITIONS:
+        raise ValueError(f"Too many partitions: {count} (max {MAX_PARTITIONS})")
+
+
+def split_table(table: pa.Table, partition_column: str) -> List[Tuple[str, pa.Table]]:
+    """テーブルをパーティションキーごとに分割"""
+    keys = partition_keys(table.column(partition_column))
+    unique_keys = pc.unique(keys).to_pylist()
+    check_partition_count(len(unique_keys))
+    return [
+        (key, table.filter(pc.equal(keys, key)))
+        for key in unique_keys
+    ]
+
+
+def partition_object_key(base_path: str, partition_column: str, key: str, part: int = 0) -> str:
+    """パーティションファイルのS3キーを生成"""
+    return f"{base_path}{partition_column}={quote(key, safe='')}/part-{part:05d}.parquet"
+
+
+def parse_partition_object_key(base_path: str, object_key: str) -> Optional[Tuple[str, str]]:
+    """パーティションファイルのS3キーから（カラム名, パーティションキー）を取得"""
+    if not object_key.startswith(base_path) or not object_key.endswith(".parquet"):
+        return None
+
+    directory, _, _ = object_key[len(base_path):].partition("/")
+    column, sep, key = directory.partition("=")
+    if not sep:
+        return None
+    return column, unquote(key)
+
+
+def select_partitions(keys: Iterable[str], filter_value: Any) -> List[str]:
+    """フィルタ値に該当する可能性のあるパーティションのみを選択
+
+    日付形式でないフィルタ値では絞り込めないため、全パーティションを返す。
+    行単位のフィルタは読み込み後に別途適用される。
+    """
+    keys = list(keys)
+    if filter_value is None:
+        return keys
+
+    if isinstance(filter_value, list):
+        selected = {partition_key(v) for v in filter_value}
+        if None in selected:
+            return keys
+        return [k for k in keys if k in selected]
+
+    if isinstance(filter_value, dict):
+        if "start" not in filter_value or "end" not in filter_value:
+            return keys
+        start = partition_key(filter_value["start"])
+        end = partition_key(filter_value["end"])
+        if start is None or end is None:
+            return keys
+        return [k for k in keys if k != NULL_PARTITION and start <= k <= end]
+
+    selected_key = partition_key(filter_value)
+    if selected_key is None:
+        return keys
+    return [k for k in keys if k == selected_key]
+
+
+def group_partition_objects(base_path: str, object_keys: Iterable[str]) -> Tuple[Optional[str], Dict[str, List[str]]]:
+    """S3オブジェクト一覧をパーティションキーごとにまとめる"""
+    partition_column = None
+    partitions: Dict[str, List[str]] = {}
+    for object_key in object_keys:
+        parsed = parse_partition_object_key(base_path, object_key)
+        if parsed is None:
+            continue
+        partition_column, key = parsed
+        partitions.setdefault(key, []).append(object_key)
+
+    for files in partitions.values():
+        files.sort()
+    return partition_column, partitions
@@ -1,7 +1,8 @@
 """実行キュー管理"""
 import asyncio
-from typing import Callable, Any, Dict
-from dataclasses import dataclass
+import time
+from typing import Callable, Any, Dict, Optional
+from dataclasses import dataclass, field
 from enum import Enum
 
 
@@ -24,55 +25,155 @@ class Task:
     task_id: str
     func: Callable
     status: TaskStatus = TaskStatus.PENDING
+    # 実行結果（submitの呼び出し元がawaitする）
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+    # 計測値（time.monotonic）
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        """キューで実行枠を待った時間"""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+    
+    @property
+    def run_seconds(self) -> Optional[float]:
+        """実行にかかった時間"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class QueueMetrics:
+    """キューの計測値"""
+    submitted: int = 0
+    rejected: int = 0
+    completed: int = 0
+    failed: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    run_seconds_total: float = 0.0
+    run_seconds_max: float = 0.0
 
 
 class ExecutionQueue:
-    """実行キュー"""
+    """実行キュー
+    
+    同時実行数はセマフォで制限する。実行枠が空くと、その時点で待機中の先頭タスクが実行される。
+    """
     
     def __init__(self, max_concurrent: int = 10, queue_size: int = 50):
         self.max_concurrent = max_concurrent
         self.queue_size = queue_size
         self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
         self.running_tasks: Dict[str, asyncio.Task] = {}
+        self.tasks: Dict[str, Task] = {}  # 待機中・実行中のタスク
         self.worker_task: asyncio.Task = None
+        self.metrics = QueueMetrics()
+        self._slots = asyncio.Semaphore(max_concurrent)
     
-    async def submit(self, task_id: str, func: Callable) -> None:
-        """タスクをキューに追加"""
+    async def submit(self, task_id: str, func: Callable) -> asyncio.Future:
+        """タスクをキューに追加
+        
+        戻り値のFutureをawaitすると、タスクの実行結果（または発生した例外）が得られる。
+        """
         if self.queue.full():
+            self.metrics.rejected += 1
             raise QueueFullError(f"Queue is full (size: {self.queue_size})")
         
-        task = Task(task_id=task_id, func=func)
-        await self.queue.put(task)
+        task = Task(
+            task_id=task_id,
+            func=func,
+            future=asyncio.get_running_loop().create_future(),
+            submitted_at=time.monotonic(),
+        )
+        self.queue.put_nowait(task)
+        self.tasks[task_id] = task
+        task.future.add_done_callback(lambda _: self._on_future_done(task))
+        self.metrics.submitted += 1
+        return task.future
+    
+    def cancel(self, task_id: str) -> bool:
+        """タスクをキャンセル（該当するタスクがない場合はFalse）
+        
+        submitの戻り値のFutureをキャンセルした場合と同じく、待機中のタスクは実行されず、
+        実行中のタスクには CancelledError が送出される。
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        return task.future.cancel()
+    
+    def _on_future_done(self, task: Task):
+        running_task = self.running_tasks.get(task.task_id)
+        if running_task is None:
+            if self.tasks.get(task.task_id) is task:
+                del self.tasks[task.task_id]
+        elif task.future.cancelled():
+            # 呼び出し元が待機をやめた実行中のタスクは中断する（削除は_runの終了時）
+            running_task.cancel()
     
     async def _worker(self):
-        """ワーカーループ"""
+        """ワーカーループ（実行枠を確保してから次のタスクを取り出す）"""
         while True:
+            await self._slots.acquire()
             try:
                 task = await self.queue.get()
-                
-                # 同時実行数制限チェック
-                while len(self.running_tasks) >= self.max_concurrent:
-                    await asyncio.sleep(0.1)
-                
-                # タスクを実行
-                task.status = TaskStatus.RUNNING
-                coro = task.func() if asyncio.iscoroutinefunction(task.func) else asyncio.to_thread(task.func)
-                running_task = asyncio.create_task(coro)
-                self.running_tasks[task.task_id] = running_task
-                
-                def cleanup(task_id):
-                    def _cleanup(fut):
-                        if task_id in self.running_tasks:
-                            del self.running_tasks[task_id]
-                    return _cleanup
-                
-                running_task.add_done_callback(cleanup(task.task_id))
-                self.queue.task_done()
             except asyncio.CancelledError:
-                break
-            except Exception as e:
-                # エラーをログに記録（実装時）
-                pass
+                self._slots.release()
+                raise
+            
+            self.queue.task_done()
+            if task.future.done():
+                # 呼び出し元が待機をやめたタスクは実行しない
+                self._slots.release()
+                continue
+            
+            task.status = TaskStatus.RUNNING
+            task.started_at = time.monotonic()
+            self.running_tasks[task.task_id] = asyncio.create_task(self._run(task))
+    
+    async def _run(self, task: Task):
+        """タスクを実行し、結果を呼び出し元に渡す"""
+        try:
+            if asyncio.iscoroutinefunction(task.func):
+                result = await task.func()
+            else:
+                result = await asyncio.to_thread(task.func)
+        except asyncio.CancelledError:
+            task.status = TaskStatus.FAILED
+            task.future.cancel()
+            raise
+        except Exception as e:
+            task.status = TaskStatus.FAILED
+            if not task.future.done():
+                task.future.set_exception(e)
+        else:
+            task.status = TaskStatus.COMPLETED
+            if not task.future.done():
+                task.future.set_result(result)
+        finally:
+            task.finished_at = time.monotonic()
+            self.running_tasks.pop(task.task_id, None)
+            self.tasks.pop(task.task_id, None)
+            self._slots.release()
+            self._record(task)
+    
+    def _record(self, task: Task):
+        """完了したタスクの待ち時間・実行時間を集計"""
+        if task.status == TaskStatus.COMPLETED:
+            self.metrics.completed += 1
+        else:
+            self.metrics.failed += 1
+        
+        self.metrics.wait_seconds_total += task.wait_seconds
+        self.metrics.wait_seconds_max = max(self.metrics.wait_seconds_max, task.wait_seconds)
+        self.metrics.run_seconds_total += task.run_seconds
+        self.metrics.run_seconds_max = max(self.metrics.run_seconds_max, task.run_seconds)
     
     def start(self):
         """ワーカーを開始"""
@@ -80,10 +181,33 @@ class ExecutionQueue:
             self.worker_task = asyncio.create_task(self._worker())
     
     def stop(self):
-        """ワーカーを停止"""
+        """ワーカーを停止（待機中のタスクはキャンセルする）"""
         if self.worker_task and not self.worker_task.done():
             self.worker_task.cancel()
+        
+        while not self.queue.empty():
+            task = self.queue.get_nowait()
+            task.future.cancel()
+            self.queue.task_done()
     
     def is_full(self) -> bool:
         """キューが満杯かどうか"""
         return self.queue.full()
+    
+    def stats(self) -> Dict[str, Any]:
+        """キューの状態と計測値"""
+        finished = self.metrics.completed + self.metrics.failed
+        return {
+            "queue_depth": self.queue.qsize(),
+            "running": len(self.running_tasks),
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+            "submitted": self.metrics.submitted,
+            "rejected": self.metrics.rejected,
+            "completed": self.metrics.completed,
+            "failed": self.metrics.failed,
+            "wait_seconds_avg": self.metrics.wait_seconds_total / finished if finished else 0.0,
+            "wait_seconds_max": self.metrics.wait_seconds_max,
+            "run_seconds_avg": self.metrics.run_seconds_total / finished if finished else 0.0,
+            "run_seconds_max": self.metrics.run_seconds_max,
+        }
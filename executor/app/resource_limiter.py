@@ -3,7 +3,7 @@ import resource
 import signal
 import sys
 from contextlib import contextmanager
-from typing import Optional
+from typing import Optional, Tuple
 
 
 class TimeoutError(Exception):
@@ -11,6 +11,26 @@ class TimeoutError(Exception):
     pass
 
 
+def _lower_rlimit(kind: int, limit: int) -> Tuple[int, int]:
+    """ソフトリミットをlimitまで下げ、変更前の（ソフト, ハード）リミットを返す
+    
+    ハードリミットを超える値は設定できないため、ハードリミットで頭打ちにする。
+    現在のソフトリミットが無制限（RLIM_INFINITY）の場合も制限を設定する。
+    """
+    old_limit = resource.getrlimit(kind)
+    soft, hard = old_limit
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    # 現在のリミットより小さい場合のみ設定（エラーを無視）
+    if soft == resource.RLIM_INFINITY or limit < soft:
+        try:
+            resource.setrlimit(kind, (limit, hard))
+        except (ValueError, OSError):
+            # 設定できない場合はスキップ（開発環境など）
+            pass
+    return old_limit
+
+
 class ResourceLimiter:
     """リソース使用量を制限"""
     
@@ -36,37 +56,9 @@ class ResourceLimiter:
             old_handler = signal.signal(signal.SIGALRM, timeout_handler)
             signal.alarm(self.timeout)
         
-        # メモリ制限
-        old_mem_limit = resource.getrlimit(resource.RLIMIT_AS)
-        # 現在のリミットと最大リミットの小さい方を設定
-        if old_mem_limit[1] == resource.RLIM_INFINITY:
-            # 無制限の場合は設定値をそのまま使用
-            max_mem_limit = self.max_memory
-        else:
-            max_mem_limit = min(self.max_memory, old_mem_limit[1])
-        # 現在のリミットより小さい場合のみ設定（エラーを無視）
-        if max_mem_limit < old_mem_limit[0]:
-            try:
-                resource.setrlimit(resource.RLIMIT_AS, (max_mem_limit, old_mem_limit[1]))
-            except (ValueError, OSError):
-                # 設定できない場合はスキップ（開発環境など）
-                pass
-        
-        # ファイルサイズ制限
-        old_fsize_limit = resource.getrlimit(resource.RLIMIT_FSIZE)
-        # 現在のリミットと最大リミットの小さい方を設定
-        if old_fsize_limit[1] == resource.RLIM_INFINITY:
-            # 無制限の場合は設定値をそのまま使用
-            max_fsize_limit = self.max_file_size
-        else:
-            max_fsize_limit = min(self.max_file_size, old_fsize_limit[1])
-        # 現在のリミットより小さい場合のみ設定（エラーを無視）
-        if max_fsize_limit < old_fsize_limit[0]:
-            try:
-                resource.setrlimit(resource.RLIMIT_FSIZE, (max_fsize_limit, old_fsize_limit[1]))
-            except (ValueError, OSError):
-                # 設定できない場合はスキップ（開発環境など）
-                pass
+        # メモリ制限・ファイルサイズ制限
+        old_mem_limit = _lower_rlimit(resource.RLIMIT_AS, self.max_memory)
+        old_fsize_limit = _lower_rlimit(resource.RLIMIT_FSIZE, self.max_file_size)
         
         try:
             yield
@@ -1,16 +1,38 @@
 """実行エンジン"""
+import asyncio
+import contextlib
 import io
 import uuid
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple, Union
 import traceback
 
 from app.sandbox import sandbox_context, validate_code, SandboxError, build_safe_builtins
-from app.db import get_s3_client, get_bucket_name
+from app.db import get_s3_client, get_bucket_name, put_objects, S3MultipartWriter
 from app.resource_limiter import ResourceLimiter, TimeoutError
 from app.config import settings
+from app.parquet_io import LocalParquetFile, ParquetObject, filter_table
+from app.dataset_cache import dataset_cache, filtered_table_cache
+from app.disk_cache import disk_cache
+from app.worker_pool import (
+    WorkerPool,
+    card_worker_pool,
+    transform_worker_pool,
+    share_table,
+    open_shared_table,
+    remove_shared_table,
+    WorkerCrashedError,
+    WorkerTimeoutError,
+)
+from app.partitioning import (
+    is_partitioned_path,
+    split_table,
+    partition_object_key,
+    group_partition_objects,
+    select_partitions,
+)
 
 
 class ExecutionError(Exception):
@@ -34,21 +56,113 @@ async def execute_card(
     filters: Dict[str, Any],
     params: Dict[str, Any] = None,
     timeout: int = 10,
+    columns: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
-    """Cardを実行"""
+    """Cardを実行
+    
+    columnsが指定された場合は、その列とフィルタ対象の列のみを読み込む。
+    ユーザーコードはワーカープロセスで実行する。
+    """
     # コード検証
     errors = validate_code(code)
     if errors:
         raise ExecutionError(f"Code validation failed: {', '.join(errors)}")
     
-    # データセットを読み込む
+    # データセットを読み込む（フィルタはParquet読み込み時に適用される）
     try:
-        df = await load_dataset(dataset_path)
+        table = await load_dataset_table(dataset_path, filters, columns)
     except Exception as e:
         raise ExecutionError(f"Failed to load dataset: {e}")
     
-    # フィルタを適用
-    filtered_df = apply_filters(df, filters)
+    # データセットを共有メモリ経由でワーカープロセスに渡して実行
+    dataset_file = await _share_table(table)
+    try:
+        result, usage = await _run_in_worker(
+            card_worker_pool,
+            run_card_code,
+            settings.card_timeout_seconds,
+            code=code,
+            dataset_file=dataset_file,
+            filters=filters,
+            params=params or {},
+        )
+    finally:
+        remove_shared_table(dataset_file)
+    
+    result["resource_usage"] = usage
+    return result
+
+
+async def execute_card_group(
+    dataset_path: str,
+    cards: List[Dict[str, Any]],
+    filters: Dict[str, Any],
+    on_result: Callable[[int, Union[Dict[str, Any], Exception]], None],
+) -> None:
+    """同じデータセットを参照する複数のCardを実行
+    
+    cardsの各要素は code, params, columns（省略可）を持つ。
+    データセットの読み込みとフィルタの適用は1回だけ行い（全Cardのcolumnsの和集合を読み込む）、
+    各Cardはワーカープロセスで並行して実行する。
+    Cardが完了するたびに on_result(cardsのインデックス, 結果または例外) を呼ぶ。
+    """
+    pending = []
+    for index, card in enumerate(cards):
+        errors = validate_code(card["code"])
+        if errors:
+            on_result(index, ExecutionError(f"Code validation failed: {', '.join(errors)}"))
+        else:
+            pending.append(index)
+    if not pending:
+        return
+    
+    columns: Optional[List[str]] = []
+    for index in pending:
+        if cards[index].get("columns") is None:
+            columns = None
+            break
+        columns.extend(cards[index]["columns"])
+    
+    try:
+        table = await load_dataset_table(dataset_path, filters, columns)
+    except Exception as e:
+        error = ExecutionError(f"Failed to load dataset: {e}")
+        for index in pending:
+            on_result(index, error)
+        return
+    
+    async def run(index: int) -> None:
+        try:
+            result, usage = await _run_in_worker(
+                card_worker_pool,
+                run_card_code,
+                settings.card_timeout_seconds,
+                code=cards[index]["code"],
+                dataset_file=dataset_file,
+                filters=filters,
+                params=cards[index].get("params") or {},
+            )
+        except Exception as e:
+            on_result(index, e)
+        else:
+            result["resource_usage"] = usage
+            on_result(index, result)
+    
+    dataset_file = await _share_table(table)
+    try:
+        await asyncio.gather(*(run(index) for index in pending))
+    finally:
+        remove_shared_table(dataset_file)
+
+
+def run_card_code(
+    code: str,
+    dataset_file: str,
+    filters: Dict[str, Any],
+    params: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Cardのコードを実行（ワーカープロセス内で呼ばれる）"""
+    filtered_df = open_shared_table(dataset_file).to_pandas()
     
     # リソース制限を適用
     limiter = ResourceLimiter(
@@ -68,7 +182,7 @@ async def execute_card(
                     "pandas": pd,
                     "dataset": filtered_df,
                     "filters": filters,
-                    "params": params or {},
+                    "params": params,
                 }
                 
                 # コードを実行
@@ -79,7 +193,7 @@ async def execute_card(
                     raise ExecutionError("render function not found in code")
                 
                 render_func = namespace["render"]
-                result = render_func(filtered_df, filters, params or {})
+                result = render_func(filtered_df, filters, params)
                 
                 # 結果を検証
                 if not isinstance(result, dict):
@@ -106,8 +220,9 @@ async def execute_transform(
     code: str,
     input_dataset_paths: Dict[str, str],
     timeout: int = 300,
+    partition_column: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Transformを実行"""
+    """Transformを実行（ユーザーコードはワーカープロセスで実行する）"""
     # コード検証
     errors = validate_code(code)
     if errors:
@@ -117,10 +232,61 @@ async def execute_transform(
     inputs = {}
     try:
         for name, path in input_dataset_paths.items():
-            inputs[name] = await load_dataset(path)
+            inputs[name] = await load_dataset_table(path)
     except Exception as e:
         raise ExecutionError(f"Failed to load input dataset: {e}")
     
+    input_files = {}
+    output_file = None
+    try:
+        for name, input_table in inputs.items():
+            input_files[name] = await _share_table(input_table)
+        output_file, usage = await _run_in_worker(
+            transform_worker_pool,
+            run_transform_code,
+            settings.transform_timeout_seconds,
+            code=code,
+            input_files=input_files,
+        )
+        table = open_shared_table(output_file)
+        
+        if partition_column and partition_column not in table.column_names:
+            raise ExecutionError(f"Partition column not found in transform output: {partition_column}")
+        
+        # テーブルをS3に保存（サンドボックス外で実行）
+        dataset_id = f"dataset_{uuid.uuid4().hex[:12]}"
+        
+        try:
+            if partition_column:
+                s3_path = f"datasets/{dataset_id}/partitions/"
+                await write_partitioned_table_to_s3(table, s3_path, partition_column)
+            else:
+                s3_path = f"datasets/{dataset_id}/data.parquet"
+                await write_table_to_s3(table, s3_path)
+        except Exception as e:
+            raise ExecutionError(f"Failed to save transform output: {e}")
+    finally:
+        for input_file in input_files.values():
+            remove_shared_table(input_file)
+        remove_shared_table(output_file)
+    
+    return {
+        "s3_path": s3_path,
+        "row_count": table.num_rows,
+        "column_count": table.num_columns,
+        "columns": table.column_names,
+        "partition_column": partition_column,
+        "resource_usage": usage,
+    }
+
+
+def run_transform_code(code: str, input_files: Dict[str, str]) -> str:
+    """Transformのコードを実行（ワーカープロセス内で呼ばれる）
+    
+    結果のDataFrameは共有メモリ上のArrow IPCファイルに書き出し、そのパスを返す。
+    """
+    inputs = {name: open_shared_table(path).to_pandas() for name, path in input_files.items()}
+    
     # リソース制限を適用
     limiter = ResourceLimiter(
         timeout_seconds=settings.transform_timeout_seconds,
@@ -154,30 +320,6 @@ async def execute_transform(
                 # 結果を検証
                 if not isinstance(result_df, pd.DataFrame):
                     raise ExecutionError("transform function must return a DataFrame")
-                
-                # DataFrameをS3に保存
-                dataset_id = f"dataset_{uuid.uuid4().hex[:12]}"
-                s3_path = f"datasets/{dataset_id}/data.parquet"
-                
-                parquet_buffer = io.BytesIO()
-                table = pa.Table.from_pandas(result_df)
-                pq.write_table(table, parquet_buffer)
-                parquet_buffer.seek(0)
-                
-                s3_client = await get_s3_client()
-                datasets_bucket = get_bucket_name("datasets")
-                await s3_client.put_object(
-                    Bucket=datasets_bucket,
-                    Key=s3_path,
-                    Body=parquet_buffer.getvalue(),
-                )
-                
-                return {
-                    "s3_path": s3_path,
-                    "row_count": len(result_df),
-                    "column_count": len(result_df.columns),
-                    "columns": list(result_df.columns),
-                }
     
     except TimeoutError as e:
         raise ExecutionTimeout(f"Execution timeout: {e}")
@@ -185,49 +327,209 @@ async def execute_transform(
         raise ExecutionError(f"Sandbox error: {e}")
     except Exception as e:
         raise ExecutionError(f"Execution error: {traceback.format_exc()}")
+    
+    try:
+        return share_table(pa.Table.from_pandas(result_df, preserve_index=False))
+    except Exception as e:
+        raise ExecutionError(f"Failed to convert transform output: {e}")
+
+
+async def _share_table(table: pa.Table) -> str:
+    """テーブルを共有メモリに書き出す（書き出し中にキャンセルされた場合もファイルを残さない）"""
+    task = asyncio.ensure_future(asyncio.to_thread(share_table, table))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        def cleanup(t):
+            if not t.cancelled() and t.exception() is None:
+                remove_shared_table(t.result())
+        task.add_done_callback(cleanup)
+        raise
 
 
-async def load_dataset(s3_path: str) -> pd.DataFrame:
-    """S3からデータセットを読み込む"""
+async def _run_in_worker(pool: WorkerPool, func, timeout_seconds: int, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """プールのワーカープロセスで関数を実行し、（結果, リソース使用量）を返す
+    
+    制限時間を過ぎても応答しない場合はワーカーを強制終了する。
+    """
+    try:
+        return await pool.run_measured(
+            func,
+            timeout=timeout_seconds + settings.worker_timeout_grace_seconds,
+            **kwargs,
+        )
+    except WorkerTimeoutError as e:
+        raise ExecutionTimeout(f"Execution timeout: {e}")
+    except WorkerCrashedError as e:
+        raise ExecutionError(f"Execution error: {e}")
+
+
+async def write_table_to_s3(table: pa.Table, s3_path: str) -> None:
+    """テーブルをParquetとしてS3に保存（行グループ単位でマルチパートアップロード）"""
+    s3_client = await get_s3_client()
+    bucket_name = get_bucket_name("datasets")
+    
+    async with S3MultipartWriter(s3_client, bucket_name, s3_path) as sink:
+        # Parquetのエンコードはイベントループを塞がないようスレッドで実行
+        await asyncio.to_thread(pq.write_table, table, sink)
+
+
+async def write_partitioned_table_to_s3(table: pa.Table, base_path: str, partition_column: str) -> None:
+    """テーブルを日付パーティションごとのParquetファイルとしてS3に保存"""
+    s3_client = await get_s3_client()
+    bucket_name = get_bucket_name("datasets")
+    
+    def encode_partitions():
+        encoded = []
+        for key, partition_table in split_table(table, partition_column):
+            buffer = io.BytesIO()
+            pq.write_table(partition_table, buffer)
+            encoded.append((partition_object_key(base_path, partition_column, key), buffer.getvalue()))
+        return encoded
+    
+    partitions = await asyncio.to_thread(encode_partitions)
+    await put_objects(s3_client, bucket_name, partitions)
+
+
+async def load_dataset(
+    s3_path: str,
+    filters: Optional[Dict[str, Any]] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """S3からデータセットをDataFrameとして読み込む（load_dataset_tableを参照）"""
+    table = await load_dataset_table(s3_path, filters, columns)
+    return table.to_pandas()
+
+
+async def load_dataset_table(
+    s3_path: str,
+    filters: Optional[Dict[str, Any]] = None,
+    columns: Optional[List[str]] = None,
+) -> pa.Table:
+    """S3からデータセットを読み込み、フィルタを適用する
+    
+    columnsが指定された場合は、その列とフィルタ対象の列の列チャンクのみを取得する。
+    フィルタは行グループの統計情報による絞り込みと読み込み後の行単位の絞り込みに使われる。
+    フィルタ適用済みのテーブルは短時間キャッシュされ、同じ条件の読み込みで再利用される。
+    """
+    filters = filters or {}
+    if columns is not None:
+        columns = list(dict.fromkeys([*columns, *filters.keys()]))
+    
+    # 同じデータセット・同じフィルタ条件で直前に読み込んだ結果があれば再利用する
+    if filters and filtered_table_cache.enabled:
+        cached = filtered_table_cache.get(s3_path, filters, columns)
+        if cached is not None:
+            return cached
+    
+    if is_partitioned_path(s3_path):
+        table = await _load_partitioned_dataset(s3_path, filters, columns)
+    else:
+        s3_client = await get_s3_client()
+        bucket_name = get_bucket_name("datasets")
+        
+        try:
+            table = await _read_parquet(s3_client, bucket_name, s3_path, columns, filters)
+        except Exception as e:
+            raise ExecutionError(f"Failed to load dataset from S3: {e}")
+    
+    if filters:
+        filtered_table_cache.put(s3_path, filters, columns, table)
+    return table
+
+
+async def _load_partitioned_dataset(
+    base_path: str,
+    filters: Dict[str, Any],
+    columns: Optional[List[str]] = None,
+) -> pa.Table:
+    """パーティション分割されたデータセットのうち、フィルタに該当するパーティションのみを読み込む"""
     s3_client = await get_s3_client()
     bucket_name = get_bucket_name("datasets")
     
     try:
-        response = await s3_client.get_object(Bucket=bucket_name, Key=s3_path)
-        parquet_content = await response["Body"].read()
+        object_keys = []
+        list_kwargs = {"Bucket": bucket_name, "Prefix": base_path}
+        while True:
+            response = await s3_client.list_objects_v2(**list_kwargs)
+            object_keys.extend(obj["Key"] for obj in response.get("Contents", []))
+            if not response.get("IsTruncated"):
+                break
+            list_kwargs["ContinuationToken"] = response["NextContinuationToken"]
+        
+        partition_column, partitions = group_partition_objects(base_path, object_keys)
+        if not partitions:
+            raise ExecutionError(f"No partition files found under {base_path}")
         
-        # Parquetを読み込む
-        parquet_buffer = io.BytesIO(parquet_content)
-        table = pq.read_table(parquet_buffer)
-        df = table.to_pandas()
+        selected = select_partitions(sorted(partitions), filters.get(partition_column))
+        files = [f for key in selected for f in partitions[key]]
         
-        return df
+        if not files:
+            # 該当パーティションがない場合もスキーマは維持する
+            first_key = sorted(partitions)[0]
+            async with _open_parquet(s3_client, bucket_name, partitions[first_key][0]) as parquet_source:
+                return filter_table(parquet_source.schema.empty_table(), columns)
+        
+        tables = await asyncio.gather(*(
+            _read_parquet(s3_client, bucket_name, f, columns, filters) for f in files
+        ))
+        return pa.concat_tables(tables)
+    except ExecutionError:
+        raise
     except Exception as e:
         raise ExecutionError(f"Failed to load dataset from S3: {e}")
 
 
-def apply_filters(df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
-    """フィルタを適用"""
-    filtered_df = df.copy()
+@contextlib.asynccontextmanager
+async def _open_parquet(
+    s3_client,
+    bucket_name: str,
+    key: str,
+) -> AsyncIterator[Union[ParquetObject, LocalParquetFile]]:
+    """Parquetファイルを開く（ディスクキャッシュが有効な場合はローカルのファイルを使う）
     
-    for filter_key, filter_value in filters.items():
-        if filter_key not in filtered_df.columns:
-            continue
-        
-        if isinstance(filter_value, list):
-            # 複数選択
-            filtered_df = filtered_df[filtered_df[filter_key].isin(filter_value)]
-        elif isinstance(filter_value, dict):
-            # 日付範囲など
-            if "start" in filter_value and "end" in filter_value:
-                start = filter_value["start"]
-                end = filter_value["end"]
-                filtered_df = filtered_df[
-                    (filtered_df[filter_key] >= start) &
-                    (filtered_df[filter_key] <= end)
-                ]
-        else:
-            # 単一値
-            filtered_df = filtered_df[filtered_df[filter_key] == filter_value]
+    ローカルのファイルはブロックを抜けるまでディスクキャッシュから削除されない。
+    """
+    if disk_cache.enabled:
+        async with disk_cache.open(s3_client, bucket_name, key) as path:
+            yield await asyncio.to_thread(LocalParquetFile, path)
+    else:
+        yield await ParquetObject.open(s3_client, bucket_name, key)
+
+
+async def _read_parquet(
+    s3_client,
+    bucket_name: str,
+    key: str,
+    columns: Optional[List[str]],
+    filters: Dict[str, Any],
+) -> pa.Table:
+    """Parquetファイルを読み込む（デコード済みテーブルのキャッシュを利用する）
+    
+    キャッシュにない場合、フィルタ指定時は該当し得ない行グループを読み込まずにフィルタ適用済みの結果を返す
+    （結果はload_dataset_tableでfiltered_table_cacheに格納される）。
+    デコード済みテーブルのキャッシュにはフィルタなしで読み込んだテーブルのみ格納する。
+    """
+    if not dataset_cache.enabled:
+        async with _open_parquet(s3_client, bucket_name, key) as parquet_source:
+            return await parquet_source.read(columns, filters)
+    
+    cached = dataset_cache.get(key, columns)
+    if cached is not None:
+        return filter_table(cached, columns, filters)
     
-    return filtered_df
+    async with _open_parquet(s3_client, bucket_name, key) as parquet_source:
+        if filters:
+            return await parquet_source.read(columns, filters)
+        
+        # キャッシュ済みの列も合わせて読み込み、エントリを置き換える
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys([*(dataset_cache.cached_columns(key) or []), *columns]))
+        if parquet_source.uncompressed_size(read_columns) > dataset_cache.max_bytes:
+            # キャッシュに収まらない場合は必要な列のみ読み込む
+            return await parquet_source.read(columns)
+        
+        table = await parquet_source.read(read_columns)
+    dataset_cache.put(key, table, parquet_source.schema.names)
+    return filter_table(table, columns)
@@ -1,6 +1,8 @@
 """サンドボックス実装"""
 import ast
 import builtins
+import os
+import sysconfig
 from typing import List, Set
 from contextlib import contextmanager
 
@@ -35,16 +37,32 @@ ALLOWED_MODULES: Set[str] = {
 }
 
 
+# インストール済みのライブラリ（標準ライブラリ・site-packages）の配置先
+_LIBRARY_PATHS = tuple(sorted({
+    os.path.join(sysconfig.get_paths()[name], "")
+    for name in ("stdlib", "platstdlib", "purelib", "platlib")
+}))
+
+# モジュールを読み込む際にimportの仕組み自体が行うimportの呼び出し元（ファイルを持たない）
+_IMPORT_SYSTEM_MODULES: Set[str] = {"importlib", "_frozen_importlib", "_frozen_importlib_external"}
+
+
 class SandboxError(Exception):
     """サンドボックスエラー"""
     pass
 
 
 class ImportHook:
-    """importフック（ホワイトリストチェック）"""
+    """importフック（ホワイトリストチェック）
     
-    def __init__(self, allowed_modules: Set[str]):
+    library_importsを指定した場合は、インストール済みのライブラリのモジュールから行われるimport
+    （相対importを含む）を許可する（許可ライブラリが遅延importする依存モジュールの読み込みを妨げない）。
+    ユーザーコードやアプリケーションのコードからのimportは、これまでどおりホワイトリストでチェックする。
+    """
+    
+    def __init__(self, allowed_modules: Set[str], library_imports: bool = False):
         self.allowed_modules = allowed_modules
+        self.library_imports = library_imports
         self.original_import = builtins.__import__
     
     def __enter__(self):
@@ -58,6 +76,9 @@ class ImportHook:
     
     def _import_hook(self, name, globals=None, locals=None, fromlist=(), level=0):
         """importフック実装"""
+        if self.library_imports and _is_library_module(globals):
+            return self.original_import(name, globals, locals, fromlist, level)
+        
         # 相対インポートは許可しない
         if level > 0:
             raise SandboxError("Relative imports are not allowed")
@@ -84,10 +105,32 @@ class ImportHook:
         return self.original_import(name, globals, locals, fromlist, level)
 
 
+def _is_library_module(module_globals) -> bool:
+    """importの呼び出し元がインストール済みのライブラリのモジュールか
+    
+    呼び出し元のグローバル変数がない場合（ライブラリや拡張モジュールからの動的な__import__呼び出し）も含む。
+    ユーザーコードの__import__の呼び出しはvalidate_codeで禁止しているため、import文からの呼び出しに限られる。
+    """
+    if module_globals is None:
+        return True
+    if (module_globals.get("__name__") or "").split('.')[0] in _IMPORT_SYSTEM_MODULES:
+        return True
+    module_file = module_globals.get("__file__")
+    return isinstance(module_file, str) and module_file.startswith(_LIBRARY_PATHS)
+
+
+# ユーザーコードのimport文で使う__import__（許可ライブラリのみimportできる）
+_safe_import_hook = ImportHook(ALLOWED_MODULES)
+
+
 @contextmanager
 def sandbox_context():
-    """サンドボックスコンテキスト"""
-    with ImportHook(ALLOWED_MODULES):
+    """サンドボックスコンテキスト
+    
+    ユーザーコードのimport文はbuild_safe_builtinsの__import__でチェックされる。
+    ここではインストール済みのライブラリ以外のコードからのimportをホワイトリストでチェックする。
+    """
+    with ImportHook(ALLOWED_MODULES, library_imports=True):
         yield
 
 
@@ -121,6 +164,9 @@ def build_safe_builtins() -> dict:
     safe = {}
     for name in allowed_names:
         safe[name] = getattr(builtins, name)
+    # import文は__builtins__の__import__を使うため、ホワイトリストでチェックするものを渡す
+    # （ワーカーで事前にimportした許可ライブラリはここから取得される）
+    safe["__import__"] = _safe_import_hook._import_hook
     return safe
 
 
@@ -0,0 +1,361 @@
+"""ユーザーコード実行用のワーカープロセスプール
+
+Card/Transformのユーザーコードはイベントループとは別のワーカープロセスで実行する。
+各ワーカーは同時に1つのタスクのみを実行するため、ResourceLimiterによる制限（RLIMIT_AS、
+SIGALRM等）はワーカーごとに独立する。
+CardとTransformは別々のプールで実行し、実行時間の長いTransformがCardのワーカーを占有しないようにする。
+各プールのワーカー数は実行キューの同時実行数と同じにする。
+
+ワーカーはforkserver経由で起動する。forkserverは起動時に許可ライブラリ（plotly等）を
+importしておくため、ワーカーの起動・入れ替え時にimportのコストがかからない。
+ワーカーは一定回数実行するか、実行中のピークRSSが上限を超えた時点で入れ替える。
+
+データセットはArrow IPCファイルとして共有メモリ（/dev/shm）上に書き出し、
+ワーカー側ではメモリマップで読み込む（パイプ経由でのコピーを行わない）。
+"""
+import asyncio
+import multiprocessing
+import importlib
+import os
+import resource
+import signal
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+from app.config import settings
+from app.sandbox import ALLOWED_MODULES
+
+
+class WorkerCrashedError(Exception):
+    """ワーカープロセスが異常終了した"""
+    pass
+
+
+class WorkerTimeoutError(Exception):
+    """ワーカープロセスが制限時間内に応答しなかった"""
+    pass
+
+
+def _shared_dir() -> str:
+    if settings.worker_shared_dir and os.path.isdir(settings.worker_shared_dir):
+        return settings.worker_shared_dir
+    return tempfile.gettempdir()
+
+
+def share_table(table: pa.Table) -> str:
+    """テーブルを共有メモリ上のArrow IPCファイルに書き出し、そのパスを返す"""
+    path = os.path.join(_shared_dir(), f"executor-{uuid.uuid4().hex}.arrow")
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def open_shared_table(path: str) -> pa.Table:
+    """共有メモリ上のArrow IPCファイルをメモリマップで読み込む"""
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def remove_shared_table(path: Optional[str]) -> None:
+    """共有メモリ上のArrow IPCファイルを削除"""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def preload_modules(modules: Sequence[str]) -> None:
+    """モジュールを事前にimportする（インストールされていないモジュールは無視する）"""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def _max_rss_bytes() -> int:
+    """このプロセスの最大RSS（バイト）"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # LinuxではKB、macOSではバイト単位
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _reset_peak_rss() -> bool:
+    """ピークRSS（VmHWM）をリセット（Linuxのみ）"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """リセット以降のピークRSS（/proc/self/statusのVmHWM）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class _UsageMeter:
+    """1回の実行のリソース使用量（経過時間・CPU時間・ピークRSS）を計測"""
+
+    def __init__(self):
+        self._peak_reset = _reset_peak_rss()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def finish(self) -> Dict[str, Any]:
+        peak_rss = _peak_rss_bytes() if self._peak_reset else None
+        if peak_rss is None:
+            # リセットできない環境ではプロセス起動以降の最大値を使う
+            peak_rss = _max_rss_bytes()
+        return {
+            "wall_seconds": time.perf_counter() - self._wall_start,
+            "cpu_seconds": time.process_time() - self._cpu_start,
+            "peak_rss_bytes": peak_rss,
+        }
+
+
+def _worker_main(conn, modules: Sequence[str]) -> None:
+    """ワーカープロセスのメインループ"""
+    # Ctrl+C等のシグナルは親プロセスが処理する
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    preload_modules(modules)
+    conn.send(("ready", None, {}))
+
+    while True:
+        try:
+            func, kwargs = conn.recv()
+        except EOFError:
+            break
+
+        meter = _UsageMeter()
+        try:
+            result = ("ok", func(**kwargs))
+        except Exception as e:
+            result = ("error", e)
+
+        usage = meter.finish()
+        try:
+            conn.send((*result, usage))
+        except Exception:
+            # 結果や例外をpickleできない場合
+            conn.send(("error", RuntimeError(repr(result[1])), usage))
+
+
+class _Worker:
+    """ワーカープロセス"""
+
+    def __init__(self, context, modules: Sequence[str]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, modules), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks_completed = 0
+        self.max_rss_bytes = 0
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> None:
+        """モジュールの事前importが完了するまで待つ"""
+        await self._receive(timeout)
+
+    async def call(
+        self,
+        func: Callable,
+        kwargs: Dict[str, Any],
+        timeout: Optional[float],
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """関数をワーカーで実行して（結果, リソース使用量）を返す"""
+        try:
+            self.conn.send((func, kwargs))
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerCrashedError(f"Worker process is not available: {e}")
+
+        status, value, usage = await self._receive(timeout)
+        self.tasks_completed += 1
+        self.max_rss_bytes = max(self.max_rss_bytes, usage["peak_rss_bytes"])
+        if status == "error":
+            raise value
+        return value, usage
+
+    async def _receive(self, timeout: Optional[float]):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fileno = self.conn.fileno()
+
+        def on_readable():
+            if not ready.done():
+                ready.set_result(None)
+
+        loop.add_reader(fileno, on_readable)
+        try:
+            await asyncio.wait_for(ready, timeout)
+        except asyncio.TimeoutError:
+            raise WorkerTimeoutError(f"Worker did not respond within {timeout} seconds")
+        finally:
+            loop.remove_reader(fileno)
+
+        try:
+            return self.conn.recv()
+        except EOFError:
+            raise WorkerCrashedError(f"Worker process exited unexpectedly (exit code: {self.process.exitcode})")
+
+    def kill(self) -> None:
+        """ワーカープロセスを強制終了"""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class WorkerPool:
+    """ワーカープロセスプール
+
+    - preload_modules: ワーカーで事前にimportするモジュール
+    - max_tasks_per_worker: この回数実行したワーカーは入れ替える（0で無制限）
+    - max_rss_mb: 実行中のピークRSSがこの値を超えたワーカーは入れ替える（0で無制限）
+    """
+
+    def __init__(
+        self,
+        size: int,
+        preload_modules: Sequence[str] = (),
+        max_tasks_per_worker: int = 0,
+        max_rss_mb: int = 0,
+    ):
+        self.size = size
+        self.preload_modules = list(preload_modules)
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.recycled = 0
+        self._context = multiprocessing.get_context("forkserver")
+        if self.preload_modules:
+            self._context.set_forkserver_preload(self.preload_modules)
+        self._workers: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._starting: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """ワーカープロセスを起動"""
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._spawn()
+
+    def stop(self) -> None:
+        """全ワーカープロセスを終了"""
+        for task in self._starting:
+            task.cancel()
+        for worker in self._workers:
+            worker.kill()
+        self._starting = []
+        self._workers = []
+        self._idle = None
+
+    async def run(self, func: Callable, timeout: Optional[float] = None, **kwargs) -> Any:
+        """空いているワーカーで関数を実行
+
+        funcとkwargsはpickle可能である必要がある（funcはモジュールのトップレベル関数）。
+        timeout秒以内に応答がない場合や呼び出し元がキャンセルした場合は、ワーカーを強制終了して入れ替える。
+        """
+        result, _ = await self.run_measured(func, timeout, **kwargs)
+        return result
+
+    async def run_measured(
+        self,
+        func: Callable,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """runと同じだが、（結果, リソース使用量）を返す
+
+        リソース使用量は wall_seconds（経過時間）、cpu_seconds（CPU時間）、
+        peak_rss_bytes（実行中のピークRSS）を含む。
+        """
+        self.start()
+        worker = await self._idle.get()
+        try:
+            result = await worker.call(func, kwargs, timeout)
+        except (WorkerCrashedError, WorkerTimeoutError, asyncio.CancelledError):
+            self._replace(worker)
+            raise
+        except Exception:
+            self._release(worker)
+            raise
+        self._release(worker)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """プールの状態"""
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "starting": len(self._starting),
+            "recycled": self.recycled,
+        }
+
+    def _spawn(self) -> None:
+        """ワーカーを起動し、事前importが完了したら空きワーカーとして登録する"""
+        worker = _Worker(self._context, self.preload_modules)
+        self._workers.append(worker)
+        task = asyncio.create_task(self._register_when_ready(worker))
+        self._starting.append(task)
+        task.add_done_callback(self._starting.remove)
+
+    async def _register_when_ready(self, worker: _Worker) -> None:
+        try:
+            await worker.wait_ready()
+        except WorkerCrashedError:
+            self._replace(worker)
+            return
+        if self._idle is not None:
+            self._idle.put_nowait(worker)
+
+    def _release(self, worker: _Worker) -> None:
+        """実行を終えたワーカーを空きワーカーに戻す（上限に達したワーカーは入れ替える）"""
+        if (
+            (self.max_tasks_per_worker and worker.tasks_completed >= self.max_tasks_per_worker)
+            or (self.max_rss_bytes and worker.max_rss_bytes > self.max_rss_bytes)
+        ):
+            self.recycled += 1
+            self._replace(worker)
+        elif self._idle is not None:
+            self._idle.put_nowait(worker)
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if self._idle is not None:
+            self._spawn()
+
+
+# 許可ライブラリ（ユーザーコードのimport文はこれを再利用する）に加え、
+# ワーカーで実行する関数（run_card_code等）の定義元も事前にimportする
+# （関数のunpickle時に初回のタスクでapp.runnerのimportが発生しないようにする）
+WORKER_PRELOAD_MODULES = [*sorted(ALLOWED_MODULES), "app.runner"]
+
+card_worker_pool = WorkerPool(
+    settings.max_concurrent_cards,
+    preload_modules=WORKER_PRELOAD_MODULES,
+    max_tasks_per_worker=settings.worker_max_tasks,
+    max_rss_mb=settings.worker_max_rss_mb,
+)
+
+transform_worker_pool = WorkerPool(
+    settings.max_concurrent_transforms,
+    preload_modules=WORKER_PRELOAD_MODULES,
+    max_tasks_per_worker=settings.worker_max_tasks,
+    max_rss_mb=settings.worker_max_rss_mb,
+)
@@ -0,0 +1,204 @@
+"""Card一括実行のテスト"""
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from app import main
+from app.main import BatchCardExecuteRequest, cancel_execution, execute_cards_endpoint
+from app.queue import ExecutionQueue
+from app.runner import ExecutionError, ExecutionTimeout, execute_card_group
+
+
+VALID_CODE = "result = 1"
+INVALID_CODE = "eval('1')"
+
+
+def _card(code=VALID_CODE, columns=None, params=None):
+    return {"code": code, "columns": columns, "params": params or {}}
+
+
+class TestExecuteCardGroup(unittest.TestCase):
+    """同じデータセットを参照するCardの実行のテスト"""
+
+    def _run_group(self, cards, run_in_worker=None, load_error=None):
+        """execute_card_groupを実行し、（on_resultの呼び出し, モック）を返す"""
+        results = {}
+        load = mock.AsyncMock(return_value="table", side_effect=load_error)
+        if run_in_worker is None:
+            async def run_in_worker(pool, func, timeout, **kwargs):
+                return {"code": kwargs["code"], "params": kwargs["params"]}, {"wall_seconds": 0.1}
+
+        with mock.patch("app.runner.load_dataset_table", load), \
+             mock.patch("app.runner._share_table", mock.AsyncMock(return_value="/tmp/shared.arrow")), \
+             mock.patch("app.runner.remove_shared_table") as remove, \
+             mock.patch("app.runner._run_in_worker", side_effect=run_in_worker) as worker:
+            asyncio.run(execute_card_group(
+                "datasets/ds1/data.parquet",
+                cards,
+                {"region": "East"},
+                lambda index, result: results.setdefault(index, result),
+            ))
+        return results, load, worker, remove
+
+    def test_loads_dataset_once_with_combined_columns(self):
+        """データセットは全Cardの列の和集合で1回だけ読み込み、各Cardをワーカーで実行する"""
+        results, load, worker, remove = self._run_group([
+            _card(columns=["a"], params={"n": 1}),
+            _card(columns=["b", "a"]),
+        ])
+
+        load.assert_awaited_once_with("datasets/ds1/data.parquet", {"region": "East"}, ["a", "b", "a"])
+        self.assertEqual(worker.call_count, 2)
+        self.assertEqual(results[0]["params"], {"n": 1})
+        self.assertEqual(results[1]["resource_usage"], {"wall_seconds": 0.1})
+        remove.assert_called_once_with("/tmp/shared.arrow")
+
+    def test_reads_all_columns_if_any_card_needs_them(self):
+        """列を指定していないCardがあれば全列を読み込む"""
+        _, load, _, _ = self._run_group([_card(columns=["a"]), _card(columns=None)])
+
+        load.assert_awaited_once_with("datasets/ds1/data.parquet", {"region": "East"}, None)
+
+    def test_validation_error_is_reported_per_card(self):
+        """検証に失敗したCardのみエラーになり、他のCardは実行される"""
+        results, _, worker, _ = self._run_group([_card(code=INVALID_CODE), _card(columns=["a"])])
+
+        self.assertIsInstance(results[0], ExecutionError)
+        self.assertIn("Code validation failed", str(results[0]))
+        self.assertEqual(results[1]["code"], VALID_CODE)
+        self.assertEqual(worker.call_count, 1)
+
+    def test_load_error_is_reported_for_every_card(self):
+        """データセットの読み込みに失敗した場合は、検証を通った全Cardがエラーになる"""
+        results, _, worker, _ = self._run_group(
+            [_card(), _card()],
+            load_error=RuntimeError("S3 unavailable"),
+        )
+
+        for index in (0, 1):
+            self.assertIsInstance(results[index], ExecutionError)
+            self.assertIn("Failed to load dataset", str(results[index]))
+        worker.assert_not_called()
+
+    def test_worker_error_is_reported_per_card(self):
+        """ワーカーでの実行エラーはそのCardの結果になる"""
+        async def run_in_worker(pool, func, timeout, **kwargs):
+            if kwargs["params"].get("slow"):
+                raise ExecutionTimeout("Execution timeout")
+            return {}, {}
+
+        results, _, _, remove = self._run_group([_card(params={"slow": True}), _card()], run_in_worker)
+
+        self.assertIsInstance(results[0], ExecutionTimeout)
+        self.assertEqual(results[1], {"resource_usage": {}})
+        remove.assert_called_once()
+
+
+class TestExecuteCardsEndpoint(unittest.TestCase):
+    """Card一括実行エンドポイントのテスト"""
+
+    def _request(self, execution_id="batch_test"):
+        return BatchCardExecuteRequest(
+            execution_id=execution_id,
+            cards=[
+                {"card_id": "card_1", "code": "a", "dataset_path": "ds1"},
+                {"card_id": "card_2", "code": "b", "dataset_path": "ds2"},
+                {"card_id": "card_3", "code": "c", "dataset_path": "ds1"},
+            ],
+            filters={"region": "East"},
+        )
+
+    def _run(self, run_card_group, test):
+        """テスト用のキューとrun_card_groupに差し替えてtest(request)を実行"""
+        queue = ExecutionQueue(max_concurrent=2, queue_size=10)
+
+        async def run():
+            queue.start()
+            try:
+                return await test(self._request())
+            finally:
+                queue.stop()
+
+        with mock.patch.object(main, "card_queue", queue), \
+             mock.patch.object(main, "run_card_group", run_card_group):
+            return asyncio.run(run())
+
+    def test_groups_cards_by_dataset(self):
+        """データセットごとに1回ずつ実行し、全Cardの結果をストリーミングする"""
+        calls = []
+
+        async def run_card_group(dataset_path, cards, filters, on_result):
+            calls.append((dataset_path, [card["code"] for card in cards], filters))
+            for index in range(len(cards)):
+                on_result(index, {"dataset_path": dataset_path})
+
+        async def test(request):
+            response = await execute_cards_endpoint(request)
+            self.assertEqual(response.headers["X-Execution-Id"], "batch_test")
+            return [json.loads(line) async for line in response.body_iterator]
+
+        lines = self._run(run_card_group, test)
+
+        self.assertEqual(sorted(calls), [
+            ("ds1", ["a", "c"], {"region": "East"}),
+            ("ds2", ["b"], {"region": "East"}),
+        ])
+        self.assertEqual(
+            {line["card_id"]: (line["status"], line["data"]["dataset_path"]) for line in lines},
+            {"card_1": ("success", "ds1"), "card_2": ("success", "ds2"), "card_3": ("success", "ds1")},
+        )
+        self.assertNotIn("batch_test", main.batch_executions)
+
+    def test_group_errors_are_reported_per_card(self):
+        """Cardごとのエラーと、途中で失敗したデータセットの残りのCardはエラー行として返す"""
+        async def run_card_group(dataset_path, cards, filters, on_result):
+            if dataset_path == "ds2":
+                on_result(0, ExecutionError("Code validation failed"))
+                return
+            on_result(0, {"ok": True})
+            raise RuntimeError("worker pool stopped")
+
+        async def test(request):
+            response = await execute_cards_endpoint(request)
+            return [json.loads(line) async for line in response.body_iterator]
+
+        lines = {line["card_id"]: line for line in self._run(run_card_group, test)}
+
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines["card_1"]["status"], "success")
+        self.assertEqual(lines["card_2"], {"card_id": "card_2", "status": "error", "detail": "Code validation failed"})
+        self.assertEqual(lines["card_3"]["status"], "error")
+        self.assertEqual(lines["card_3"]["detail"], "Internal error: worker pool stopped")
+
+    def test_cancel_reports_unfinished_cards(self):
+        """キャンセルすると実行中のデータセットの残りのCardは中断としてエラー行を返す"""
+        blocked = asyncio.Event()
+
+        async def run_card_group(dataset_path, cards, filters, on_result):
+            on_result(0, {"ok": True})
+            if dataset_path == "ds1":
+                blocked.set()
+                await asyncio.sleep(60)
+                on_result(1, {"ok": True})
+
+        async def test(request):
+            response = await execute_cards_endpoint(request)
+            lines = []
+            async for line in response.body_iterator:
+                lines.append(json.loads(line))
+                if len(lines) == 2:
+                    await blocked.wait()
+                    self.assertEqual((await cancel_execution("batch_test"))["status"], "cancelled")
+            return lines
+
+        lines = {line["card_id"]: line for line in self._run(run_card_group, test)}
+
+        self.assertEqual(lines["card_1"]["status"], "success")
+        self.assertEqual(lines["card_2"]["status"], "success")
+        self.assertEqual(lines["card_3"], {"card_id": "card_3", "status": "error", "detail": "Execution cancelled"})
+        self.assertNotIn("batch_test", main.batch_executions)
+
+
+if __name__ == '__main__':
+    unittest.main()
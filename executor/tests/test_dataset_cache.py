@@ -0,0 +1,178 @@
+"""データセットキャッシュのテスト"""
+import asyncio
+import contextlib
+import time
+import unittest
+from unittest.mock import patch
+import pyarrow as pa
+
+from app.dataset_cache import ArrowTableCache, FilteredTableCache, normalize_filters
+from app.parquet_io import filter_table
+from app.runner import _read_parquet
+
+
+def _table(n: int, columns=("a", "b")) -> pa.Table:
+    return pa.table({name: list(range(n)) for name in columns})
+
+
+class TestArrowTableCache(unittest.TestCase):
+    """データセットキャッシュのテスト"""
+    
+    def test_hit_and_miss(self):
+        """格納済みのキーはヒットし、未格納のキーはミスとなる"""
+        cache = ArrowTableCache(max_bytes=1024 * 1024)
+        table = _table(10)
+        self.assertTrue(cache.put("k1", table, ["a", "b"]))
+        
+        self.assertIs(cache.get("k1"), table)
+        self.assertIsNone(cache.get("k2"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+    
+    def test_partial_columns(self):
+        """一部の列のみ保持するエントリは、保持している列の要求にのみヒットする"""
+        cache = ArrowTableCache(max_bytes=1024 * 1024)
+        cache.put("k1", _table(10, columns=("a",)), ["a", "b"])
+        
+        self.assertIsNotNone(cache.get("k1", ["a"]))
+        self.assertIsNotNone(cache.get("k1", ["a", "missing"]))
+        self.assertIsNone(cache.get("k1", ["a", "b"]))
+        self.assertIsNone(cache.get("k1"))
+    
+    def test_lru_eviction(self):
+        """上限を超えると最も古く使われたエントリから削除される"""
+        table = _table(100)
+        cache = ArrowTableCache(max_bytes=table.nbytes * 2)
+        cache.put("k1", table, ["a", "b"])
+        cache.put("k2", table, ["a", "b"])
+        cache.get("k1")
+        cache.put("k3", table, ["a", "b"])
+        
+        self.assertIsNotNone(cache.get("k1"))
+        self.assertIsNone(cache.get("k2"))
+        self.assertIsNotNone(cache.get("k3"))
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["bytes"], table.nbytes * 2)
+    
+    def test_oversized_table_not_cached(self):
+        """上限より大きいテーブルや無効時は格納されない"""
+        table = _table(100)
+        self.assertFalse(ArrowTableCache(max_bytes=table.nbytes - 1).put("k1", table, ["a", "b"]))
+        self.assertFalse(ArrowTableCache(max_bytes=0).put("k1", table, ["a", "b"]))
+
+
+class TestFilteredTableCache(unittest.TestCase):
+    """フィルタ適用済みテーブルのキャッシュのテスト"""
+    
+    def test_normalize_filters(self):
+        """キーの順序やリスト内の値の順序が異なっても同じ条件として扱う"""
+        self.assertEqual(
+            normalize_filters({"a": [2, 1], "b": {"start": 1, "end": 5}}),
+            normalize_filters({"b": {"end": 5, "start": 1}, "a": [1, 2]}),
+        )
+        self.assertNotEqual(normalize_filters({"a": [1]}), normalize_filters({"a": [2]}))
+    
+    def test_hit_with_same_filters(self):
+        """同じデータセット・同じフィルタ条件の場合のみヒットする"""
+        cache = FilteredTableCache(max_bytes=1024 * 1024, ttl_seconds=60)
+        table = _table(10)
+        self.assertTrue(cache.put("k1", {"a": [1, 2]}, None, table))
+        
+        self.assertIs(cache.get("k1", {"a": [2, 1]}), table)
+        self.assertIsNone(cache.get("k1", {"a": [1]}))
+        self.assertIsNone(cache.get("k2", {"a": [1, 2]}))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+    
+    def test_partial_columns(self):
+        """一部の列で格納したエントリは、その列の範囲内の要求にのみヒットする"""
+        cache = FilteredTableCache(max_bytes=1024 * 1024, ttl_seconds=60)
+        cache.put("k1", {"a": 1}, ["a", "b"], _table(10))
+        
+        self.assertEqual(cache.get("k1", {"a": 1}, ["b", "a"]).column_names, ["a", "b"])
+        self.assertEqual(cache.get("k1", {"a": 1}, ["b"]).column_names, ["b"])
+        self.assertIsNone(cache.get("k1", {"a": 1}, ["a", "c"]))
+        self.assertIsNone(cache.get("k1", {"a": 1}))
+    
+    def test_expiration(self):
+        """TTLを過ぎたエントリはヒットしない"""
+        cache = FilteredTableCache(max_bytes=1024 * 1024, ttl_seconds=60)
+        cache.put("k1", {"a": 1}, None, _table(10))
+        
+        with patch("app.dataset_cache.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get("k1", {"a": 1}))
+        self.assertEqual(cache.stats()["expirations"], 1)
+        self.assertEqual(cache.stats()["bytes"], 0)
+    
+    def test_eviction(self):
+        """上限を超えると最も古く使われたエントリから削除される"""
+        table = _table(100)
+        cache = FilteredTableCache(max_bytes=table.nbytes * 2, ttl_seconds=60)
+        cache.put("k1", {"a": 1}, None, table)
+        cache.put("k1", {"a": 2}, None, table)
+        cache.get("k1", {"a": 1})
+        cache.put("k1", {"a": 3}, None, table)
+        
+        self.assertIsNotNone(cache.get("k1", {"a": 1}))
+        self.assertIsNone(cache.get("k1", {"a": 2}))
+        self.assertEqual(cache.stats()["evictions"], 1)
+    
+    def test_disabled(self):
+        """TTLが0の場合は格納しない"""
+        cache = FilteredTableCache(max_bytes=1024 * 1024, ttl_seconds=0)
+        self.assertFalse(cache.put("k1", {"a": 1}, None, _table(10)))
+        self.assertIsNone(cache.get("k1", {"a": 1}))
+
+
+class _FakeParquetSource:
+    """読み込み時の引数を記録するParquetファイル"""
+    
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.schema = table.schema
+        self.reads = []
+    
+    def uncompressed_size(self, columns=None) -> int:
+        return self.table.nbytes
+    
+    async def read(self, columns=None, filters=None) -> pa.Table:
+        self.reads.append((columns, filters))
+        return filter_table(self.table, columns, filters)
+
+
+class TestReadParquet(unittest.TestCase):
+    """デコード済みテーブルのキャッシュを使った読み込みのテスト"""
+    
+    def setUp(self):
+        self.source = _FakeParquetSource(_table(10))
+        self.cache = ArrowTableCache(max_bytes=1024 * 1024)
+    
+    def _read(self, columns, filters):
+        @contextlib.asynccontextmanager
+        async def open_parquet(s3_client, bucket_name, key):
+            yield self.source
+        
+        with patch("app.runner.dataset_cache", self.cache), patch("app.runner._open_parquet", open_parquet):
+            return asyncio.run(_read_parquet(None, "bucket", "data.parquet", columns, filters))
+    
+    def test_filtered_read_prunes_and_is_not_cached(self):
+        """キャッシュにない場合、フィルタ指定時はフィルタを渡して読み込み、テーブルはキャッシュしない"""
+        table = self._read(["a"], {"b": {"start": 2, "end": 3}})
+        
+        self.assertEqual(table.column("a").to_pylist(), [2, 3])
+        self.assertEqual(self.source.reads, [(["a"], {"b": {"start": 2, "end": 3}})])
+        self.assertIsNone(self.cache.get("data.parquet", ["a"]))
+    
+    def test_unfiltered_read_is_cached(self):
+        """フィルタなしで読み込んだテーブルはキャッシュされ、以降のフィルタ指定の読み込みに使われる"""
+        self._read(["a", "b"], {})
+        table = self._read(["a"], {"b": 5})
+        
+        self.assertEqual(table.column("a").to_pylist(), [5])
+        self.assertEqual(self.source.reads, [(["a", "b"], None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
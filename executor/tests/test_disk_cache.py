@@ -0,0 +1,111 @@
+"""ディスクキャッシュのテスト"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from app.disk_cache import ParquetDiskCache
+
+
+class _FakeBody:
+    def __init__(self, data: bytes):
+        self._data = data
+    
+    async def read(self, amt=None) -> bytes:
+        chunk, self._data = self._data[:amt], self._data[amt:]
+        return chunk
+
+
+class _FakeS3Client:
+    """ダウンロード回数を記録するインメモリS3クライアント"""
+    
+    def __init__(self, objects):
+        self.objects = objects
+        self.downloads = 0
+    
+    async def head_object(self, Bucket, Key):
+        data = self.objects[Key]
+        return {"ETag": f'"{hash(data)}"', "ContentLength": len(data)}
+    
+    async def get_object(self, Bucket, Key):
+        self.downloads += 1
+        return {"Body": _FakeBody(self.objects[Key])}
+
+
+class TestParquetDiskCache(unittest.TestCase):
+    """ディスクキャッシュのテスト"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = _FakeS3Client({
+            "a.parquet": b"a" * 100,
+            "b.parquet": b"b" * 100,
+            "c.parquet": b"c" * 100,
+            "a-copy.parquet": b"a" * 100,
+        })
+    
+    def _get(self, cache, key):
+        async def get():
+            async with cache.open(self.client, "bucket", key) as path:
+                return path
+        return asyncio.run(get())
+    
+    def test_download_once(self):
+        """一度ダウンロードしたファイルは再利用され、同一内容のオブジェクトは共有される"""
+        cache = ParquetDiskCache(self.directory, max_bytes=1000)
+        path = self._get(cache, "a.parquet")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"a" * 100)
+        
+        self.assertEqual(self._get(cache, "a.parquet"), path)
+        self.assertEqual(self._get(cache, "a-copy.parquet"), path)
+        self.assertEqual(self.client.downloads, 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+    
+    def test_lru_eviction(self):
+        """上限を超えると最も古く使われたファイルから削除される"""
+        cache = ParquetDiskCache(self.directory, max_bytes=200)
+        path_a = self._get(cache, "a.parquet")
+        path_b = self._get(cache, "b.parquet")
+        self._get(cache, "a.parquet")
+        self._get(cache, "c.parquet")
+        
+        self.assertTrue(os.path.exists(path_a))
+        self.assertFalse(os.path.exists(path_b))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["bytes"], 200)
+    
+    def test_pinned_file_is_not_evicted(self):
+        """読み込み中のファイルは上限を超えても削除されず、読み込みが終わったファイルから削除される"""
+        cache = ParquetDiskCache(self.directory, max_bytes=100)
+        
+        async def run():
+            async with cache.open(self.client, "bucket", "a.parquet") as path_a:
+                async with cache.open(self.client, "bucket", "b.parquet") as path_b:
+                    self.assertEqual(cache.stats()["bytes"], 200)
+                with open(path_a, "rb") as f:
+                    self.assertEqual(f.read(), b"a" * 100)
+            return path_a, path_b
+        
+        path_a, path_b = asyncio.run(run())
+        self.assertTrue(os.path.exists(path_a))
+        self.assertFalse(os.path.exists(path_b))
+        self.assertEqual(cache.stats()["bytes"], 100)
+    
+    def test_reuse_after_restart(self):
+        """プロセス再起動後も既存のファイルを再利用する"""
+        self._get(ParquetDiskCache(self.directory, max_bytes=1000), "a.parquet")
+        
+        cache = ParquetDiskCache(self.directory, max_bytes=1000)
+        self._get(cache, "a.parquet")
+        self.assertEqual(self.client.downloads, 1)
+        self.assertEqual(cache.stats()["files"], 1)
+    
+    def test_disabled(self):
+        """保存先が未設定または上限が0の場合は無効"""
+        self.assertFalse(ParquetDiskCache(None, max_bytes=1000).enabled)
+        self.assertFalse(ParquetDiskCache(self.directory, max_bytes=0).enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""Parquet部分読み込みのテスト"""
+import asyncio
+import io
+import unittest
+from unittest.mock import patch
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.parquet_io import (
+    FOOTER_READ_SIZE,
+    _coalesce_ranges,
+    column_chunk_ranges,
+    filters_to_expression,
+    read_parquet_columns,
+)
+
+
+class _FakeBody:
+    def __init__(self, data: bytes):
+        self._data = data
+    
+    async def read(self) -> bytes:
+        return self._data
+
+
+class _FakeS3Client:
+    """Range GETに対応したインメモリS3クライアント"""
+    
+    def __init__(self, objects):
+        self.objects = objects
+        self.requested_bytes = 0
+    
+    async def get_object(self, Bucket, Key, Range=None):
+        data = self.objects[Key]
+        if Range is None:
+            self.requested_bytes += len(data)
+            return {"Body": _FakeBody(data)}
+        
+        spec = Range[len("bytes="):]
+        if spec.startswith("-"):
+            start = max(len(data) - int(spec[1:]), 0)
+            end = len(data) - 1
+        else:
+            start, end = (int(v) for v in spec.split("-"))
+            end = min(end, len(data) - 1)
+        body = data[start:end + 1]
+        self.requested_bytes += len(body)
+        return {"Body": _FakeBody(body), "ContentRange": f"bytes {start}-{end}/{len(data)}"}
+
+
+def _parquet_bytes(table: pa.Table, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, **kwargs)
+    return buffer.getvalue()
+
+
+class TestParquetIO(unittest.TestCase):
+    """Parquet部分読み込みのテスト"""
+    
+    def setUp(self):
+        n = 50000
+        self.table = pa.table({
+            "category": [f"c{i % 10}" for i in range(n)],
+            "value": list(range(n)),
+            "payload": [f"payload-{i}-" + "x" * 40 for i in range(n)],
+        })
+        self.data = _parquet_bytes(self.table, row_group_size=10000)
+        self.client = _FakeS3Client({"data.parquet": self.data})
+    
+    def test_coalesce_ranges(self):
+        """近接する範囲は結合され、離れた範囲は分割される"""
+        merged = _coalesce_ranges([(100, 200), (0, 50), (10_000_000, 10_000_100)])
+        self.assertEqual(merged, [(0, 200), (10_000_000, 10_000_100)])
+    
+    def test_column_chunk_ranges(self):
+        """指定列の列チャンクのみが対象となる"""
+        metadata = pq.ParquetFile(io.BytesIO(self.data)).metadata
+        ranges = column_chunk_ranges(metadata, ["value"])
+        self.assertEqual(len(ranges), metadata.num_row_groups)
+        self.assertLess(sum(end - start for start, end in ranges), len(self.data) / 2)
+    
+    def test_read_projected_columns(self):
+        """指定列のみが読み込まれ、不要な列チャンクは取得されない"""
+        # テスト用の小さいファイルでは範囲が結合されないようにする
+        with patch("app.parquet_io.RANGE_COALESCE_GAP", 0):
+            table = asyncio.run(read_parquet_columns(self.client, "bucket", "data.parquet", ["value", "missing"]))
+        self.assertEqual(table.column_names, ["value"])
+        self.assertTrue(table.column("value").equals(self.table.column("value")))
+        metadata = pq.ParquetFile(io.BytesIO(self.data)).metadata
+        value_bytes = sum(end - start for start, end in column_chunk_ranges(metadata, ["value"]))
+        self.assertLessEqual(self.client.requested_bytes, value_bytes + FOOTER_READ_SIZE)
+    
+    def test_read_all_columns(self):
+        """列指定なしの場合はファイル全体を読み込む"""
+        table = asyncio.run(read_parquet_columns(self.client, "bucket", "data.parquet"))
+        self.assertTrue(table.equals(self.table))
+    
+    def test_read_large_footer(self):
+        """フッターが初回取得サイズを超える場合も読み込める"""
+        wide = pa.table({f"col_{i}": list(range(3)) for i in range(2000)})
+        client = _FakeS3Client({"wide.parquet": _parquet_bytes(wide)})
+        table = asyncio.run(read_parquet_columns(client, "bucket", "wide.parquet", ["col_1999"]))
+        self.assertEqual(table.column("col_1999").to_pylist(), [0, 1, 2])
+
+    
+    def test_filters_to_expression(self):
+        """リスト・範囲・単一値のフィルタが列の型に合わせて変換される"""
+        expression = filters_to_expression(
+            {"category": ["c1", "c2"], "value": {"start": 10, "end": 20}, "missing": 1},
+            self.table.schema,
+        )
+        result = self.table.filter(expression)
+        self.assertEqual(result.column("value").to_pylist(), [11, 12])
+        
+        self.assertIsNone(filters_to_expression({"missing": 1, "value": {"start": 1}}, self.table.schema))
+        
+        # 列の型に変換できない値はどの行にも一致しない
+        self.assertEqual(self.table.filter(filters_to_expression({"value": "abc"}, self.table.schema)).num_rows, 0)
+        self.assertEqual(self.table.filter(filters_to_expression({"value": ["abc", 5]}, self.table.schema)).num_rows, 1)
+        self.assertEqual(self.table.filter(filters_to_expression({"value": {"start": "abc", "end": 20}}, self.table.schema)).num_rows, 0)
+        
+        # pandasでの比較と同様に、文字列の"5"は整数列の5に一致しない
+        self.assertEqual(self.table.filter(filters_to_expression({"value": "5"}, self.table.schema)).num_rows, 0)
+        self.assertEqual(self.table.filter(filters_to_expression({"value": ["5", 6]}, self.table.schema)).num_rows, 1)
+        self.assertEqual(self.table.filter(filters_to_expression({"value": {"start": "10", "end": 20}}, self.table.schema)).num_rows, 0)
+        self.assertEqual(self.table.filter(filters_to_expression({"category": 1}, self.table.schema)).num_rows, 0)
+        
+        # 整数列に対する小数の範囲は切り捨てずに比較する
+        result = self.table.filter(filters_to_expression({"value": {"start": 9.5, "end": 12}}, self.table.schema))
+        self.assertEqual(result.column("value").to_pylist(), [10, 11, 12])
+        self.assertEqual(self.table.filter(filters_to_expression({"value": 1.5}, self.table.schema)).num_rows, 0)
+        self.assertEqual(self.table.filter(filters_to_expression({"value": 2.0}, self.table.schema)).num_rows, 1)
+        
+        # 小数列に対する整数の範囲
+        floats = pa.table({"amount": [1.0, 2.5, 3.0, 10.0, 11.0]})
+        result = floats.filter(filters_to_expression({"amount": {"start": 2, "end": 10}}, floats.schema))
+        self.assertEqual(result.column("amount").to_pylist(), [2.5, 3.0, 10.0])
+        
+        # 日付時刻の列に対する文字列は日付時刻として比較する
+        dates = pa.table({"ts": pa.array([0, 86400], type=pa.timestamp("s"))})
+        self.assertEqual(dates.filter(filters_to_expression({"ts": "1970-01-02"}, dates.schema)).num_rows, 1)
+    
+    def test_read_with_filters_prunes_row_groups(self):
+        """統計情報で該当しない行グループは取得されない"""
+        with patch("app.parquet_io.RANGE_COALESCE_GAP", 0):
+            table = asyncio.run(read_parquet_columns(
+                self.client, "bucket", "data.parquet", ["payload"],
+                filters={"value": {"start": 100, "end": 199}, "category": "c3"},
+            ))
+        self.assertEqual(table.column_names, ["payload"])
+        self.assertEqual(table.num_rows, 10)
+        self.assertTrue(all(p.startswith("payload-1") for p in table.column("payload").to_pylist()))
+        
+        metadata = pq.ParquetFile(io.BytesIO(self.data)).metadata
+        first_row_group = sum(end - start for start, end in column_chunk_ranges(metadata, self.table.column_names, [0]))
+        self.assertLessEqual(self.client.requested_bytes, first_row_group + FOOTER_READ_SIZE)
+    
+    def test_read_with_float_range_on_integer_column(self):
+        """整数列に対する小数の範囲でも行グループの絞り込みと行のフィルタが行われる"""
+        table = asyncio.run(read_parquet_columns(
+            self.client, "bucket", "data.parquet", ["value"],
+            filters={"value": {"start": 99.5, "end": 101.5}},
+        ))
+        self.assertEqual(table.column("value").to_pylist(), [100, 101])
+    
+    def test_read_with_filters_no_match(self):
+        """該当する行グループがない場合はスキーマを維持した空のテーブルを返す"""
+        table = asyncio.run(read_parquet_columns(
+            self.client, "bucket", "data.parquet", filters={"value": -1},
+        ))
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.schema, self.table.schema)
+
+
+if __name__ == "__main__":
+    unittest.main()
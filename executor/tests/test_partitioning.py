@@ -0,0 +1,90 @@
+"""パーティション分割のテスト"""
+import unittest
+import datetime
+from unittest import mock
+import pyarrow as pa
+
+from app.partitioning import (
+    NULL_PARTITION,
+    is_partitioned_path,
+    partition_key,
+    split_table,
+    partition_object_key,
+    group_partition_objects,
+    select_partitions,
+)
+
+
+class TestPartitioning(unittest.TestCase):
+    """パーティション分割のテスト"""
+    
+    def test_is_partitioned_path(self):
+        """プレフィックスのパスはパーティション分割と判定される"""
+        self.assertTrue(is_partitioned_path("datasets/ds1/partitions/"))
+        self.assertFalse(is_partitioned_path("datasets/ds1/data.parquet"))
+    
+    def test_partition_key(self):
+        """日付形式の値のみパーティションキーに変換される"""
+        self.assertEqual(partition_key("2024-01-01 10:00:00"), "2024-01-01")
+        self.assertEqual(partition_key(datetime.date(2024, 1, 2)), "2024-01-02")
+        self.assertIsNone(partition_key("A"))
+        self.assertIsNone(partition_key(5))
+    
+    def test_split_table(self):
+        """日付ごとに分割され、NULLは既定パーティションに入る"""
+        table = pa.table({
+            "date": ["2024-01-01", "2024-01-01T12:00", "2024-01-02", None],
+            "value": [1, 2, 3, 4],
+        })
+        partitions = dict(split_table(table, "date"))
+        
+        self.assertEqual(set(partitions), {"2024-01-01", "2024-01-02", NULL_PARTITION})
+        self.assertEqual(partitions["2024-01-01"].column("value").to_pylist(), [1, 2])
+    
+    def test_split_table_rejects_non_dates(self):
+        """日付形式でない値を含むカラムでは分割しない"""
+        table = pa.table({"user_id": ["u1", "u2"], "value": [1, 2]})
+        
+        with self.assertRaisesRegex(ValueError, "must contain dates"):
+            split_table(table, "user_id")
+    
+    def test_split_table_limits_partition_count(self):
+        """パーティション数が上限を超える場合はエラー"""
+        table = pa.table({"date": ["2024-01-01", "2024-01-02", "2024-01-03"]})
+        
+        with mock.patch("app.partitioning.MAX_PARTITIONS", 2):
+            with self.assertRaisesRegex(ValueError, "Too many partitions"):
+                split_table(table, "date")
+    
+    def test_object_key_round_trip(self):
+        """S3キーの生成と解析が対応する"""
+        base_path = "datasets/ds1/partitions/"
+        keys = [
+            partition_object_key(base_path, "date", "2024-01-02", part=1),
+            partition_object_key(base_path, "date", "2024-01-01"),
+            base_path + "_SUCCESS",
+        ]
+        column, partitions = group_partition_objects(base_path, keys)
+        
+        self.assertEqual(column, "date")
+        self.assertEqual(partitions["2024-01-02"], [base_path + "date=2024-01-02/part-00001.parquet"])
+        self.assertEqual(len(partitions), 2)
+    
+    def test_select_partitions(self):
+        """フィルタ値に該当するパーティションのみ選択される"""
+        keys = ["2024-01-01", "2024-01-02", "2024-01-03", NULL_PARTITION]
+        
+        self.assertEqual(select_partitions(keys, None), keys)
+        self.assertEqual(select_partitions(keys, "2024-01-02"), ["2024-01-02"])
+        self.assertEqual(select_partitions(keys, ["2024-01-01", "2024-01-03"]), ["2024-01-01", "2024-01-03"])
+        self.assertEqual(
+            select_partitions(keys, {"start": "2024-01-02 12:00", "end": "2024-01-03"}),
+            ["2024-01-02", "2024-01-03"],
+        )
+        # 日付形式でないフィルタ値では絞り込まない
+        self.assertEqual(select_partitions(keys, "A"), keys)
+        self.assertEqual(select_partitions(keys, {"start": 1, "end": 2}), keys)
+
+
+if __name__ == '__main__':
+    unittest.main()
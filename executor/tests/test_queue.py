@@ -33,6 +33,176 @@ class TestExecutionQueue(unittest.TestCase):
         
         asyncio.run(test())
 
+    
+    def test_submit_returns_result(self):
+        """submitの戻り値をawaitすると実行結果が得られ、タスクは1回だけ実行される"""
+        queue = ExecutionQueue(max_concurrent=2, queue_size=5)
+        calls = []
+        
+        async def func():
+            calls.append(1)
+            return "done"
+        
+        async def test():
+            queue.start()
+            try:
+                future = await queue.submit("task1", func)
+                self.assertEqual(await future, "done")
+            finally:
+                queue.stop()
+        
+        asyncio.run(test())
+        self.assertEqual(len(calls), 1)
+    
+    def test_submit_propagates_exception(self):
+        """タスクで発生した例外はsubmitの戻り値をawaitした側に送出される"""
+        queue = ExecutionQueue(max_concurrent=1, queue_size=5)
+        
+        async def func():
+            raise ValueError("failed")
+        
+        async def test():
+            queue.start()
+            try:
+                future = await queue.submit("task1", func)
+                with self.assertRaises(ValueError):
+                    await future
+            finally:
+                queue.stop()
+        
+        asyncio.run(test())
+    
+    def test_max_concurrent_enforced(self):
+        """同時実行数がmax_concurrentを超えない"""
+        queue = ExecutionQueue(max_concurrent=2, queue_size=10)
+        running = 0
+        max_running = 0
+        
+        async def func():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        async def test():
+            queue.start()
+            try:
+                futures = [await queue.submit(f"task{i}", func) for i in range(6)]
+                await asyncio.gather(*futures)
+            finally:
+                queue.stop()
+        
+        asyncio.run(test())
+        self.assertEqual(max_running, 2)
+
+    
+    def test_slot_handed_off_immediately(self):
+        """実行枠が空くと待機中のタスクがすぐに実行される"""
+        queue = ExecutionQueue(max_concurrent=1, queue_size=20)
+        
+        async def func():
+            await asyncio.sleep(0)
+        
+        async def test():
+            queue.start()
+            try:
+                futures = [await queue.submit(f"task{i}", func) for i in range(20)]
+                await asyncio.wait_for(asyncio.gather(*futures), timeout=0.5)
+            finally:
+                queue.stop()
+        
+        asyncio.run(test())
+    
+    def test_stats(self):
+        """キューの待機数と待ち時間・実行時間が集計される"""
+        queue = ExecutionQueue(max_concurrent=1, queue_size=10)
+        
+        async def func():
+            await asyncio.sleep(0.02)
+        
+        async def failing():
+            raise ValueError("failed")
+        
+        async def test():
+            futures = [await queue.submit(f"task{i}", func) for i in range(2)]
+            futures.append(await queue.submit("task2", failing))
+            self.assertEqual(queue.stats()["queue_depth"], 3)
+            
+            queue.start()
+            try:
+                await asyncio.gather(*futures, return_exceptions=True)
+            finally:
+                queue.stop()
+        
+        asyncio.run(test())
+        stats = queue.stats()
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["completed"], 2)
+        self.assertEqual(stats["failed"], 1)
+        self.assertGreaterEqual(stats["run_seconds_max"], 0.02)
+        self.assertGreaterEqual(stats["wait_seconds_max"], 0.04)
+
+    
+    def test_cancel_pending_task(self):
+        """待機中のタスクをキャンセルすると実行されない"""
+        queue = ExecutionQueue(max_concurrent=1, queue_size=10)
+        calls = []
+        
+        async def func():
+            calls.append(1)
+        
+        async def test():
+            future = await queue.submit("task1", func)
+            self.assertTrue(queue.cancel("task1"))
+            self.assertFalse(queue.cancel("unknown"))
+            
+            queue.start()
+            try:
+                with self.assertRaises(asyncio.CancelledError):
+                    await future
+                await (await queue.submit("task2", func))
+            finally:
+                queue.stop()
+        
+        asyncio.run(test())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(queue.tasks, {})
+    
+    def test_cancel_running_task(self):
+        """実行中のタスクをキャンセルすると中断され、実行枠が解放される"""
+        queue = ExecutionQueue(max_concurrent=1, queue_size=10)
+        started = None
+        interrupted = []
+        
+        async def slow():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                interrupted.append(1)
+                raise
+        
+        async def fast():
+            return "done"
+        
+        async def test():
+            nonlocal started
+            started = asyncio.Event()
+            queue.start()
+            try:
+                future = await queue.submit("task1", slow)
+                await started.wait()
+                self.assertTrue(queue.cancel("task1"))
+                result = await asyncio.wait_for(await queue.submit("task2", fast), timeout=1)
+                self.assertEqual(result, "done")
+            finally:
+                queue.stop()
+        
+        asyncio.run(test())
+        self.assertEqual(interrupted, [1])
+        self.assertEqual(queue.tasks, {})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,7 @@
 """Sandboxのテスト"""
+import builtins
 import unittest
-from app.sandbox import sandbox_context, validate_code, SandboxError
+from app.sandbox import build_safe_builtins, sandbox_context, validate_code, SandboxError
 
 
 class TestSandbox(unittest.TestCase):
@@ -46,6 +47,41 @@ class TestSandbox(unittest.TestCase):
         except SandboxError:
             self.fail("SandboxError should not be raised for whitelisted module")
 
+    
+    def test_safe_builtins_allow_whitelisted_import(self):
+        """ユーザーコードのimport文でホワイトリストのモジュールをimportできる"""
+        namespace = {"__builtins__": build_safe_builtins()}
+        with sandbox_context():
+            exec("import json\nfrom collections import Counter\nresult = json.dumps(dict(Counter('aab')))", namespace)
+        self.assertEqual(namespace["result"], '{"a": 2, "b": 1}')
+    
+    def test_safe_builtins_block_disallowed_import(self):
+        """ユーザーコードのimport文で許可されていないモジュールはimportできない"""
+        namespace = {"__builtins__": build_safe_builtins()}
+        with self.assertRaises(SandboxError):
+            exec("import os", namespace)
+
+    
+    def test_sandbox_context_allows_imports_inside_libraries(self):
+        """インストール済みのライブラリ内部からのimportは許可し、それ以外はホワイトリストでチェックする"""
+        import pandas.io.common
+        library_globals = {"__name__": "pandas.io.common", "__file__": pandas.io.common.__file__}
+        with sandbox_context():
+            builtins.__import__("tabnanny", library_globals)
+            with self.assertRaises(SandboxError):
+                builtins.__import__("os", {"__name__": "app.card", "__file__": "/app/card.py"})
+    
+    def test_safe_builtins_import_plotly(self):
+        """ユーザーコードで許可ライブラリの可視化モジュールを使える"""
+        namespace = {"__builtins__": build_safe_builtins()}
+        with sandbox_context():
+            exec(
+                "import plotly.express as px\n"
+                "html = px.bar(x=[1, 2], y=[3, 4]).to_html(include_plotlyjs=False, full_html=False)",
+                namespace,
+            )
+        self.assertIn("<div", namespace["html"])
+
 
 if __name__ == '__main__':
     unittest.main()
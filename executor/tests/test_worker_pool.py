@@ -0,0 +1,169 @@
+"""ワーカープロセスプールのテスト"""
+import asyncio
+import os
+import time
+import unittest
+import pyarrow as pa
+
+from app.worker_pool import (
+    WORKER_PRELOAD_MODULES,
+    WorkerPool,
+    WorkerCrashedError,
+    WorkerTimeoutError,
+    share_table,
+    open_shared_table,
+    remove_shared_table,
+)
+
+
+def _pid() -> int:
+    return os.getpid()
+
+
+def _row_count(path: str) -> int:
+    return open_shared_table(path).num_rows
+
+
+def _sleep(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def _raise() -> None:
+    raise ValueError("failed in worker")
+
+
+def _exit() -> None:
+    os._exit(1)
+
+
+def _imported(name: str) -> bool:
+    import sys
+    return name in sys.modules
+
+
+def _allocate(mb: int) -> int:
+    data = bytearray(mb * 1024 * 1024)
+    return len(data)
+
+
+class TestWorkerPool(unittest.TestCase):
+    """ワーカープロセスプールのテスト"""
+    
+    def _run(self, pool, coro_func):
+        async def test():
+            try:
+                return await coro_func()
+            finally:
+                pool.stop()
+        return asyncio.run(test())
+    
+    def test_runs_in_separate_processes(self):
+        """関数はワーカープロセスで並行して実行される"""
+        pool = WorkerPool(size=2)
+        
+        async def test():
+            return await asyncio.gather(*(pool.run(_pid) for _ in range(4)))
+        
+        pids = self._run(pool, test)
+        self.assertNotIn(os.getpid(), pids)
+        self.assertLessEqual(len(set(pids)), 2)
+    
+    def test_shared_table(self):
+        """共有メモリ経由でテーブルを受け渡せる"""
+        pool = WorkerPool(size=1)
+        path = share_table(pa.table({"a": list(range(1000))}))
+        try:
+            self.assertEqual(self._run(pool, lambda: pool.run(_row_count, path=path)), 1000)
+        finally:
+            remove_shared_table(path)
+        self.assertFalse(os.path.exists(path))
+    
+    def test_exception_propagates(self):
+        """ワーカーで発生した例外は呼び出し元に送出される"""
+        pool = WorkerPool(size=1)
+        with self.assertRaises(ValueError):
+            self._run(pool, lambda: pool.run(_raise))
+    
+    def test_timeout_replaces_worker(self):
+        """応答しないワーカーは強制終了され、新しいワーカーに入れ替わる"""
+        pool = WorkerPool(size=1)
+        
+        async def test():
+            first = await pool.run(_pid)
+            with self.assertRaises(WorkerTimeoutError):
+                await pool.run(_sleep, timeout=0.5, seconds=10)
+            second = await pool.run(_pid)
+            return first, second
+        
+        first, second = self._run(pool, test)
+        self.assertNotEqual(first, second)
+    
+    def test_crash_replaces_worker(self):
+        """異常終了したワーカーは新しいワーカーに入れ替わる"""
+        pool = WorkerPool(size=1)
+        
+        async def test():
+            with self.assertRaises(WorkerCrashedError):
+                await pool.run(_exit)
+            return await pool.run(_pid)
+        
+        self.assertIsInstance(self._run(pool, test), int)
+
+    
+    def test_preload_modules(self):
+        """事前importしたモジュールはワーカーで読み込み済みになっている"""
+        pool = WorkerPool(size=1, preload_modules=["json", "colorsys"])
+        self.assertTrue(self._run(pool, lambda: pool.run(_imported, name="colorsys")))
+    
+    def test_preload_runner(self):
+        """ワーカーで実行する関数の定義元（app.runner）も事前importされる"""
+        self.assertIn("app.runner", WORKER_PRELOAD_MODULES)
+        pool = WorkerPool(size=1, preload_modules=["app.runner"])
+        self.assertTrue(self._run(pool, lambda: pool.run(_imported, name="app.runner")))
+    
+    def test_recycle_after_max_tasks(self):
+        """上限回数実行したワーカーは入れ替わる"""
+        pool = WorkerPool(size=1, max_tasks_per_worker=2)
+        
+        async def test():
+            return [await pool.run(_pid) for _ in range(4)]
+        
+        pids = self._run(pool, test)
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+        self.assertEqual(pids[2], pids[3])
+        self.assertEqual(pool.recycled, 2)
+    
+    def test_recycle_after_max_rss(self):
+        """最大RSSが上限を超えたワーカーは入れ替わる"""
+        pool = WorkerPool(size=1, max_rss_mb=1000)
+        
+        async def test():
+            first = await pool.run(_pid)
+            await pool.run(_allocate, mb=1100)
+            return first, await pool.run(_pid)
+        
+        first, second = self._run(pool, test)
+        self.assertNotEqual(first, second)
+        self.assertEqual(pool.recycled, 1)
+
+    
+    def test_resource_usage(self):
+        """実行ごとの経過時間・CPU時間・ピークRSSが計測される"""
+        pool = WorkerPool(size=1)
+        
+        async def test():
+            _, large = await pool.run_measured(_allocate, mb=200)
+            _, small = await pool.run_measured(_sleep, seconds=0.1)
+            return large, small
+        
+        large, small = self._run(pool, test)
+        self.assertGreaterEqual(large["peak_rss_bytes"], 200 * 1024 * 1024)
+        self.assertGreaterEqual(small["wall_seconds"], 0.1)
+        self.assertLess(small["cpu_seconds"], small["wall_seconds"])
+        # ピークRSSは実行ごとに計測される（前回の実行の値を引き継がない）
+        self.assertLess(small["peak_rss_bytes"], large["peak_rss_bytes"])
+
+
+if __name__ == '__main__':
+    unittest.main()
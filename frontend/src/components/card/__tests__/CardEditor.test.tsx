@@ -72,9 +72,8 @@ describe('CardEditor', () => {
         },
       ],
       pagination: {
-        total: 1,
         limit: 100,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
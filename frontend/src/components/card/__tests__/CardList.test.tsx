@@ -1,5 +1,5 @@
 import { describe, it, expect, vi } from 'vitest'
-import { render, screen } from '@testing-library/react'
+import { render, screen, fireEvent } from '@testing-library/react'
 import CardList from '../CardList'
 import type { Card } from '../../../lib/cards'
 
@@ -43,4 +43,22 @@ describe('CardList', () => {
     expect(screen.getByText('Test Card')).toBeInTheDocument()
     expect(screen.getByText('Dataset ID: ds1')).toBeInTheDocument()
   })
+
+  it('renders cursor pager and requests next page', () => {
+    const onPageChange = vi.fn()
+    render(
+      <CardList
+        cards={mockCards}
+        onEdit={vi.fn()}
+        onDelete={vi.fn()}
+        pagination={{ limit: 20, next_cursor: 'cursor1', has_next: true }}
+        page={0}
+        onPageChange={onPageChange}
+      />
+    )
+    expect(screen.getByText('1 ページ')).toBeInTheDocument()
+    expect(screen.getByText('前へ')).toBeDisabled()
+    fireEvent.click(screen.getByText('次へ'))
+    expect(onPageChange).toHaveBeenCalledWith(1)
+  })
 })
@@ -1,14 +1,17 @@
 import { Link } from 'react-router-dom'
-import type { Dataset, DatasetListResponse } from '../../lib/datasets'
+import type { Dataset } from '../../lib/datasets'
+import type { CursorPagination } from '../../types/pagination'
 
 interface DatasetListProps {
   datasets: Dataset[]
   onDelete: (dataset_id: string) => void
-  pagination?: DatasetListResponse['pagination']
+  pagination?: CursorPagination
+  /** 現在のページ（0始まり） */
+  page?: number
   onPageChange: (page: number) => void
 }
 
-export default function DatasetList({ datasets, onDelete, pagination, onPageChange }: DatasetListProps) {
+export default function DatasetList({ datasets, onDelete, pagination, page = 0, onPageChange }: DatasetListProps) {
   if (datasets.length === 0) {
     return (
       <div className="text-center text-gray-500 py-12 bg-white rounded-lg shadow-sm">
@@ -54,21 +57,18 @@ export default function DatasetList({ datasets, onDelete, pagination, onPageChan
         ))}
       </div>
 
-      {pagination && pagination.total > pagination.limit && (
+      {pagination && (page > 0 || pagination.has_next) && (
         <div className="flex justify-center items-center gap-4">
           <button
-            onClick={() => onPageChange(Math.max(0, Math.floor(pagination.offset / pagination.limit) - 1))}
-            disabled={pagination.offset === 0}
+            onClick={() => onPageChange(page - 1)}
+            disabled={page === 0}
             className="px-4 py-2 border border-gray-300 rounded-md disabled:opacity-50 disabled:cursor-not-allowed hover:bg-gray-50"
           >
             前へ
           </button>
-          <span className="text-sm text-gray-600">
-            {pagination.offset + 1} - {Math.min(pagination.offset + pagination.limit, pagination.total)} /{' '}
-            {pagination.total}
-          </span>
+          <span className="text-sm text-gray-600">{page + 1} ページ</span>
           <button
-            onClick={() => onPageChange(Math.floor(pagination.offset / pagination.limit) + 1)}
+            onClick={() => onPageChange(page + 1)}
             disabled={!pagination.has_next}
             className="px-4 py-2 border border-gray-300 rounded-md disabled:opacity-50 disabled:cursor-not-allowed hover:bg-gray-50"
           >
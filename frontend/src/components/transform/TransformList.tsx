@@ -1,10 +1,13 @@
-import type { Transform, TransformListResponse } from '../../lib/transforms'
+import type { Transform } from '../../lib/transforms'
+import type { CursorPagination } from '../../types/pagination'
 
 interface TransformListProps {
   transforms: Transform[]
   onEdit: (transform: Transform) => void
   onDelete: (transform_id: string) => void
-  pagination?: TransformListResponse['pagination']
+  pagination?: CursorPagination
+  /** 現在のページ（0始まり） */
+  page?: number
   onPageChange: (page: number) => void
 }
 
@@ -13,6 +16,7 @@ export default function TransformList({
   onEdit,
   onDelete,
   pagination,
+  page = 0,
   onPageChange,
 }: TransformListProps) {
   if (transforms.length === 0) {
@@ -60,21 +64,18 @@ export default function TransformList({
         ))}
       </div>
 
-      {pagination && pagination.total > pagination.limit && (
+      {pagination && (page > 0 || pagination.has_next) && (
         <div className="flex justify-center items-center gap-4">
           <button
-            onClick={() => onPageChange(Math.max(0, Math.floor(pagination.offset / pagination.limit) - 1))}
-            disabled={pagination.offset === 0}
+            onClick={() => onPageChange(page - 1)}
+            disabled={page === 0}
             className="px-4 py-2 border border-gray-300 rounded-md disabled:opacity-50 disabled:cursor-not-allowed hover:bg-gray-50"
           >
             前へ
           </button>
-          <span className="text-sm text-gray-600">
-            {pagination.offset + 1} - {Math.min(pagination.offset + pagination.limit, pagination.total)} /{' '}
-            {pagination.total}
-          </span>
+          <span className="text-sm text-gray-600">{page + 1} ページ</span>
           <button
-            onClick={() => onPageChange(Math.floor(pagination.offset / pagination.limit) + 1)}
+            onClick={() => onPageChange(page + 1)}
             disabled={!pagination.has_next}
             className="px-4 py-2 border border-gray-300 rounded-md disabled:opacity-50 disabled:cursor-not-allowed hover:bg-gray-50"
           >
@@ -67,9 +67,8 @@ describe('TransformEditor', () => {
         },
       ],
       pagination: {
-        total: 1,
         limit: 100,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -7,17 +7,20 @@ import CardEditor from '../components/card/CardEditor'
 export default function CardListPage() {
   const [searchQuery, setSearchQuery] = useState('')
   const [page, setPage] = useState(0)
+  // cursors[i] は i+1 ページ目を取得するカーソル
+  const [cursors, setCursors] = useState<string[]>([])
   const [editingCard, setEditingCard] = useState<Card | null>(null)
   const [showCreate, setShowCreate] = useState(false)
   const queryClient = useQueryClient()
   const limit = 20
+  const cursor = page > 0 ? cursors[page - 1] : undefined
 
   const { data, isLoading, error } = useQuery({
-    queryKey: ['cards', searchQuery, page],
+    queryKey: ['cards', searchQuery, cursor ?? null],
     queryFn: async () => {
       const response = await cardsApi.list({
         limit,
-        offset: page * limit,
+        cursor,
         q: searchQuery || undefined,
       })
       return response
@@ -59,6 +62,15 @@ export default function CardListPage() {
     handleCloseEditor()
   }
 
+  const handlePageChange = (nextPage: number) => {
+    const nextCursor = data?.pagination.next_cursor
+    if (nextPage > page) {
+      if (!nextCursor) return
+      setCursors((prev) => [...prev.slice(0, page), nextCursor])
+    }
+    setPage(nextPage)
+  }
+
   if (isLoading) {
     return <div className="p-6">読み込み中...</div>
   }
@@ -87,6 +99,7 @@ export default function CardListPage() {
           onChange={(e) => {
             setSearchQuery(e.target.value)
             setPage(0)
+            setCursors([])
           }}
           className="w-full max-w-md px-4 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-indigo-500"
         />
@@ -103,7 +116,8 @@ export default function CardListPage() {
         onEdit={handleEdit}
         onDelete={handleDelete}
         pagination={data?.pagination}
-        onPageChange={setPage}
+        page={page}
+        onPageChange={handlePageChange}
       />
     </div>
   )
@@ -7,16 +7,19 @@ import DatasetImport from '../components/dataset/DatasetImport'
 export default function DatasetListPage() {
   const [searchQuery, setSearchQuery] = useState('')
   const [page, setPage] = useState(0)
+  // cursors[i] は i+1 ページ目を取得するカーソル
+  const [cursors, setCursors] = useState<string[]>([])
   const [showImport, setShowImport] = useState(false)
   const queryClient = useQueryClient()
   const limit = 20
+  const cursor = page > 0 ? cursors[page - 1] : undefined
 
   const { data, isLoading, error } = useQuery({
-    queryKey: ['datasets', searchQuery, page],
+    queryKey: ['datasets', searchQuery, cursor ?? null],
     queryFn: async () => {
       const response = await datasetsApi.list({
         limit,
-        offset: page * limit,
+        cursor,
         q: searchQuery || undefined,
       })
       return response
@@ -38,6 +41,15 @@ export default function DatasetListPage() {
     }
   }
 
+  const handlePageChange = (nextPage: number) => {
+    const nextCursor = data?.pagination.next_cursor
+    if (nextPage > page) {
+      if (!nextCursor) return
+      setCursors((prev) => [...prev.slice(0, page), nextCursor])
+    }
+    setPage(nextPage)
+  }
+
   if (isLoading) {
     return <div className="p-6">読み込み中...</div>
   }
@@ -66,6 +78,7 @@ export default function DatasetListPage() {
           onChange={(e) => {
             setSearchQuery(e.target.value)
             setPage(0)
+            setCursors([])
           }}
           className="w-full max-w-md px-4 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-indigo-500"
         />
@@ -87,7 +100,8 @@ export default function DatasetListPage() {
         datasets={data?.data || []}
         onDelete={handleDelete}
         pagination={data?.pagination}
-        onPageChange={setPage}
+        page={page}
+        onPageChange={handlePageChange}
       />
     </div>
   )
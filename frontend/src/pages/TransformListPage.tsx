@@ -7,17 +7,20 @@ import TransformEditor from '../components/transform/TransformEditor'
 export default function TransformListPage() {
   const [searchQuery, setSearchQuery] = useState('')
   const [page, setPage] = useState(0)
+  // cursors[i] は i+1 ページ目を取得するカーソル
+  const [cursors, setCursors] = useState<string[]>([])
   const [editingTransform, setEditingTransform] = useState<Transform | null>(null)
   const [showCreate, setShowCreate] = useState(false)
   const queryClient = useQueryClient()
   const limit = 20
+  const cursor = page > 0 ? cursors[page - 1] : undefined
 
   const { data, isLoading, error } = useQuery({
-    queryKey: ['transforms', searchQuery, page],
+    queryKey: ['transforms', searchQuery, cursor ?? null],
     queryFn: async () => {
       const response = await transformsApi.list({
         limit,
-        offset: page * limit,
+        cursor,
         q: searchQuery || undefined,
       })
       return response
@@ -59,6 +62,15 @@ export default function TransformListPage() {
     handleCloseEditor()
   }
 
+  const handlePageChange = (nextPage: number) => {
+    const nextCursor = data?.pagination.next_cursor
+    if (nextPage > page) {
+      if (!nextCursor) return
+      setCursors((prev) => [...prev.slice(0, page), nextCursor])
+    }
+    setPage(nextPage)
+  }
+
   if (isLoading) {
     return <div className="p-6">読み込み中...</div>
   }
@@ -87,6 +99,7 @@ export default function TransformListPage() {
           onChange={(e) => {
             setSearchQuery(e.target.value)
             setPage(0)
+            setCursors([])
           }}
           className="w-full max-w-md px-4 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-indigo-500"
         />
@@ -107,7 +120,8 @@ export default function TransformListPage() {
         onEdit={handleEdit}
         onDelete={handleDelete}
         pagination={data?.pagination}
-        onPageChange={setPage}
+        page={page}
+        onPageChange={handlePageChange}
       />
     </div>
   )
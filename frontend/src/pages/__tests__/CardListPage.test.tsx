@@ -102,9 +102,8 @@ describe('CardListPage', () => {
     vi.mocked(cardsApi.list).mockResolvedValueOnce({
       data: mockCards,
       pagination: {
-        total: 2,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -165,9 +164,8 @@ describe('CardListPage', () => {
     vi.mocked(cardsApi.list).mockResolvedValue({
       data: mockCards,
       pagination: {
-        total: 1,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -201,9 +199,8 @@ describe('CardListPage', () => {
     vi.mocked(cardsApi.list).mockResolvedValue({
       data: [],
       pagination: {
-        total: 0,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -250,9 +247,8 @@ describe('CardListPage', () => {
     vi.mocked(cardsApi.list).mockResolvedValueOnce({
       data: [mockCard],
       pagination: {
-        total: 1,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -290,9 +286,8 @@ describe('CardListPage', () => {
     vi.mocked(cardsApi.list).mockResolvedValue({
       data: [mockCard],
       pagination: {
-        total: 1,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -318,9 +313,8 @@ describe('CardListPage', () => {
     vi.mocked(cardsApi.list).mockResolvedValueOnce({
       data: [],
       pagination: {
-        total: 0,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
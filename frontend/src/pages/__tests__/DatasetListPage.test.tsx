@@ -108,9 +108,8 @@ describe('DatasetListPage', () => {
     vi.mocked(datasetsApi.list).mockResolvedValueOnce({
       data: mockDatasets,
       pagination: {
-        total: 2,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -175,9 +174,8 @@ describe('DatasetListPage', () => {
     vi.mocked(datasetsApi.list).mockResolvedValue({
       data: mockDatasets,
       pagination: {
-        total: 1,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -211,9 +209,8 @@ describe('DatasetListPage', () => {
     vi.mocked(datasetsApi.list).mockResolvedValueOnce({
       data: [],
       pagination: {
-        total: 0,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -237,9 +234,8 @@ describe('DatasetListPage', () => {
     vi.mocked(datasetsApi.list).mockResolvedValue({
       data: [],
       pagination: {
-        total: 0,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -270,9 +266,8 @@ describe('DatasetListPage', () => {
     vi.mocked(datasetsApi.list).mockResolvedValue({
       data: [],
       pagination: {
-        total: 0,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -320,9 +315,8 @@ describe('DatasetListPage', () => {
     vi.mocked(datasetsApi.list).mockResolvedValue({
       data: [mockDataset],
       pagination: {
-        total: 1,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -103,9 +103,8 @@ describe('TransformListPage', () => {
     vi.mocked(transformsApi.list).mockResolvedValueOnce({
       data: mockTransforms,
       pagination: {
-        total: 2,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -167,9 +166,8 @@ describe('TransformListPage', () => {
     vi.mocked(transformsApi.list).mockResolvedValue({
       data: mockTransforms,
       pagination: {
-        total: 1,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -203,9 +201,8 @@ describe('TransformListPage', () => {
     vi.mocked(transformsApi.list).mockResolvedValue({
       data: [],
       pagination: {
-        total: 0,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -253,9 +250,8 @@ describe('TransformListPage', () => {
     vi.mocked(transformsApi.list).mockResolvedValueOnce({
       data: [mockTransform],
       pagination: {
-        total: 1,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -294,9 +290,8 @@ describe('TransformListPage', () => {
     vi.mocked(transformsApi.list).mockResolvedValue({
       data: [mockTransform],
       pagination: {
-        total: 1,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -322,9 +317,8 @@ describe('TransformListPage', () => {
     vi.mocked(transformsApi.list).mockResolvedValueOnce({
       data: [],
       pagination: {
-        total: 0,
         limit: 20,
-        offset: 0,
+        next_cursor: null,
         has_next: false,
       },
     })
@@ -67,21 +67,21 @@ export const mockTransform: Transform = {
 export function createMockCardListResponse(data: Card[] = [mockCard]): CardListResponse {
   return {
     data,
-    pagination: { total: data.length, limit: 10, offset: 0, has_next: false },
+    pagination: { limit: 10, next_cursor: null, has_next: false },
   }
 }
 
 export function createMockDatasetListResponse(data: Dataset[] = [mockDataset]): DatasetListResponse {
   return {
     data,
-    pagination: { total: data.length, limit: 10, offset: 0, has_next: false },
+    pagination: { limit: 10, next_cursor: null, has_next: false },
   }
 }
 
 export function createMockTransformListResponse(data: Transform[] = [mockTransform]): TransformListResponse {
   return {
     data,
-    pagination: { total: data.length, limit: 10, offset: 0, has_next: false },
+    pagination: { limit: 10, next_cursor: null, has_next: false },
   }
 }
 
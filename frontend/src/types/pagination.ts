@@ -0,0 +1,7 @@
+/** 一覧APIのページング情報（カーソル方式） */
+export interface CursorPagination {
+  limit: number
+  /** 次のページを取得するカーソル（最後のページではnull） */
+  next_cursor: string | null
+  has_next: boolean
+}